@@ -0,0 +1,29 @@
+import asyncio
+import logging
+from livekit.agents import function_tool
+
+from features import camera_manager
+
+logger = logging.getLogger(__name__)
+
+
+@function_tool
+async def export_camera_history(kind: str = "clip", seconds: float = 10.0) -> str:
+    """Save what the camera saw in the last few seconds.
+
+    kind: "clip" for a video, "sheet" for one image of thumbnails.
+    seconds: how far back to go.
+    """
+    camera = camera_manager.camera
+    try:
+        if kind == "sheet":
+            future = camera.export_contact_sheet(seconds=seconds)
+        else:
+            future = camera.export_clip(seconds=seconds)
+        # The export (or the wait for the GUI that owns the camera) runs off the event loop.
+        path = await asyncio.to_thread(future.result, camera_manager.EXPORT_REQUEST_TIMEOUT + 5)
+        logger.info(f"Camera export saved: {path}")
+        return f"Camera export saved: {path}"
+    except Exception as e:
+        logger.error(f"Camera export failed: {e}")
+        return f"Camera export नहीं हो पाया: {e}"
@@ -4,18 +4,70 @@ Stores messages (user and assistant) in a SQLite database under jarvis_data/
 Provides helpers to save conversations, recall recent history, search, summarize,
 and prune old entries according to retention policy.
 
+Writes go through a background `MemoryWriter` that owns one long-lived
+connection and group-commits queued messages (and their `data/memory.jsonl`
+mirror lines) in a single transaction, so chatty tool sessions do not pay for
+a connection + fsync per message. Call `flush()` to wait for pending writes;
+pending writes are flushed automatically at interpreter exit.
+
+Retention runs in the background (`set_retention_days`): old rows are deleted
+in small batches queued on the same writer, optionally archived into
+compressed per-month DB files, and freed pages are returned with incremental
+vacuum steps, so pruning never holds the DB for long.
+
+Message bodies over BODY_COMPRESS_THRESHOLD (typically tool output) are
+stored once per distinct content, compressed, in `message_bodies`; reads
+return the full text as before.
+
+Importing the module does no I/O: the DB file, directories and schema are
+created lazily on first use, and the schema is versioned (`schema_version`
+table) with forward-only migrations.
+
 This is lightweight and self-contained (no external services).
 """
 from __future__ import annotations
 import sqlite3
 import os
+import re
+import zlib
 import json
+import hashlib
 import time
+import queue
+import atexit
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future
 from typing import List, Dict, Optional
 
+try:
+    import zstandard as _zstd
+except Exception:
+    _zstd = None
+
 DB_FILENAME = 'jarvis_memory.db'
 DEFAULT_RETENTION_DAYS: Optional[int] = None  # None == keep forever
 
+# Write-behind defaults (see configure_writer()).
+WRITER_QUEUE_SIZE = 10000       # max queued messages before save_message blocks
+WRITER_BATCH_SIZE = 500         # max messages committed per transaction
+WRITER_FLUSH_INTERVAL = 0.05    # seconds to keep collecting a batch before committing
+WRITER_SYNCHRONOUS = 'NORMAL'   # PRAGMA synchronous for the writer: OFF | NORMAL | FULL
+WRITER_FSYNC_MIRROR = False     # fsync data/memory.jsonl after every batch
+WRITER_WAIT_TIMEOUT = 30.0      # max seconds save_message(wait=True) waits for its commit
+READ_CACHE_SIZE = 128           # cached recall/search results (0 disables)
+
+# Retention defaults (see start_retention()).
+RETENTION_INTERVAL = 3600.0     # seconds between background retention runs
+RETENTION_BATCH_SIZE = 500      # rows deleted per writer job
+RETENTION_BATCH_PAUSE = 0.05    # seconds between batches so replies interleave
+VACUUM_PAGES_PER_STEP = 256     # pages released per incremental_vacuum step
+
+# Large bodies (tool output, listings, tracebacks) are stored compressed and
+# deduplicated in message_bodies; messages.text keeps a preview for search.
+BODY_COMPRESS_THRESHOLD = 4096  # bytes of UTF-8 text before a body is moved out
+BODY_PREVIEW_CHARS = 1024       # chars kept inline (indexed by FTS / semantic recall)
+
 
 def _db_path() -> str:
     d = os.path.join(os.getcwd(), 'jarvis_data')
@@ -38,15 +90,57 @@ def _memory_jsonl_path() -> str:
     return os.path.join(_data_dir_path(), 'memory.jsonl')
 
 
-def _connect():
+def _pruned_path(jsonl_path: Optional[str] = None) -> str:
+    return os.path.join(os.path.dirname(jsonl_path or _memory_jsonl_path()), 'memory_pruned.json')
+
+
+def pruned_before(jsonl_path: Optional[str] = None) -> float:
+    """Timestamp before which retention has deleted every message (0 = nothing pruned).
+
+    Kept next to the append-only JSONL mirror, which still holds those
+    messages, so tools reading the mirror can tell pruned rows from lost ones.
+    """
+    try:
+        with open(_pruned_path(jsonl_path), 'r', encoding='utf-8') as f:
+            return float(json.load(f).get('pruned_before') or 0.0)
+    except Exception:
+        return 0.0
+
+
+def _record_pruned(ts: float):
+    if ts <= pruned_before():
+        return
+    path = _pruned_path()
+    try:
+        with open(path + '.tmp', 'w', encoding='utf-8') as f:
+            json.dump({'pruned_before': ts, 'updated_at': time.time()}, f)
+        os.replace(path + '.tmp', path)
+    except Exception:
+        pass
+
+
+def _open():
     path = _db_path()
     conn = sqlite3.connect(path, timeout=10, check_same_thread=False)
+    # Must precede the first write to a new file (switching to WAL counts);
+    # existing DBs can be converted with enable_incremental_vacuum().
+    conn.execute("PRAGMA auto_vacuum=INCREMENTAL;")
     conn.execute("PRAGMA journal_mode=WAL;")
     return conn
 
 
+def _connect():
+    """Open a connection, creating/migrating the schema on first use."""
+    _ensure_schema()
+    return _open()
+
+
 def init_db():
-    conn = _connect()
+    """Create or migrate the schema now instead of on first use."""
+    _ensure_schema()
+
+
+def _create_messages(conn):
     cur = conn.cursor()
     cur.execute(
         """
@@ -61,79 +155,761 @@ def init_db():
     )
     cur.execute("CREATE INDEX IF NOT EXISTS idx_messages_timestamp ON messages(timestamp)")
     conn.commit()
-    conn.close()
 
 
-# Initialize on import
-init_db()
+# Full-text index over messages.text. It is an external-content FTS5 table
+# (the text lives only in `messages`) kept in sync by triggers.
+_fts_available = False
 
 
-def save_message(sender: str, text: str, metadata: Optional[Dict] = None, ts: Optional[float] = None) -> int:
-    """Save a single message. Returns the inserted row id."""
-    if ts is None:
-        ts = time.time()
-    meta_json = json.dumps(metadata, ensure_ascii=False) if metadata else None
-    conn = _connect()
+def _init_fts(conn):
+    """Create the FTS5 index + sync triggers and backfill it for existing DBs."""
+    global _fts_available
     cur = conn.cursor()
-    cur.execute("INSERT INTO messages (sender, text, timestamp, metadata) VALUES (?, ?, ?, ?)",
-                (sender, text, ts, meta_json))
-    rid = cur.lastrowid
+    try:
+        existed = cur.execute(
+            "SELECT 1 FROM sqlite_master WHERE type='table' AND name='messages_fts'").fetchone() is not None
+        cur.execute(
+            """
+            CREATE VIRTUAL TABLE IF NOT EXISTS messages_fts USING fts5(
+                text,
+                content='messages',
+                content_rowid='id',
+                tokenize='unicode61 remove_diacritics 2'
+            )
+            """
+        )
+        cur.execute(
+            """
+            CREATE TRIGGER IF NOT EXISTS messages_fts_ai AFTER INSERT ON messages BEGIN
+                INSERT INTO messages_fts(rowid, text) VALUES (new.id, new.text);
+            END
+            """
+        )
+        cur.execute(
+            """
+            CREATE TRIGGER IF NOT EXISTS messages_fts_ad AFTER DELETE ON messages BEGIN
+                INSERT INTO messages_fts(messages_fts, rowid, text) VALUES ('delete', old.id, old.text);
+            END
+            """
+        )
+        cur.execute(
+            """
+            CREATE TRIGGER IF NOT EXISTS messages_fts_au AFTER UPDATE OF text ON messages BEGIN
+                INSERT INTO messages_fts(messages_fts, rowid, text) VALUES ('delete', old.id, old.text);
+                INSERT INTO messages_fts(rowid, text) VALUES (new.id, new.text);
+            END
+            """
+        )
+        if not existed:
+            # Existing DB from before the index: backfill from messages.
+            cur.execute("INSERT INTO messages_fts(messages_fts) VALUES ('rebuild')")
+        conn.commit()
+        _fts_available = True
+    except sqlite3.OperationalError:
+        # SQLite built without FTS5: search_history falls back to LIKE.
+        conn.rollback()
+        _fts_available = False
+
+
+# ---------- Large message bodies ----------
+#
+# A message whose text is over BODY_COMPRESS_THRESHOLD is stored once in
+# message_bodies, keyed by its SHA-256 and compressed (zstd when the
+# `zstandard` package is installed, zlib otherwise). The messages row gets
+# FLAG_BODY_EXTERNAL, the hash and a preview in `text`. Readers select
+# _MSG_COLS over _MSG_FROM and get the full text back from _row_to_dict.
+
+FLAG_BODY_EXTERNAL = 1
+
+_MSG_COLS = "m.id, m.sender, m.text, m.timestamp, m.metadata, b.codec, b.data"
+_MSG_FROM = "messages m LEFT JOIN message_bodies b ON b.hash = m.body_hash"
+
+
+def _create_message_bodies(conn):
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS message_bodies (
+            hash TEXT PRIMARY KEY,
+            codec TEXT NOT NULL,
+            size INTEGER NOT NULL,
+            data BLOB NOT NULL
+        )
+        """
+    )
+    cols = {r[1] for r in conn.execute("PRAGMA table_info(messages)")}
+    if 'flags' not in cols:
+        conn.execute("ALTER TABLE messages ADD COLUMN flags INTEGER NOT NULL DEFAULT 0")
+    if 'body_hash' not in cols:
+        conn.execute("ALTER TABLE messages ADD COLUMN body_hash TEXT")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_messages_body_hash ON messages(body_hash) "
+                 "WHERE body_hash IS NOT NULL")
     conn.commit()
-    conn.close()
-    # Also append a human-readable JSONL entry to data/memory.jsonl so the
-    # conversation is visible and portable outside the sqlite DB.
+
+
+def _compress(data: bytes):
+    if _zstd is not None:
+        return 'zstd', _zstd.ZstdCompressor(level=6).compress(data)
+    return 'zlib', zlib.compress(data, 6)
+
+
+def _decompress(codec: str, data: bytes) -> str:
+    if codec == 'zstd':
+        return _zstd.ZstdDecompressor().decompress(data).decode('utf-8')
+    return zlib.decompress(data).decode('utf-8')
+
+
+def _pack_body(cur, text: str):
+    """Store text out of line if it is large. Returns (inline_text, flags, body_hash, new_body).
+
+    new_body is False when an identical body was already stored (dedup hit).
+    """
+    data = text.encode('utf-8')
+    if len(data) < BODY_COMPRESS_THRESHOLD:
+        return text, 0, None, False
+    h = hashlib.sha256(data).hexdigest()
+    new_body = cur.execute("SELECT 1 FROM message_bodies WHERE hash = ?", (h,)).fetchone() is None
+    if new_body:
+        codec, blob = _compress(data)
+        cur.execute("INSERT INTO message_bodies (hash, codec, size, data) VALUES (?, ?, ?, ?)",
+                    (h, codec, len(data), blob))
+    return text[:BODY_PREVIEW_CHARS], FLAG_BODY_EXTERNAL, h, new_body
+
+
+def _unpack_text(text: str, codec: Optional[str], data: Optional[bytes]) -> str:
+    if data is None:
+        return text
     try:
-        mem_path = _memory_jsonl_path()
-        entry = {'id': rid, 'sender': sender, 'text': text, 'timestamp': ts, 'metadata': metadata}
-        with open(mem_path, 'a', encoding='utf-8') as jf:
-            jf.write(json.dumps(entry, ensure_ascii=False) + "\n")
+        return _decompress(codec, data)
     except Exception:
-        # best-effort: do not fail the DB write
-        pass
-    return rid
+        # e.g. a zstd body read without zstandard installed
+        return text
 
 
-def save_conversation(user_text: str, assistant_text: str, metadata: Optional[Dict] = None) -> None:
-    """Save a pair of messages (user then assistant)."""
-    save_message('user', user_text, metadata)
-    save_message('assistant', assistant_text, metadata)
+def _drop_orphan_bodies(conn, hashes):
+    """Delete bodies no message references any more (after deletes)."""
+    conn.executemany("DELETE FROM message_bodies WHERE hash = ? AND NOT EXISTS "
+                     "(SELECT 1 FROM messages WHERE body_hash = ?)", [(h, h) for h in set(hashes) if h])
 
 
-def recall_last(n: int = 10) -> List[Dict]:
-    """Return the last n messages as a list of dicts ordered newest->oldest."""
+def body_storage_stats() -> Dict:
+    """Sizes of out-of-line bodies: stored (compressed) vs. raw, and dedup savings."""
+    _sync_pending()
     conn = _connect()
-    cur = conn.cursor()
-    cur.execute("SELECT id, sender, text, timestamp, metadata FROM messages ORDER BY timestamp DESC LIMIT ?", (n,))
-    rows = cur.fetchall()
-    conn.close()
-    out = []
-    for r in rows:
-        meta = None
+    try:
+        bodies, raw, stored = conn.execute(
+            "SELECT COUNT(*), COALESCE(SUM(size), 0), COALESCE(SUM(LENGTH(data)), 0) FROM message_bodies").fetchone()
+        refs, ref_raw = conn.execute(
+            "SELECT COUNT(*), COALESCE(SUM(b.size), 0) FROM messages m JOIN message_bodies b "
+            "ON b.hash = m.body_hash").fetchone()
+    finally:
+        conn.close()
+    return {'bodies': bodies, 'messages': refs, 'raw_bytes': ref_raw, 'unique_bytes': raw,
+            'stored_bytes': stored, 'ratio': (stored / ref_raw) if ref_raw else 1.0}
+
+
+def compress_existing_bodies(batch_size: int = 200) -> int:
+    """Move large bodies written before compression existed out of line.
+
+    Runs as writer jobs of batch_size rows each. Returns rows converted.
+    """
+    def job(conn):
+        rows = conn.execute("SELECT id, text FROM messages WHERE flags & ? = 0 AND LENGTH(CAST(text AS BLOB)) >= ? "
+                            "LIMIT ?", (FLAG_BODY_EXTERNAL, BODY_COMPRESS_THRESHOLD, batch_size)).fetchall()
+        with conn:
+            cur = conn.cursor()
+            for rid, text in rows:
+                inline, flags, h, _ = _pack_body(cur, text)
+                cur.execute("UPDATE messages SET text = ?, flags = flags | ?, body_hash = ? WHERE id = ?",
+                            (inline, flags, h, rid))
+        return len(rows)
+
+    total = 0
+    while True:
+        n = get_writer().run_job(job).result()
+        total += n
+        if n < batch_size:
+            return total
+
+
+class _QueuedMessage:
+    __slots__ = ('sender', 'text', 'timestamp', 'metadata', 'urgent', 'future')
+
+    def __init__(self, sender: str, text: str, timestamp: float, metadata: Optional[Dict], urgent: bool):
+        self.sender = sender
+        self.text = text
+        self.timestamp = timestamp
+        self.metadata = metadata
+        self.urgent = urgent
+        self.future: Future = Future()
+
+
+class _QueuedToolCall:
+    __slots__ = ('row', 'urgent', 'future')
+
+    def __init__(self, row: tuple):
+        self.row = row
+        self.urgent = False
+        self.future: Future = Future()
+
+
+class _Job:
+    __slots__ = ('fn', 'future')
+
+    def __init__(self, fn):
+        self.fn = fn
+        self.future: Future = Future()
+
+
+_STOP = object()
+
+
+class MemoryWriter:
+    """Write-behind service for the messages table.
+
+    A single daemon thread owns one SQLite connection. Messages submitted from
+    any thread are queued (bounded; `submit` blocks when the queue is full) and
+    committed in batches of up to `batch_size` rows per transaction. The JSONL
+    mirror lines for a batch are appended with one write after the commit.
+
+    Durability knobs:
+    - `synchronous`: SQLite PRAGMA synchronous for the writer connection. With
+      WAL, NORMAL never corrupts the DB but may lose the last batches on power
+      loss; FULL syncs every commit; OFF leaves syncing to the OS.
+    - `flush_interval`: how long the writer keeps collecting a batch before
+      committing. Waiting callers and `flush()` cut the wait short.
+    - `fsync_mirror`: also fsync `data/memory.jsonl` after every batch.
+    """
+
+    def __init__(self,
+                 queue_size: int = WRITER_QUEUE_SIZE,
+                 batch_size: int = WRITER_BATCH_SIZE,
+                 flush_interval: float = WRITER_FLUSH_INTERVAL,
+                 synchronous: str = WRITER_SYNCHRONOUS,
+                 fsync_mirror: bool = WRITER_FSYNC_MIRROR):
+        synchronous = str(synchronous).upper()
+        if synchronous not in ('OFF', 'NORMAL', 'FULL'):
+            raise ValueError(f"synchronous must be OFF, NORMAL or FULL, got {synchronous!r}")
+        self.batch_size = max(1, int(batch_size))
+        self.flush_interval = max(0.0, float(flush_interval))
+        self.synchronous = synchronous
+        self.fsync_mirror = bool(fsync_mirror)
+        self._queue: queue.Queue = queue.Queue(maxsize=max(1, int(queue_size)))
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._closed = False
+        self.dropped_tool_calls = 0
+
+    @property
+    def pending(self) -> int:
+        """Number of submitted items not yet committed."""
+        return self._queue.unfinished_tasks
+
+    def _ensure_started(self):
+        if self._closed:
+            raise RuntimeError('MemoryWriter is closed')
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._closed:
+                raise RuntimeError('MemoryWriter is closed')
+            # (Re)start: a writer that died failed everything it had queued.
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name='jarvis-memory-writer', daemon=True)
+                self._thread.start()
+
+    def _put(self, item, block: bool = True):
+        self._queue.put(item, block)
+        if not self._thread.is_alive():
+            # The writer died between the start check and the put.
+            self._ensure_started()
+
+    def submit(self, sender: str, text: str, metadata: Optional[Dict] = None, ts: Optional[float] = None,
+               urgent: bool = False) -> Future:
+        """Queue a message. Returns a Future resolving to the inserted row id.
+
+        Pass urgent=True when the caller is about to wait on the result so the
+        writer commits without waiting out the flush interval.
+        """
+        self._ensure_started()
+        item = _QueuedMessage(sender, text, time.time() if ts is None else ts, metadata, urgent)
+        self._put(item)
+        return item.future
+
+    def submit_tool_call(self, row: tuple) -> Future:
+        """Queue a tool_calls ledger row (committed with the next message batch).
+
+        Never blocks: callers run on the agent's event loop, so with the queue
+        full the row is dropped (counted in `dropped_tool_calls`) and the
+        returned Future fails with queue.Full.
+        """
+        self._ensure_started()
+        item = _QueuedToolCall(row)
         try:
-            meta = json.loads(r[4]) if r[4] else None
+            self._put(item, block=False)
+        except queue.Full as e:
+            self.dropped_tool_calls += 1
+            item.future.set_exception(e)
+        return item.future
+
+    def run_job(self, fn) -> Future:
+        """Run fn(conn) on the writer thread, between message batches.
+
+        Used for maintenance writes (retention deletes, vacuum steps) so they
+        are serialized with message inserts on the one writer connection
+        instead of competing for the DB lock. fn manages its own transaction.
+        """
+        self._ensure_started()
+        job = _Job(fn)
+        self._put(job)
+        return job.future
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Wait until everything submitted so far is committed. Returns False on timeout."""
+        if self._thread is None or not self._thread.is_alive():
+            return self.pending == 0
+        barrier: Future = Future()
+        self._queue.put(barrier)
+        try:
+            barrier.result(timeout=timeout)
+            return True
         except Exception:
-            meta = None
-        out.append({'id': r[0], 'sender': r[1], 'text': r[2], 'timestamp': r[3], 'metadata': meta})
-    return out
+            return False
+
+    def close(self, timeout: Optional[float] = 5.0):
+        """Flush pending writes, stop the writer thread and close its connection."""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+        if self._thread is not None and self._thread.is_alive():
+            self._queue.put(_STOP)
+            self._thread.join(timeout=timeout)
+
+    def _run(self):
+        # Connect once there is work, so a failing connection fails that work.
+        batch = [self._queue.get()]
+        try:
+            conn = _connect()
+        except BaseException as e:
+            self._abort(batch, e)
+            return
+        try:
+            conn.execute(f"PRAGMA synchronous={self.synchronous};")
+        except Exception:
+            pass
+        try:
+            stop = False
+            while not stop:
+                if not batch:
+                    batch = [self._queue.get()]
+                deadline = time.monotonic() + self.flush_interval
+                # Collect until the batch is full, the interval expires, or
+                # somebody is waiting on the result.
+                while len(batch) < self.batch_size:
+                    last = batch[-1]
+                    if last is _STOP or isinstance(last, (Future, _Job)) or last.urgent:
+                        break
+                    remaining = deadline - time.monotonic()
+                    try:
+                        if remaining <= 0:
+                            batch.append(self._queue.get_nowait())
+                        else:
+                            batch.append(self._queue.get(timeout=remaining))
+                    except queue.Empty:
+                        break
+                stop = any(item is _STOP for item in batch)
+                self._write_batch(conn, batch)
+                batch = []
+                if not stop and self._queue.empty():
+                    # Idle: fold the new messages into their hour summaries.
+                    try:
+                        _refresh_dirty_hours(conn)
+                    except Exception:
+                        pass
+        except BaseException as e:
+            self._abort(batch, e)
+        finally:
+            try:
+                conn.close()
+            except Exception:
+                pass
+
+    def _abort(self, batch, error: BaseException):
+        """The writer thread is dying: fail the current batch and everything queued."""
+        print(f"[memory] writer stopped: {error}")
+        items = list(batch)
+        for item in batch:
+            fut = item if isinstance(item, Future) else getattr(item, 'future', None)
+            if fut is None or not fut.done():
+                self._queue.task_done()
+        while True:
+            try:
+                items.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+            self._queue.task_done()
+        for item in items:
+            fut = item if isinstance(item, Future) else getattr(item, 'future', None)
+            if fut is not None and not fut.done():
+                fut.set_exception(error)
+
+    def _write_batch(self, conn, batch):
+        msgs = [item for item in batch if isinstance(item, _QueuedMessage)]
+        calls = [item for item in batch if isinstance(item, _QueuedToolCall)]
+        lines = []
+        error: Optional[BaseException] = None
+        if msgs or calls:
+            try:
+                cur = conn.cursor()
+                with conn:
+                    if calls:
+                        cur.executemany(_TOOL_CALL_INSERT, [c.row for c in calls])
+                    for m in msgs:
+                        meta_json = json.dumps(m.metadata, ensure_ascii=False) if m.metadata else None
+                        inline, flags, body_hash, new_body = _pack_body(cur, m.text)
+                        cur.execute("INSERT INTO messages (sender, text, timestamp, metadata, flags, body_hash) "
+                                    "VALUES (?, ?, ?, ?, ?, ?)",
+                                    (m.sender, inline, m.timestamp, meta_json, flags, body_hash))
+                        rid = cur.lastrowid
+                        entry = {'id': rid, 'sender': m.sender, 'text': m.text,
+                                 'timestamp': m.timestamp, 'metadata': m.metadata}
+                        if body_hash is not None:
+                            # The mirror carries a large body once; repeats
+                            # point at the first copy by hash.
+                            entry['body_hash'] = body_hash
+                            if not new_body:
+                                entry['text'] = inline
+                                entry['body_ref'] = True
+                        lines.append((m, rid, json.dumps(entry, ensure_ascii=False) + "\n"))
+                    if msgs:
+                        _mark_summaries_dirty(cur, [m.timestamp for m in msgs])
+            except Exception as e:
+                error = e
+                lines = []
+        # Mirror the committed batch into data/memory.jsonl so the conversation
+        # is visible and portable outside the sqlite DB.
+        if lines:
+            try:
+                with open(_memory_jsonl_path(), 'a', encoding='utf-8') as jf:
+                    jf.write(''.join(line for _, _, line in lines))
+                    if self.fsync_mirror:
+                        jf.flush()
+                        os.fsync(jf.fileno())
+            except Exception:
+                # best-effort: do not fail the DB write
+                pass
+        for m, rid, _ in lines:
+            m.future.set_result(rid)
+        for item in batch:
+            if isinstance(item, (_QueuedMessage, _QueuedToolCall)) and error is not None:
+                item.future.set_exception(error)
+            elif isinstance(item, _QueuedToolCall):
+                item.future.set_result(None)
+            elif isinstance(item, Future):
+                item.set_result(None)
+            elif isinstance(item, _Job):
+                try:
+                    item.future.set_result(item.fn(conn))
+                except BaseException as e:
+                    try:
+                        conn.rollback()
+                    except Exception:
+                        pass
+                    item.future.set_exception(e)
+            self._queue.task_done()
+
+
+_writer: Optional[MemoryWriter] = None
+_writer_lock = threading.Lock()
+
+
+def get_writer() -> MemoryWriter:
+    """Return the process-wide MemoryWriter, creating it on first use."""
+    global _writer
+    if _writer is None:
+        with _writer_lock:
+            if _writer is None:
+                _writer = MemoryWriter()
+    return _writer
+
+
+def configure_writer(**options) -> MemoryWriter:
+    """Replace the process-wide writer with one using the given options.
+
+    Accepts the MemoryWriter keyword arguments (queue_size, batch_size,
+    flush_interval, synchronous, fsync_mirror). Pending writes of the previous
+    writer are flushed first.
+    """
+    global _writer
+    new = MemoryWriter(**options)
+    with _writer_lock:
+        old, _writer = _writer, new
+    if old is not None:
+        old.close()
+    return new
+
+
+def flush(timeout: Optional[float] = None) -> bool:
+    """Block until all queued messages are committed. Returns False on timeout."""
+    w = _writer
+    return True if w is None else w.flush(timeout)
+
+
+def shutdown(timeout: Optional[float] = 5.0):
+    """Flush and stop the background writer (also run automatically at exit)."""
+    global _writer
+    stop_retention()
+    with _writer_lock:
+        w, _writer = _writer, None
+    if w is not None:
+        w.close(timeout)
+    _read_cache.close()
+
+
+atexit.register(shutdown)
+
+
+def _sync_pending():
+    """Make reads see this process's queued writes."""
+    w = _writer
+    if w is not None and w.pending:
+        w.flush()
+
+
+def save_message(sender: str, text: str, metadata: Optional[Dict] = None, ts: Optional[float] = None,
+                 wait: bool = True) -> Optional[int]:
+    """Save a single message via the background writer.
+
+    Returns the inserted row id. With wait=False the message is only queued
+    and None is returned immediately. Waiting gives up with TimeoutError after
+    WRITER_WAIT_TIMEOUT seconds; a writer that failed raises its error.
+    """
+    fut = get_writer().submit(sender, text, metadata, ts, urgent=wait)
+    if not wait:
+        return None
+    return fut.result(timeout=WRITER_WAIT_TIMEOUT)
+
+
+def save_conversation(user_text: str, assistant_text: str, metadata: Optional[Dict] = None,
+                      wait: bool = False) -> None:
+    """Save a pair of messages (user then assistant).
+
+    Both messages are queued back to back so they land in the same transaction.
+    By default this does not wait for the commit; pass wait=True to block.
+    Queuing itself blocks while the writer queue is full, so async callers
+    should run this in a thread.
+    """
+    w = get_writer()
+    w.submit('user', user_text, metadata)
+    fut = w.submit('assistant', assistant_text, metadata, urgent=wait)
+    if wait:
+        fut.result(timeout=WRITER_WAIT_TIMEOUT)
+
+
+def _row_to_dict(r) -> Dict:
+    """Convert an (id, sender, text, timestamp, metadata[, codec, data]) row into a message dict.
+
+    Rows selected with _MSG_COLS carry the out-of-line body, which replaces
+    the inline preview.
+    """
+    meta = None
+    try:
+        meta = json.loads(r[4]) if r[4] else None
+    except Exception:
+        meta = None
+    text = _unpack_text(r[2], r[5], r[6]) if len(r) > 6 else r[2]
+    return {'id': r[0], 'sender': r[1], 'text': text, 'timestamp': r[3], 'metadata': meta}
+
+
+class _ReadCache:
+    """In-process LRU of read results, invalidated by `PRAGMA data_version`.
+
+    The cache owns one reader connection. data_version on that connection
+    changes whenever any other connection (this process's writer, the GUI,
+    helper tools) commits to the DB, so checking it is enough to know that a
+    cached result is still current; when nothing was written, a repeated
+    recall costs one PRAGMA and a dict lookup.
+    """
+
+    def __init__(self, maxsize: int = READ_CACHE_SIZE):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._data: OrderedDict = OrderedDict()
+        self._version = None
+        self._conn = None
+        # Reentrant: summarize_recent's compute goes through recall_last.
+        self._lock = threading.RLock()
+
+    def query(self, key, compute):
+        """Return compute(conn) for key, reusing the cached value while the DB is unchanged."""
+        _sync_pending()
+        with self._lock:
+            if self._conn is None:
+                self._conn = _connect()
+            if self.maxsize <= 0:
+                return compute(self._conn)
+            version = self._conn.execute("PRAGMA data_version").fetchone()[0]
+            if version != self._version:
+                self._data.clear()
+                self._version = version
+            if key in self._data:
+                self._data.move_to_end(key)
+                self.hits += 1
+                return self._data[key]
+            self.misses += 1
+            value = compute(self._conn)
+            self._data[key] = value
+            if len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+            return value
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self._version = None
+
+    def close(self):
+        with self._lock:
+            self._data.clear()
+            self._version = None
+            if self._conn is not None:
+                try:
+                    self._conn.close()
+                except Exception:
+                    pass
+                self._conn = None
+
+
+_read_cache = _ReadCache()
+
+
+def read_cache_stats() -> Dict:
+    """Hit/miss counters of the recall/search result cache."""
+    return {'hits': _read_cache.hits, 'misses': _read_cache.misses, 'size': len(_read_cache._data),
+            'maxsize': _read_cache.maxsize}
+
+
+def clear_read_cache():
+    _read_cache.clear()
+
+
+def _copy_messages(msgs: List[Dict]) -> List[Dict]:
+    # Callers may mutate what they get back; the cached list must stay intact.
+    return [dict(m) for m in msgs]
+
+
+def recall_last(n: int = 10) -> List[Dict]:
+    """Return the last n messages as a list of dicts ordered newest->oldest."""
+    def compute(conn):
+        rows = conn.execute(f"SELECT {_MSG_COLS} FROM {_MSG_FROM} "
+                            "ORDER BY m.timestamp DESC LIMIT ?", (n,)).fetchall()
+        return [_row_to_dict(r) for r in rows]
+    return _copy_messages(_read_cache.query(('recall_last', n), compute))
+
+
+def _fts_query(query: str) -> str:
+    """Turn free text into a safe FTS5 query: every word must match as a prefix."""
+    tokens = re.findall(r'\w+', query, flags=re.UNICODE)
+    return ' '.join('"' + t.replace('"', '""') + '"*' for t in tokens)
+
+
+def search_ranked(query: str, limit: int = 10, sender: Optional[str] = None,
+                  since: Optional[float] = None, until: Optional[float] = None,
+                  highlight: bool = True, markers=('[', ']'), snippet_tokens: int = 12) -> List[Dict]:
+    """Full-text search over messages ranked by BM25 (best match first).
+
+    Every word of `query` must appear (prefix match, case-insensitive).
+    Optional filters: `sender` ('user'/'assistant'), and a time range
+    `since <= timestamp < until` (epoch seconds). Each result dict has the
+    usual message fields plus `rank` (lower is better) and, when `highlight`
+    is set, a `snippet` with matched terms wrapped in `markers`.
+    """
+    _ensure_schema()
+    match = _fts_query(query)
+    if not match or not _fts_available:
+        return []
+    sql = [f"SELECT {_MSG_COLS}, bm25(messages_fts) AS rank"]
+    params: list = []
+    if highlight:
+        sql.append(", snippet(messages_fts, 0, ?, ?, '…', ?)")
+        params += [markers[0], markers[1], max(1, min(64, int(snippet_tokens)))]
+    sql.append(" FROM messages_fts JOIN messages m ON m.id = messages_fts.rowid"
+               " LEFT JOIN message_bodies b ON b.hash = m.body_hash WHERE messages_fts MATCH ?")
+    params.append(match)
+    if sender is not None:
+        sql.append(" AND m.sender = ?")
+        params.append(sender)
+    if since is not None:
+        sql.append(" AND m.timestamp >= ?")
+        params.append(float(since))
+    if until is not None:
+        sql.append(" AND m.timestamp < ?")
+        params.append(float(until))
+    sql.append(" ORDER BY rank, m.timestamp DESC LIMIT ?")
+    params.append(limit)
+
+    def compute(conn):
+        out = []
+        for r in conn.execute(''.join(sql), params).fetchall():
+            d = _row_to_dict(r)
+            d['rank'] = r[7]
+            if highlight:
+                d['snippet'] = r[8]
+            out.append(d)
+        return out
+    return _copy_messages(_read_cache.query(('search_ranked',) + tuple(params), compute))
 
 
 def search_history(query: str, limit: int = 10) -> List[Dict]:
-    """Simple substring search over messages (case-insensitive)."""
+    """Search messages for query (case-insensitive), best matches first.
+
+    Uses the FTS5 index when available; falls back to a substring scan.
+    """
+    _ensure_schema()
+    if _fts_available and _fts_query(query):
+        return search_ranked(query, limit, highlight=False)
     q = f"%{query}%"
+    _sync_pending()
     conn = _connect()
     cur = conn.cursor()
-    cur.execute("SELECT id, sender, text, timestamp, metadata FROM messages WHERE text LIKE ? ORDER BY timestamp DESC LIMIT ?", (q, limit))
+    cur.execute(f"SELECT {_MSG_COLS} FROM {_MSG_FROM} WHERE m.text LIKE ? ORDER BY m.timestamp DESC LIMIT ?", (q, limit))
     rows = cur.fetchall()
     conn.close()
-    out = []
-    for r in rows:
-        meta = None
-        try:
-            meta = json.loads(r[4]) if r[4] else None
-        except Exception:
-            meta = None
-        out.append({'id': r[0], 'sender': r[1], 'text': r[2], 'timestamp': r[3], 'metadata': meta})
-    return out
+    return [_row_to_dict(r) for r in rows]
+
+
+def recall_relevant(query: str, k: int = 5, min_score: float = 0.15) -> List[Dict]:
+    """Return up to k past messages most similar to query, best first.
+
+    Uses the local vector index in Jarvis_semantic_memory (no network). Each
+    dict carries a `score` (cosine similarity). Falls back to full-text search
+    when numpy is not installed.
+    """
+    try:
+        import Jarvis_semantic_memory as sem
+    except Exception:
+        sem = None
+    if sem is None or not sem.available():
+        return search_history(query, k)
+    return sem.get_index().search(query, k, min_score)
+
+
+def warm_semantic_index() -> int:
+    """Load the semantic index and embed messages it has not seen yet.
+
+    Meant to run once at startup, off the event loop, so the first
+    recall_relevant() does not pay for catching up on the backlog. Returns
+    how many messages were indexed (0 without numpy).
+    """
+    try:
+        import Jarvis_semantic_memory as sem
+    except Exception:
+        return 0
+    if not sem.available():
+        return 0
+    return sem.get_index().refresh()
 
 
 def summarize_recent(n: int = 10) -> str:
@@ -142,33 +918,762 @@ def summarize_recent(n: int = 10) -> str:
     This is a simple helper; for real summarization you can replace this with
     an LLM call.
     """
-    msgs = recall_last(n)
-    parts = []
-    # oldest first for readability
-    for m in reversed(msgs):
-        sender = 'You' if m['sender'] == 'user' else 'Jarvis'
-        ts = time.strftime('%Y-%m-%d %H:%M', time.localtime(m['timestamp']))
-        parts.append(f"[{ts}] {sender}: {m['text']}")
-    return "\n".join(parts)
+    def compute(conn):
+        msgs = recall_last(n)
+        parts = []
+        # oldest first for readability
+        for m in reversed(msgs):
+            sender = 'You' if m['sender'] == 'user' else 'Jarvis'
+            ts = time.strftime('%Y-%m-%d %H:%M', time.localtime(m['timestamp']))
+            parts.append(f"[{ts}] {sender}: {m['text']}")
+        return "\n".join(parts)
+    return _read_cache.query(('summarize_recent', n), compute)
+
+
+# ---------- Hierarchical summaries ----------
+#
+# Rolling summaries per local-time bucket (hour -> day -> week) live in the
+# `summaries` table. Writing a message marks its hour/day/week rows dirty in
+# the same transaction:
+#   dirty = 0  clean, serve as-is
+#   dirty = 1  new messages arrived: hours fold in rows with id > last_message_id,
+#              days/weeks refresh their dirty children and re-merge them
+#   dirty = 2  rebuild from scratch (bucket first seen, or rows were deleted)
+# so reading a clean bucket is a single primary-key lookup.
+
+SUMMARY_GRANULARITIES = ('hour', 'day', 'week')
+_CHILD = {'day': 'hour', 'week': 'day'}
+_SUMMARY_KEYWORDS = 30       # keywords kept per bucket
+_TOPIC_MAX_LEN = 32          # longer tokens (hashes, base64, pasted blobs) are not topics
+_SUMMARY_HIGHLIGHTS = 5      # example user lines kept per bucket
+_STOPWORDS = frozenset("""
+a an and are as at be but by can do does for from has have how i if in into is it its me my no not
+of on or our so that the their them then there these they this to up us was we were what when where
+which who why will with you your yes ok okay please jarvis hai hain ho kya kar karo ka ki ke ko
+se me mein main mujhe aap tum ye yeh wo woh nahi bhi aur par tha thi the raha rahi rahe hoga
+""".split())
+
+
+def _init_summaries(conn):
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS summaries (
+            granularity TEXT NOT NULL,
+            bucket_start REAL NOT NULL,
+            bucket_end REAL NOT NULL,
+            message_count INTEGER NOT NULL DEFAULT 0,
+            user_count INTEGER NOT NULL DEFAULT 0,
+            assistant_count INTEGER NOT NULL DEFAULT 0,
+            first_ts REAL,
+            last_ts REAL,
+            last_message_id INTEGER NOT NULL DEFAULT 0,
+            keywords TEXT,
+            highlights TEXT,
+            summary TEXT,
+            dirty INTEGER NOT NULL DEFAULT 2,
+            updated_at REAL,
+            PRIMARY KEY (granularity, bucket_start)
+        )
+        """
+    )
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_summaries_dirty ON summaries(granularity, dirty)")
+    conn.commit()
+
+
+def _bucket_bounds(granularity: str, ts: float):
+    """Return (start, end) epoch seconds of the local-time bucket containing ts."""
+    lt = time.localtime(ts)
+    if granularity == 'hour':
+        start = (lt.tm_year, lt.tm_mon, lt.tm_mday, lt.tm_hour)
+        end = (lt.tm_year, lt.tm_mon, lt.tm_mday, lt.tm_hour + 1)
+    elif granularity == 'day':
+        start = (lt.tm_year, lt.tm_mon, lt.tm_mday, 0)
+        end = (lt.tm_year, lt.tm_mon, lt.tm_mday + 1, 0)
+    elif granularity == 'week':
+        monday = lt.tm_mday - lt.tm_wday
+        start = (lt.tm_year, lt.tm_mon, monday, 0)
+        end = (lt.tm_year, lt.tm_mon, monday + 7, 0)
+    else:
+        raise ValueError(f"granularity must be one of {SUMMARY_GRANULARITIES}, got {granularity!r}")
+    # mktime normalises out-of-range days/hours (e.g. day 0 or hour 24).
+    return (time.mktime(start + (0, 0, 0, 0, -1)), time.mktime(end + (0, 0, 0, 0, -1)))
+
+
+def _mark_summaries_dirty(cur, timestamps):
+    """Flag the hour/day/week buckets touched by new messages (inside the write txn)."""
+    seen = set()
+    for ts in timestamps:
+        for gran in SUMMARY_GRANULARITIES:
+            start, end = _bucket_bounds(gran, ts)
+            if (gran, start) in seen:
+                continue
+            seen.add((gran, start))
+            cur.execute(
+                "INSERT INTO summaries (granularity, bucket_start, bucket_end, dirty) VALUES (?, ?, ?, 2) "
+                "ON CONFLICT(granularity, bucket_start) DO UPDATE SET dirty = MAX(dirty, 1)",
+                (gran, start, end))
+
+
+def _invalidate_summaries_before(cur, cutoff: float):
+    """After deleting messages older than cutoff: drop or rebuild affected buckets."""
+    cur.execute("DELETE FROM summaries WHERE bucket_end <= ?", (cutoff,))
+    cur.execute("UPDATE summaries SET dirty = 2 WHERE bucket_start < ?", (cutoff,))
+
+
+def _empty_stats() -> Dict:
+    return {'message_count': 0, 'user_count': 0, 'assistant_count': 0, 'first_ts': None, 'last_ts': None,
+            'last_message_id': 0, 'keywords': {}, 'highlights': []}
+
+
+def _fold_messages(stats: Dict, rows) -> Dict:
+    """Fold (id, sender, text, timestamp) rows into bucket stats."""
+    kw = stats['keywords']
+    for rid, sender, text, ts in rows:
+        stats['message_count'] += 1
+        if sender == 'user':
+            stats['user_count'] += 1
+            if len(stats['highlights']) < _SUMMARY_HIGHLIGHTS and text and text.strip():
+                stats['highlights'].append(text.strip()[:120])
+        else:
+            stats['assistant_count'] += 1
+        stats['first_ts'] = ts if stats['first_ts'] is None else min(stats['first_ts'], ts)
+        stats['last_ts'] = ts if stats['last_ts'] is None else max(stats['last_ts'], ts)
+        stats['last_message_id'] = max(stats['last_message_id'], rid)
+        for tok in re.findall(r'\w+', (text or '').lower()):
+            if 2 < len(tok) <= _TOPIC_MAX_LEN and not tok.isdigit() and tok not in _STOPWORDS:
+                kw[tok] = kw.get(tok, 0) + 1
+    return stats
+
+
+def _merge_stats(children) -> Dict:
+    stats = _empty_stats()
+    kw = stats['keywords']
+    for c in children:
+        if not c['message_count']:
+            continue
+        for key in ('message_count', 'user_count', 'assistant_count'):
+            stats[key] += c[key]
+        for key, pick in (('first_ts', min), ('last_ts', max)):
+            if c[key] is not None:
+                stats[key] = c[key] if stats[key] is None else pick(stats[key], c[key])
+        stats['last_message_id'] = max(stats['last_message_id'], c['last_message_id'])
+        for word, n in c['keywords'].items():
+            if len(word) <= _TOPIC_MAX_LEN:   # buckets stored before the cap
+                kw[word] = kw.get(word, 0) + n
+        room = _SUMMARY_HIGHLIGHTS - len(stats['highlights'])
+        if room > 0:
+            stats['highlights'].extend(c['highlights'][:room])
+    return stats
+
+
+def _render_summary(granularity: str, start: float, stats: Dict) -> str:
+    fmt = '%Y-%m-%d %H:00' if granularity == 'hour' else '%Y-%m-%d'
+    label = {'hour': 'Hour of', 'day': 'Day', 'week': 'Week of'}[granularity]
+    head = f"{label} {time.strftime(fmt, time.localtime(start))}"
+    if not stats['message_count']:
+        return f"{head}: no conversation."
+    span = (time.strftime('%a %H:%M', time.localtime(stats['first_ts'])),
+            time.strftime('%a %H:%M', time.localtime(stats['last_ts'])))
+    parts = [f"{head}: {stats['message_count']} messages ({stats['user_count']} from you, "
+             f"{stats['assistant_count']} from Jarvis) between {span[0]} and {span[1]}."]
+    if stats['keywords']:
+        parts.append("Topics: " + ", ".join(stats['keywords']) + ".")
+    if stats['highlights']:
+        parts.append("You said: " + " | ".join(stats['highlights']))
+    return " ".join(parts)
+
+
+def _load_stats(row) -> Dict:
+    return {'message_count': row[0], 'user_count': row[1], 'assistant_count': row[2], 'first_ts': row[3],
+            'last_ts': row[4], 'last_message_id': row[5], 'keywords': json.loads(row[6] or '{}'),
+            'highlights': json.loads(row[7] or '[]')}
+
+
+_SUMMARY_COLS = ("message_count, user_count, assistant_count, first_ts, last_ts, last_message_id, "
+                 "keywords, highlights, summary, dirty")
+
+
+def _store_summary(conn, granularity: str, start: float, end: float, stats: Dict) -> str:
+    top = sorted(stats['keywords'].items(), key=lambda kv: (-kv[1], kv[0]))[:_SUMMARY_KEYWORDS]
+    stats['keywords'] = dict(top)
+    text = _render_summary(granularity, start, dict(stats, keywords=dict(top[:8])))
+    conn.execute(
+        "INSERT OR REPLACE INTO summaries (granularity, bucket_start, bucket_end, message_count, user_count, "
+        "assistant_count, first_ts, last_ts, last_message_id, keywords, highlights, summary, dirty, updated_at) "
+        "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, 0, ?)",
+        (granularity, start, end, stats['message_count'], stats['user_count'], stats['assistant_count'],
+         stats['first_ts'], stats['last_ts'], stats['last_message_id'],
+         json.dumps(stats['keywords'], ensure_ascii=False), json.dumps(stats['highlights'], ensure_ascii=False),
+         text, time.time()))
+    return text
+
+
+def _refresh_bucket(conn, granularity: str, start: float) -> Dict:
+    """Bring one bucket up to date and return its stats (without committing)."""
+    start, end = _bucket_bounds(granularity, start)
+    row = conn.execute(f"SELECT {_SUMMARY_COLS} FROM summaries WHERE granularity = ? AND bucket_start = ?",
+                       (granularity, start)).fetchone()
+    dirty = 2 if row is None else row[9]
+    if dirty == 0:
+        return _load_stats(row)
+    if granularity == 'hour':
+        if dirty == 1:
+            stats = _load_stats(row)
+            rows = conn.execute("SELECT id, sender, text, timestamp FROM messages "
+                                "WHERE timestamp >= ? AND timestamp < ? AND id > ? ORDER BY id",
+                                (start, end, stats['last_message_id'])).fetchall()
+        else:
+            stats = _empty_stats()
+            rows = conn.execute("SELECT id, sender, text, timestamp FROM messages "
+                                "WHERE timestamp >= ? AND timestamp < ? ORDER BY id", (start, end)).fetchall()
+        stats = _fold_messages(stats, rows)
+    else:
+        child = _CHILD[granularity]
+        if dirty == 2:
+            if child == 'hour':
+                # One range scan for the whole day instead of 24 hour scans.
+                by_hour: Dict[float, list] = {}
+                for r in conn.execute("SELECT id, sender, text, timestamp FROM messages "
+                                      "WHERE timestamp >= ? AND timestamp < ? ORDER BY id", (start, end)):
+                    by_hour.setdefault(_bucket_bounds('hour', r[3])[0], []).append(r)
+                conn.execute("DELETE FROM summaries WHERE granularity = 'hour' AND bucket_start >= ? "
+                             "AND bucket_start < ?", (start, end))
+                for h, rows in by_hour.items():
+                    _store_summary(conn, 'hour', h, _bucket_bounds('hour', h)[1], _fold_messages(_empty_stats(), rows))
+            else:
+                day = start
+                while day < end:
+                    _refresh_bucket(conn, 'day', day)
+                    day = _bucket_bounds('day', day)[1]
+        else:
+            for (cstart,) in conn.execute("SELECT bucket_start FROM summaries WHERE granularity = ? AND dirty > 0 "
+                                          "AND bucket_start >= ? AND bucket_start < ?", (child, start, end)).fetchall():
+                _refresh_bucket(conn, child, cstart)
+        children = [_load_stats(r) for r in conn.execute(
+            f"SELECT {_SUMMARY_COLS} FROM summaries WHERE granularity = ? AND bucket_start >= ? "
+            "AND bucket_start < ? ORDER BY bucket_start", (child, start, end))]
+        stats = _merge_stats(children)
+    _store_summary(conn, granularity, start, end, stats)
+    return stats
+
+
+def _refresh_dirty_hours(conn, limit: int = 50):
+    """Fold pending messages into dirty hour buckets (called by the writer when idle)."""
+    starts = conn.execute("SELECT bucket_start FROM summaries WHERE granularity = 'hour' AND dirty > 0 LIMIT ?",
+                          (limit,)).fetchall()
+    if not starts:
+        return
+    with conn:
+        for (start,) in starts:
+            _refresh_bucket(conn, 'hour', start)
+
+
+def get_summary(granularity: str = 'day', when: Optional[float] = None) -> Dict:
+    """Return the stored summary for the hour/day/week bucket containing `when` (default now).
+
+    The dict has bucket_start/bucket_end, message counts, top `keywords`
+    ({word: count}), a few `highlights` (user lines) and the rendered `summary`
+    text. Only buckets invalidated by new or pruned messages are recomputed.
+    """
+    if granularity not in SUMMARY_GRANULARITIES:
+        raise ValueError(f"granularity must be one of {SUMMARY_GRANULARITIES}, got {granularity!r}")
+    start, end = _bucket_bounds(granularity, time.time() if when is None else when)
+    _sync_pending()
+    conn = _connect()
+    try:
+        row = conn.execute(f"SELECT {_SUMMARY_COLS} FROM summaries WHERE granularity = ? AND bucket_start = ?",
+                           (granularity, start)).fetchone()
+        if row is not None and row[9] == 0:
+            stats, text = _load_stats(row), row[8]
+        else:
+            with conn:
+                stats = _refresh_bucket(conn, granularity, start)
+            text = conn.execute("SELECT summary FROM summaries WHERE granularity = ? AND bucket_start = ?",
+                                (granularity, start)).fetchone()[0]
+    finally:
+        conn.close()
+    stats.update({'granularity': granularity, 'bucket_start': start, 'bucket_end': end, 'summary': text})
+    return stats
+
+
+def summarize_period(granularity: str = 'week', when: Optional[float] = None) -> str:
+    """Summary text for the hour/day/week containing `when`, e.g. "what did we talk about this week"."""
+    return get_summary(granularity, when)['summary']
+
+
+# ---------- Retention ----------
+
+def _archive_dir() -> str:
+    d = os.path.join(os.path.dirname(_db_path()), 'archive')
+    os.makedirs(d, exist_ok=True)
+    return d
+
+
+def _archive_path(month: str) -> str:
+    return os.path.join(_archive_dir(), f'memory-{month}.db')
+
+
+def _archive_rows(rows):
+    """Copy (id, sender, text, timestamp, metadata) rows into per-month archive DBs.
+
+    Each month is its own SQLite file with zlib-compressed text, so old history
+    stays available without keeping the live DB large. Inserts are keyed on
+    id, so re-archiving a batch after a crash is harmless.
+    """
+    by_month: Dict[str, list] = {}
+    for r in rows:
+        month = time.strftime('%Y-%m', time.localtime(r[3]))
+        by_month.setdefault(month, []).append(
+            (r[0], r[1], zlib.compress(r[2].encode('utf-8'), 6), r[3], r[4]))
+    for month, items in by_month.items():
+        conn = sqlite3.connect(_archive_path(month), timeout=10)
+        try:
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS messages (
+                    id INTEGER PRIMARY KEY,
+                    sender TEXT NOT NULL,
+                    text BLOB NOT NULL,
+                    timestamp REAL NOT NULL,
+                    metadata TEXT
+                )
+                """
+            )
+            with conn:
+                conn.executemany("INSERT OR REPLACE INTO messages (id, sender, text, timestamp, metadata) "
+                                 "VALUES (?, ?, ?, ?, ?)", items)
+        finally:
+            conn.close()
+
+
+def list_archives() -> List[str]:
+    """Months ('YYYY-MM') that have an archive file."""
+    d = os.path.join(os.path.dirname(_db_path()), 'archive')
+    if not os.path.isdir(d):
+        return []
+    return sorted(f[len('memory-'):-len('.db')] for f in os.listdir(d)
+                  if f.startswith('memory-') and f.endswith('.db'))
+
+
+def load_archive(month: str) -> List[Dict]:
+    """Return the archived messages of a month ('YYYY-MM'), oldest first."""
+    path = _archive_path(month)
+    if not os.path.exists(path):
+        return []
+    conn = sqlite3.connect(path, timeout=10)
+    try:
+        rows = conn.execute("SELECT id, sender, text, timestamp, metadata FROM messages ORDER BY timestamp").fetchall()
+    finally:
+        conn.close()
+    return [_row_to_dict((r[0], r[1], zlib.decompress(r[2]).decode('utf-8'), r[3], r[4])) for r in rows]
+
+
+def _delete_batch(cutoff: float, limit: int, archive: bool):
+    """Writer job: delete (and optionally archive) up to limit rows older than cutoff."""
+    def job(conn):
+        rows = conn.execute(f"SELECT {_MSG_COLS}, m.body_hash FROM {_MSG_FROM} "
+                            "WHERE m.timestamp < ? ORDER BY m.timestamp LIMIT ?", (cutoff, limit)).fetchall()
+        if not rows:
+            _record_pruned(cutoff)
+            return 0
+        if archive:
+            _archive_rows([(r[0], r[1], _unpack_text(r[2], r[5], r[6]), r[3], r[4]) for r in rows])
+        with conn:
+            conn.executemany("DELETE FROM messages WHERE id = ?", [(r[0],) for r in rows])
+            _drop_orphan_bodies(conn, [r[7] for r in rows])
+            # Rows are taken oldest first, so everything before the last
+            # deleted timestamp is gone.
+            _invalidate_summaries_before(conn, rows[-1][3])
+        # A short batch deleted everything before cutoff; a full one at least
+        # everything before its last row.
+        _record_pruned(cutoff if len(rows) < limit else rows[-1][3])
+        try:
+            import Jarvis_semantic_memory as sem
+            sem.forget([r[0] for r in rows])
+        except Exception:
+            pass
+        return len(rows)
+    return job
+
+
+def _vacuum_step(pages: int):
+    """Writer job: release up to `pages` free pages. Returns pages still free."""
+    def job(conn):
+        if conn.execute("PRAGMA auto_vacuum").fetchone()[0] != 2:
+            return 0
+        # executescript steps the pragma to completion; a plain execute()
+        # only advances it one page.
+        conn.executescript(f"PRAGMA incremental_vacuum({int(pages)});")
+        return conn.execute("PRAGMA freelist_count").fetchone()[0]
+    return job
 
 
-def prune_old(retention_days: Optional[int] = DEFAULT_RETENTION_DAYS) -> int:
+def enable_incremental_vacuum() -> bool:
+    """Switch an existing DB to auto_vacuum=INCREMENTAL (one full VACUUM).
+
+    New DBs are created that way already. This rewrites the whole file and
+    blocks writers while it runs, so call it at a quiet moment.
+    """
+    def job(conn):
+        if conn.execute("PRAGMA auto_vacuum").fetchone()[0] == 2:
+            return False
+        conn.execute("PRAGMA auto_vacuum=INCREMENTAL")
+        conn.execute("VACUUM")
+        return True
+    return get_writer().run_job(job).result()
+
+
+def _prune_batched(cutoff: float, batch_size: int, archive: bool, pause: float = 0.0,
+                   stop: Optional[threading.Event] = None) -> int:
+    w = get_writer()
+    deleted = 0
+    while stop is None or not stop.is_set():
+        n = w.run_job(_delete_batch(cutoff, batch_size, archive)).result()
+        deleted += n
+        if n < batch_size:
+            break
+        if pause:
+            time.sleep(pause)
+    return deleted
+
+
+def _vacuum_incremental(pages: int = VACUUM_PAGES_PER_STEP, max_steps: int = 64, pause: float = 0.0,
+                        stop: Optional[threading.Event] = None):
+    w = get_writer()
+    for _ in range(max_steps):
+        if stop is not None and stop.is_set():
+            return
+        if not w.run_job(_vacuum_step(pages)).result():
+            return
+        if pause:
+            time.sleep(pause)
+
+
+def prune_old(retention_days: Optional[int] = DEFAULT_RETENTION_DAYS, archive: bool = False) -> int:
     """Delete messages older than retention_days. Returns number of rows deleted.
 
-    If retention_days is None, nothing is deleted.
+    If retention_days is None, nothing is deleted. Rows are deleted in batches
+    of RETENTION_BATCH_SIZE on the writer thread, so new messages keep being
+    committed in between. With archive=True deleted rows are first copied into
+    jarvis_data/archive/memory-YYYY-MM.db.
     """
     if retention_days is None:
         return 0
     cutoff = time.time() - float(retention_days) * 86400.0
+    deleted = _prune_batched(cutoff, RETENTION_BATCH_SIZE, archive)
+    if deleted:
+        _vacuum_incremental()
+    return deleted
+
+
+class RetentionService:
+    """Background thread that applies a retention policy periodically."""
+
+    def __init__(self, days: float, interval: float = RETENTION_INTERVAL, batch_size: int = RETENTION_BATCH_SIZE,
+                 archive: bool = False):
+        self.days = float(days)
+        self.interval = max(1.0, float(interval))
+        self.batch_size = max(1, int(batch_size))
+        self.archive = archive
+        self.last_run: Optional[float] = None
+        self.last_deleted = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='jarvis-memory-retention', daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self, timeout: Optional[float] = 5.0):
+        self._stop.set()
+        if self._thread.is_alive():
+            self._thread.join(timeout)
+
+    def run_once(self) -> int:
+        cutoff = time.time() - self.days * 86400.0
+        deleted = _prune_batched(cutoff, self.batch_size, self.archive, RETENTION_BATCH_PAUSE, self._stop)
+        if deleted:
+            _vacuum_incremental(pause=RETENTION_BATCH_PAUSE, stop=self._stop)
+        self.last_run = time.time()
+        self.last_deleted = deleted
+        return deleted
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                self.run_once()
+            except Exception as e:
+                print(f"[Jarvis_memory] retention run failed: {e}")
+            self._stop.wait(self.interval)
+
+
+_retention: Optional[RetentionService] = None
+_retention_lock = threading.Lock()
+
+
+def start_retention(days: float, interval: float = RETENTION_INTERVAL, batch_size: int = RETENTION_BATCH_SIZE,
+                    archive: bool = False) -> RetentionService:
+    """Start (or replace) the background retention job."""
+    global _retention
+    svc = RetentionService(days, interval, batch_size, archive)
+    with _retention_lock:
+        old, _retention = _retention, svc
+    if old is not None:
+        old.stop()
+    return svc.start()
+
+
+def stop_retention():
+    global _retention
+    with _retention_lock:
+        old, _retention = _retention, None
+    if old is not None:
+        old.stop()
+
+
+def set_retention_days(days: Optional[int], archive: bool = False) -> Optional[RetentionService]:
+    """Keep only the last `days` days of messages, enforced in the background.
+
+    Starts a RetentionService that prunes now and then every RETENTION_INTERVAL
+    seconds; None stops it (keep forever).
+    """
+    if days is None:
+        stop_retention()
+        return None
+    return start_retention(days, archive=archive)
+
+
+# ---------- Tool-call ledger ----------
+#
+# One row per tool invocation (name, hashed + truncated args, start/end,
+# duration, status, result size) so latency and failures can be analysed per
+# tool instead of being flattened into conversation messages.
+
+_TOOL_ARGS_MAX = 2000   # chars of JSON args kept per call
+_TOOL_CALL_INSERT = ("INSERT INTO tool_calls (tool, args_hash, args, started_at, ended_at, duration_ms, status, "
+                     "result_size, error) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)")
+
+
+def _create_tool_calls(conn):
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS tool_calls (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            tool TEXT NOT NULL,
+            args_hash TEXT,
+            args TEXT,
+            started_at REAL NOT NULL,
+            ended_at REAL,
+            duration_ms REAL,
+            status TEXT NOT NULL,
+            result_size INTEGER,
+            error TEXT
+        )
+        """
+    )
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_tool_calls_tool_started ON tool_calls(tool, started_at)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_tool_calls_started ON tool_calls(started_at)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_tool_calls_args ON tool_calls(tool, args_hash)")
+    conn.commit()
+
+
+def _normalize_args(args) -> Optional[str]:
+    if args is None:
+        return None
+    if isinstance(args, str):
+        try:
+            args = json.loads(args)
+        except ValueError:
+            return args
+    return json.dumps(args, sort_keys=True, ensure_ascii=False, default=str)
+
+
+def record_tool_call(tool: str, args=None, started_at: Optional[float] = None, ended_at: Optional[float] = None,
+                     status: str = 'ok', result=None, error: Optional[str] = None) -> None:
+    """Queue one tool_calls ledger row (never blocks; dropped if the writer queue is full).
+
+    `args` may be a dict or a JSON string; it is hashed in canonical form so
+    identical calls group together. `result` is only measured (len of its
+    string form), not stored.
+    """
+    if ended_at is None:
+        ended_at = time.time()
+    if started_at is None:
+        started_at = ended_at
+    args_json = _normalize_args(args)
+    args_hash = hashlib.sha1(args_json.encode('utf-8')).hexdigest()[:16] if args_json is not None else None
+    result_size = None if result is None else len(result if isinstance(result, (str, bytes)) else str(result))
+    row = (str(tool), args_hash, args_json[:_TOOL_ARGS_MAX] if args_json else None, float(started_at),
+           float(ended_at), max(0.0, (ended_at - started_at) * 1000.0), status, result_size,
+           str(error)[:500] if error else None)
+    get_writer().submit_tool_call(row)
+
+
+class track_tool_call:
+    """Context manager that times a block and records it in the ledger.
+
+        with track_tool_call('google_search', {'query': q}) as call:
+            call.result = await google_search(q)
+
+    An exception marks the call as 'error' and is re-raised.
+    """
+
+    def __init__(self, tool: str, args=None):
+        self.tool = tool
+        self.args = args
+        self.result = None
+        self.started_at = 0.0
+
+    def __enter__(self):
+        self.started_at = time.time()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        try:
+            record_tool_call(self.tool, self.args, self.started_at, time.time(),
+                             'error' if exc_type else 'ok', self.result, repr(exc) if exc else None)
+        except Exception:
+            pass
+        return False
+
+
+def _ledger_query(sql: str, params: tuple) -> list:
+    _sync_pending()
     conn = _connect()
-    cur = conn.cursor()
-    cur.execute("DELETE FROM messages WHERE timestamp < ?", (cutoff,))
-    deleted = cur.rowcount
+    try:
+        return conn.execute(sql, params).fetchall()
+    finally:
+        conn.close()
+
+
+def tool_latency_stats(since: Optional[float] = None, until: Optional[float] = None) -> List[Dict]:
+    """Per-tool call count, error rate and latency percentiles (ms), slowest total first.
+
+    `share` is the tool's fraction of all tool time in the window, i.e. how
+    much of turn latency spent in tools it accounts for.
+    """
+    since = 0.0 if since is None else float(since)
+    until = time.time() + 1.0 if until is None else float(until)
+    rows = _ledger_query(
+        """
+        WITH r AS (
+            SELECT tool, duration_ms, status,
+                   ROW_NUMBER() OVER (PARTITION BY tool ORDER BY duration_ms) AS rn,
+                   COUNT(*) OVER (PARTITION BY tool) AS n
+            FROM tool_calls
+            WHERE started_at >= ? AND started_at < ?
+        )
+        SELECT tool, n,
+               SUM(status != 'ok'),
+               SUM(duration_ms),
+               MAX(CASE WHEN rn = (n * 50 + 99) / 100 THEN duration_ms END),
+               MAX(CASE WHEN rn = (n * 95 + 99) / 100 THEN duration_ms END),
+               MAX(duration_ms)
+        FROM r GROUP BY tool
+        """, (since, until))
+    total = sum(r[3] or 0.0 for r in rows) or 1.0
+    out = [{'tool': r[0], 'calls': r[1], 'errors': r[2], 'error_rate': r[2] / r[1] if r[1] else 0.0,
+            'total_ms': r[3] or 0.0, 'avg_ms': (r[3] or 0.0) / r[1] if r[1] else 0.0,
+            'p50_ms': r[4], 'p95_ms': r[5], 'max_ms': r[6], 'share': (r[3] or 0.0) / total}
+           for r in rows]
+    out.sort(key=lambda d: -d['total_ms'])
+    return out
+
+
+def tool_error_rates(since: Optional[float] = None) -> Dict[str, float]:
+    """Fraction of failed calls per tool."""
+    return {d['tool']: d['error_rate'] for d in tool_latency_stats(since)}
+
+
+def frequent_tool_args(tool: Optional[str] = None, limit: int = 10, since: Optional[float] = None) -> List[Dict]:
+    """Most repeated (tool, args) combinations with their count and average latency."""
+    sql = ["SELECT tool, args_hash, MAX(args), COUNT(*), AVG(duration_ms), SUM(status != 'ok') FROM tool_calls "
+           "WHERE started_at >= ?"]
+    params: list = [0.0 if since is None else float(since)]
+    if tool is not None:
+        sql.append(" AND tool = ?")
+        params.append(tool)
+    sql.append(" GROUP BY tool, args_hash ORDER BY COUNT(*) DESC LIMIT ?")
+    params.append(limit)
+    return [{'tool': r[0], 'args_hash': r[1], 'args': r[2], 'calls': r[3], 'avg_ms': r[4], 'errors': r[5]}
+            for r in _ledger_query(''.join(sql), tuple(params))]
+
+
+# ---------- Schema ----------
+#
+# Forward-only migrations, applied once per DB and recorded in schema_version.
+# Each step must be idempotent: DBs created before versioning already have
+# some of these objects.
+
+_MIGRATIONS = (
+    (1, _create_messages),
+    (2, _init_fts),
+    (3, _init_summaries),
+    (4, _create_tool_calls),
+    (5, _create_message_bodies),
+)
+SCHEMA_VERSION = _MIGRATIONS[-1][0]
+
+_schema_ready = False
+_schema_lock = threading.Lock()
+
+
+def _apply_migrations(conn) -> int:
+    """Bring the DB behind conn up to SCHEMA_VERSION. Returns the resulting version."""
+    global _fts_available
+    conn.execute("CREATE TABLE IF NOT EXISTS schema_version (version INTEGER PRIMARY KEY, applied_at REAL NOT NULL)")
     conn.commit()
-    conn.close()
-    return deleted
+    current = conn.execute("SELECT COALESCE(MAX(version), 0) FROM schema_version").fetchone()[0]
+    for version, migrate in _MIGRATIONS:
+        if version <= current:
+            continue
+        # _schema_lock only covers this process; the GUI and the agent may
+        # migrate the same DB at once. Each step re-reads the version under
+        # the DB write lock, and its check-then-DDL runs inside that
+        # transaction (the step's own commit releases it). The steps are
+        # idempotent, so a step re-run before its version row lands is harmless.
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            current = conn.execute("SELECT COALESCE(MAX(version), 0) FROM schema_version").fetchone()[0]
+            if version <= current:
+                conn.commit()
+                continue
+            migrate(conn)
+        except BaseException:
+            if conn.in_transaction:
+                conn.rollback()
+            raise
+        conn.execute("INSERT OR REPLACE INTO schema_version (version, applied_at) VALUES (?, ?)",
+                     (version, time.time()))
+        conn.commit()
+        current = version
+    if conn.execute("SELECT 1 FROM sqlite_master WHERE type='table' AND name='messages_fts'").fetchone():
+        _fts_available = True
+    else:
+        # Migrated by an SQLite without FTS5; retry in case this one has it.
+        _init_fts(conn)
+    return current
 
 
-def set_retention_days(days: Optional[int]):
-    """Convenience wrapper: prune immediately and future calls should call prune_old periodically."""
-    return prune_old(days)
+def _ensure_schema():
+    global _schema_ready
+    if _schema_ready:
+        return
+    with _schema_lock:
+        if _schema_ready:
+            return
+        conn = _open()
+        try:
+            _apply_migrations(conn)
+        finally:
+            conn.close()
+        _schema_ready = True
+
+
+def schema_version() -> int:
+    """Schema version of the memory DB (migrating it first if needed)."""
+    conn = _connect()
+    try:
+        return conn.execute("SELECT COALESCE(MAX(version), 0) FROM schema_version").fetchone()[0]
+    finally:
+        conn.close()
@@ -0,0 +1,292 @@
+"""Local semantic recall over Jarvis memory.
+
+Keeps a dense vector per message in a NumPy matrix so `recall_relevant` can
+return older messages that are *about* the same thing as the query, not just
+the most recent ones. Vectors come from a hashing vectorizer (unigrams +
+bigrams hashed into a fixed number of signed buckets, sublinear TF, L2
+normalised), so there is no model download and no network access.
+
+Vectors are stored as float16 (2 KB per message at the default 1024 dims)
+and scored in float32 chunks. The matrix is appended incrementally: each
+search first vectorizes only the messages with an id above the last indexed
+id. It is persisted under
+jarvis_data/ (memory_vectors.npy + memory_vector_ids.npy) so a restart does
+not re-embed the whole history. Rows of messages removed by retention are
+dropped again: by the delete batch itself (`forget`) and, for indexes held
+by other processes, on refresh when they fall below the oldest stored id.
+
+Requires numpy; without it `available()` is False and Jarvis_memory falls
+back to full-text search.
+"""
+from __future__ import annotations
+import os
+import re
+import math
+import struct
+import hashlib
+import atexit
+import threading
+from typing import List, Dict, Optional
+
+try:
+    import numpy as np
+except Exception:
+    np = None
+
+import Jarvis_memory
+
+DEFAULT_DIM = 1024
+SAVE_EVERY = 500          # persist after this many newly indexed messages
+_REFRESH_CHUNK = 5000     # rows fetched per query while catching up
+_SCORE_CHUNK = 16384      # rows scored per matmul (float16 storage -> float32 math)
+_TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+
+# Each feature is spread over several signed buckets (a sparse random
+# projection). With a single bucket per feature, one unlucky collision makes
+# unrelated short messages look identical; spreading keeps that noise small.
+_SPREAD = 8
+_UNPACK = '<%dI' % _SPREAD
+_SPREAD_WEIGHT = 1.0 / math.sqrt(_SPREAD)
+
+
+def available() -> bool:
+    return np is not None
+
+
+def _vectors_path() -> str:
+    return os.path.join(os.path.dirname(Jarvis_memory._db_path()), 'memory_vectors.npy')
+
+
+def _ids_path() -> str:
+    return os.path.join(os.path.dirname(Jarvis_memory._db_path()), 'memory_vector_ids.npy')
+
+
+class HashingVectorizer:
+    """Stateless text -> unit vector mapping using signed feature hashing."""
+
+    def __init__(self, dim: int = DEFAULT_DIM):
+        if dim & (dim - 1):
+            raise ValueError('dim must be a power of two')
+        self.dim = dim
+
+    def _features(self, text: str) -> List[str]:
+        tokens = _TOKEN_RE.findall(text.lower())
+        return tokens + [a + ' ' + b for a, b in zip(tokens, tokens[1:])]
+
+    def transform(self, texts: List[str]):
+        """Return a float32 matrix (len(texts), dim) of L2-normalised rows."""
+        out = np.zeros((len(texts), self.dim), dtype=np.float32)
+        mask = self.dim - 1
+        for row, text in enumerate(texts):
+            tf: Dict[str, int] = {}
+            for feat in self._features(text or ''):
+                tf[feat] = tf.get(feat, 0) + 1
+            vec = out[row]
+            for feat, n in tf.items():
+                w = (1.0 + math.log(n)) * _SPREAD_WEIGHT
+                digest = hashlib.blake2b(feat.encode('utf-8'), digest_size=4 * _SPREAD).digest()
+                for h in struct.unpack(_UNPACK, digest):
+                    vec[h & mask] += w if h & 0x80000000 else -w
+        norms = np.linalg.norm(out, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        out /= norms
+        return out
+
+
+class SemanticIndex:
+    """Vector matrix over the messages table, ordered by message id."""
+
+    def __init__(self, dim: int = DEFAULT_DIM):
+        self.vectorizer = HashingVectorizer(dim)
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+        self._vectors = np.zeros((0, dim), dtype=np.float16)
+        self._ids = np.zeros(0, dtype=np.int64)
+        self._size = 0
+        self._unsaved = 0
+        self._load()
+
+    @property
+    def size(self) -> int:
+        return self._size
+
+    def _load(self):
+        try:
+            vecs = np.load(_vectors_path())
+            ids = np.load(_ids_path())
+        except Exception:
+            return
+        if vecs.ndim != 2 or vecs.shape[1] != self.vectorizer.dim or len(ids) != len(vecs):
+            return
+        self._vectors = vecs.astype(np.float16, copy=False)
+        self._ids = ids.astype(np.int64, copy=False)
+        self._size = len(ids)
+
+    def save(self):
+        """Persist the matrix (atomic replace)."""
+        with self._lock:
+            if not self._unsaved:
+                return
+            vecs = self._vectors[:self._size]
+            ids = self._ids[:self._size]
+            self._unsaved = 0
+        for path, arr in ((_vectors_path(), vecs), (_ids_path(), ids)):
+            tmp = path + '.tmp.npy'
+            np.save(tmp, arr)
+            os.replace(tmp, path)
+
+    def _append(self, ids, vecs):
+        n = len(ids)
+        need = self._size + n
+        if need > len(self._ids):
+            cap = max(need, 2 * len(self._ids), 1024)
+            grown = np.zeros((cap, self.vectorizer.dim), dtype=np.float16)
+            grown[:self._size] = self._vectors[:self._size]
+            grown_ids = np.zeros(cap, dtype=np.int64)
+            grown_ids[:self._size] = self._ids[:self._size]
+            self._vectors, self._ids = grown, grown_ids
+        self._vectors[self._size:need] = vecs
+        self._ids[self._size:need] = ids
+        self._size = need
+        self._unsaved += n
+
+    def remove(self, ids) -> int:
+        """Drop the vectors of deleted messages. Returns how many were dropped."""
+        if not len(ids):
+            return 0
+        with self._lock:
+            if not self._size:
+                return 0
+            keep = ~np.isin(self._ids[:self._size], np.asarray(ids, dtype=np.int64))
+            n = self._compact(keep)
+        if self._unsaved >= SAVE_EVERY:
+            self.save()
+        return n
+
+    def _compact(self, keep) -> int:
+        """Keep only rows where `keep` is set (lock held). Returns rows dropped."""
+        kept = np.flatnonzero(keep)
+        m = len(kept)
+        dropped = self._size - m
+        if not dropped:
+            return 0
+        if len(self._ids) > 4 * max(m, 1024):
+            # Mostly empty after a large prune: give the memory back.
+            self._vectors = self._vectors[kept]
+            self._ids = self._ids[kept]
+        else:
+            self._vectors[:m] = self._vectors[kept]
+            self._ids[:m] = self._ids[kept]
+        self._size = m
+        self._unsaved += dropped
+        return dropped
+
+    def _trim(self, conn) -> int:
+        """Drop rows below the oldest stored message (pruned by any process)."""
+        oldest = conn.execute("SELECT MIN(id) FROM messages").fetchone()[0]
+        with self._lock:
+            if not self._size or (oldest is not None and self._ids[0] >= oldest):
+                return 0
+            if oldest is None:
+                return self._compact(np.zeros(self._size, dtype=bool))
+            return self._compact(self._ids[:self._size] >= oldest)
+
+    def refresh(self) -> int:
+        """Index messages added since the last refresh. Returns how many were added."""
+        Jarvis_memory._sync_pending()
+        with self._refresh_lock:
+            conn = Jarvis_memory._connect()
+            try:
+                self._trim(conn)
+                added = self._catch_up(conn)
+            finally:
+                conn.close()
+        if self._unsaved >= SAVE_EVERY:
+            self.save()
+        return added
+
+    def _catch_up(self, conn) -> int:
+        added = 0
+        while True:
+            with self._lock:
+                last_id = int(self._ids[self._size - 1]) if self._size else 0
+            rows = conn.execute("SELECT id, text FROM messages WHERE id > ? ORDER BY id LIMIT ?",
+                                (last_id, _REFRESH_CHUNK)).fetchall()
+            if not rows:
+                break
+            vecs = self.vectorizer.transform([r[1] for r in rows])
+            with self._lock:
+                self._append(np.array([r[0] for r in rows], dtype=np.int64), vecs)
+            added += len(rows)
+            if len(rows) < _REFRESH_CHUNK:
+                break
+        return added
+
+    def rebuild(self) -> int:
+        """Drop the matrix and re-embed every message."""
+        with self._lock:
+            self._size = 0
+            self._unsaved = 1
+        return self.refresh()
+
+    def search(self, query: str, k: int = 5, min_score: float = 0.15) -> List[Dict]:
+        """Top-k messages by cosine similarity to query, best first."""
+        self.refresh()
+        q = self.vectorizer.transform([query])[0]
+        if not q.any():
+            return []
+        with self._lock:
+            n = self._size
+            if n == 0:
+                return []
+            scores = np.empty(n, dtype=np.float32)
+            for lo in range(0, n, _SCORE_CHUNK):
+                hi = min(n, lo + _SCORE_CHUNK)
+                scores[lo:hi] = self._vectors[lo:hi].astype(np.float32) @ q
+            # Over-fetch a little: ids deleted by pruning are skipped below.
+            top = min(n, max(k * 2, k + 8))
+            idx = np.argpartition(-scores, top - 1)[:top]
+            idx = idx[np.argsort(-scores[idx])]
+            hits = [(int(self._ids[i]), float(scores[i])) for i in idx if scores[i] >= min_score]
+        if not hits:
+            return []
+        conn = Jarvis_memory._connect()
+        try:
+            marks = ','.join('?' * len(hits))
+            rows = conn.execute(f"SELECT {Jarvis_memory._MSG_COLS} FROM {Jarvis_memory._MSG_FROM} "
+                                f"WHERE m.id IN ({marks})", [h[0] for h in hits]).fetchall()
+        finally:
+            conn.close()
+        by_id = {r[0]: r for r in rows}
+        out = []
+        for rid, score in hits:
+            r = by_id.get(rid)
+            if r is None:
+                continue
+            d = Jarvis_memory._row_to_dict(r)
+            d['score'] = score
+            out.append(d)
+            if len(out) >= k:
+                break
+        return out
+
+
+_index: Optional[SemanticIndex] = None
+_index_lock = threading.Lock()
+
+
+def get_index() -> SemanticIndex:
+    """Return the process-wide index, loading it from disk on first use."""
+    global _index
+    if _index is None:
+        with _index_lock:
+            if _index is None:
+                _index = SemanticIndex()
+                atexit.register(_index.save)
+    return _index
+
+
+def forget(ids):
+    """Remove deleted message ids from this process's index, if it has one loaded."""
+    if _index is not None:
+        _index.remove(ids)
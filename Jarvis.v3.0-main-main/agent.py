@@ -21,18 +21,29 @@ from jarvis_get_whether import get_weather
 from Jarvis_window_CTRL import open, close, folder_file
 from Jarvis_file_opner import Play_file
 from keyboard_mouse_CTRL import move_cursor_tool, mouse_click_tool, scroll_cursor_tool, type_text_tool, press_key_tool, swipe_gesture_tool, press_hotkey_tool, control_volume_tool
+from Jarvis_camera_export import export_camera_history
 load_dotenv()
 
 # Memory persistence (best-effort)
 try:
-    from Jarvis_memory import save_conversation, recall_last, summarize_recent
+    from Jarvis_memory import save_conversation, recall_last, summarize_recent, recall_relevant, warm_semantic_index
 except Exception:
-    def save_conversation(u, a):
+    def save_conversation(u, a, metadata=None, wait=False):
         return None
     def recall_last(n=10):
         return []
     def summarize_recent(n=10):
         return ""
+    def recall_relevant(query, k=5):
+        return []
+    def warm_semantic_index():
+        return 0
+
+try:
+    from Jarvis_memory import record_tool_call
+except Exception:
+    def record_tool_call(tool, args=None, started_at=None, ended_at=None, status='ok', result=None, error=None):
+        return None
 
 
 class Assistant(Agent):
@@ -53,14 +64,39 @@ class Assistant(Agent):
                             press_key_tool, #ये key press करने के लिए है
                             press_hotkey_tool, #ये hotkey press करने के लिए है
                             control_volume_tool, #ये volume control करने के लिए है
-                            swipe_gesture_tool #ये gesture wipe करने के लिए है 
+                            swipe_gesture_tool, #ये gesture wipe करने के लिए है 
+                            export_camera_history #ये camera के पिछले कुछ seconds का clip या sheet save करने के लिए है
                          ]
                          )
 
+    async def on_user_turn_completed(self, turn_ctx, new_message):
+        # Pull related older conversation into this turn's context. The index
+        # is local (no network), so this stays cheap per turn.
+        try:
+            query = new_message.text_content
+            if not query:
+                return
+            hits = await asyncio.to_thread(recall_relevant, query, 3)
+            if hits:
+                # A system message, not an assistant one: the model must not
+                # take retrieved lines for something it just said.
+                lines = "\n".join(f"- {m['sender']}: {m['text'][:300]}" for m in hits)
+                turn_ctx.add_message(role="system", content=(
+                    "Retrieved memory: earlier conversation that may be relevant to the user's "
+                    "last message. It is background only, not part of the current exchange.\n"
+                    f"{lines}"))
+        except Exception:
+            pass
+
     async def on_tool_result(self, tool_name, user_input, result):
         try:
-            # save as a small conversation pair: user input -> tool result
-            await asyncio.to_thread(save_conversation, str(user_input), str(result))
+            # save as a small conversation pair: user input -> tool result.
+            # The memory writer only queues here; commits happen in batches.
+            # Timing/status per call goes to the tool_calls ledger instead
+            # (see record_tool_calls in entrypoint). Queuing can block when the
+            # writer is backed up, so it runs off the event loop.
+            await asyncio.to_thread(save_conversation, str(user_input), str(result),
+                                    metadata={'tool': str(tool_name)})
         except Exception:
             pass
 
@@ -72,12 +108,38 @@ class Assistant(Agent):
 
 
 async def entrypoint(ctx: agents.JobContext):
+    # Catch the semantic index up on messages saved since the last run while
+    # the session connects, instead of inside the first user turn.
+    asyncio.get_running_loop().run_in_executor(None, warm_semantic_index)
+
     session = AgentSession(
         llm=google.beta.realtime.RealtimeModel(
             voice="Charon"
         )
     )
     
+    def record_tool_calls(ev):
+        # One ledger row per executed tool: name, args, timing and status.
+        # Runs on the event loop; record_tool_call never blocks (a full
+        # writer queue drops the row).
+        try:
+            outputs = list(getattr(ev, 'function_call_outputs', None) or [])
+            for i, call in enumerate(getattr(ev, 'function_calls', None) or []):
+                out = outputs[i] if i < len(outputs) else None
+                started = getattr(call, 'created_at', None)
+                ended = getattr(out, 'created_at', None) if out is not None else None
+                # Tools may legitimately return None; only is_error marks a failure.
+                failed = out is not None and bool(getattr(out, 'is_error', False))
+                result = getattr(out, 'output', None) if out is not None else None
+                record_tool_call(getattr(call, 'name', 'unknown'), getattr(call, 'arguments', None),
+                                 started_at=started, ended_at=ended,
+                                 status='error' if failed else 'ok', result=result,
+                                 error=result if failed else None)
+        except Exception:
+            pass
+
+    session.on("function_tools_executed", record_tool_calls)
+
     await session.start(
         room=ctx.room,
         agent=Assistant(),
@@ -6,33 +6,29 @@ import json
 from datetime import datetime
 from features.storage import data_path, ensure_data_dir
 from features.camera_manager import camera  # Import the camera manager
+from features.observation_bus import bus
+from features.observation_log import ObservationLog
 
-# File to store camera observations
-CAMERA_MEMORY_FILE = data_path('camera_observations.json')
+# The camera analysis thread publishes its own (debounced) description on
+# the bus and keeps camera_view.txt current; the demo only listens. Its own
+# face count is a different text, and publishing it on the same bus would
+# keep resetting the debounce so neither would ever be emitted.
+bus.subscribe(lambda obs: print(f"[camera] {obs.text}"))
 
-def load_camera_memory():
-    """Load previous camera observations"""
-    if os.path.exists(CAMERA_MEMORY_FILE):
-        try:
-            with open(CAMERA_MEMORY_FILE, 'r', encoding='utf-8') as f:
-                return json.load(f)
-        except:
-            return []
-    return []
+# Camera observations go to an append-only, time-indexed log
+# (jarvis_data/camera_observations.db; repeats are run-length encoded)
+observation_log = ObservationLog()
+
+def load_camera_memory(n=100):
+    """Load the most recent camera observations (oldest first)"""
+    return [{'description': r['description'], 'num_faces': r['num_faces'], 'count': r['count'],
+             'timestamp': datetime.fromtimestamp(r['end_ts']).strftime("%Y-%m-%d %H:%M:%S")}
+            for r in observation_log.recent(n)]
 
 def save_camera_observation(observation):
     """Save a new camera observation"""
-    observations = load_camera_memory()
     observation['timestamp'] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    observations.append(observation)
-    # Keep only last 100 observations to manage file size
-    observations = observations[-100:]
-    with open(CAMERA_MEMORY_FILE, 'w', encoding='utf-8') as f:
-        json.dump(observations, f, ensure_ascii=False, indent=2)
-    
-    # Also update the camera view text file for immediate access
-    with open(data_path('camera_view.txt'), 'w', encoding='utf-8') as f:
-        f.write(observation['description'])
+    observation_log.append(observation['description'], observation.get('num_faces'))
 
 def check_camera_properties(cap):
     """Check and print camera properties for debugging"""
@@ -60,15 +56,15 @@ if face_cascade.empty():
     print("Error: Failed to load face cascade classifier")
     exit()
 
-# Initialize the camera using the camera manager, but don't steal from GUI
+# Initialize the camera using the camera manager. If the GUI is running it
+# already owns the camera and the demo reads its frames from the shared ring.
 ok, msg = camera.start(owner='demo')
 if not ok:
     print("\nError: Could not start camera for demo.")
     print(msg)
-    print("\nIf the GUI is running it owns the camera. Close GUI or run demo with GUI stopped.")
     exit()
 
-print("\nCamera initialized successfully!")
+print(f"\n{msg}")
 print("Camera properties:", camera.get_camera_status())
 
 frame_count = 0
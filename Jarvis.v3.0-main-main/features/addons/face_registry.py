@@ -6,57 +6,158 @@ Functions:
 
 This is a minimal implementation that tries to use the `face_recognition` library if present.
 If not available, functions return safe fallbacks.
+
+Encodings are computed once per registry image and kept in face_db/embeddings.npy
+with a name index (face_db/index.json). The cache is brought up to date
+incrementally (only new or modified images are re-encoded), so identification
+is one encoding of the unknown image plus a single vectorized distance check.
 """
 import os
+import json
+import threading
+
+REGISTRY_DIR = os.path.join(os.path.dirname(__file__), 'face_db')
+EMBEDDINGS_FILE = 'embeddings.npy'
+INDEX_FILE = 'index.json'
+IMAGE_EXTS = ('.jpg', '.jpeg', '.png')
+TOLERANCE = 0.6  # same default as face_recognition.compare_faces
+
+_lock = threading.Lock()
+_cache = None  # {'entries': [...], 'encodings': ndarray (N, 128)}
+
+
+def _face_recognition():
+    try:
+        import importlib
+        return importlib.import_module('face_recognition')
+    except Exception:
+        return None
+
+
+def _load_cache(np):
+    global _cache
+    if _cache is not None:
+        return _cache
+    entries, encodings = [], np.zeros((0, 128), dtype=np.float64)
+    try:
+        with open(os.path.join(REGISTRY_DIR, INDEX_FILE), 'r', encoding='utf-8') as f:
+            entries = json.load(f)
+        encodings = np.load(os.path.join(REGISTRY_DIR, EMBEDDINGS_FILE))
+        rows = sorted(e['row'] for e in entries if e.get('row') is not None)
+        if rows != list(range(len(encodings))):
+            entries, encodings = [], np.zeros((0, 128), dtype=np.float64)
+    except Exception:
+        entries, encodings = [], np.zeros((0, 128), dtype=np.float64)
+    _cache = {'entries': entries, 'encodings': encodings}
+    return _cache
+
+
+def _save_cache(np, cache):
+    emb_path = os.path.join(REGISTRY_DIR, EMBEDDINGS_FILE)
+    idx_path = os.path.join(REGISTRY_DIR, INDEX_FILE)
+    np.save(emb_path + '.tmp.npy', cache['encodings'])
+    os.replace(emb_path + '.tmp.npy', emb_path)
+    with open(idx_path + '.tmp', 'w', encoding='utf-8') as f:
+        json.dump(cache['entries'], f, indent=1)
+    os.replace(idx_path + '.tmp', idx_path)
+
+
+def _sync_cache(face_recognition, np):
+    """Re-encode only images added or changed since the cache was written; drop removed ones."""
+    with _lock:
+        cache = _load_cache(np)
+        if not os.path.isdir(REGISTRY_DIR):
+            return cache
+        files = {}
+        for de in os.scandir(REGISTRY_DIR):
+            if de.is_file() and de.name.lower().endswith(IMAGE_EXTS):
+                st = de.stat()
+                files[de.name] = (st.st_mtime, st.st_size)
+        old = {e['file']: e for e in cache['entries']}
+        keep = [e for e in cache['entries']
+                if e['file'] in files and (e['mtime'], e['size']) == files[e['file']]]
+        kept_files = {e['file'] for e in keep}
+        todo = sorted(f for f in files if f not in kept_files)
+        if not todo and len(keep) == len(old):
+            return cache
+
+        rows, entries = [], []
+        for e in keep:
+            e = dict(e)
+            if e.get('row') is not None:
+                rows.append(cache['encodings'][e['row']])
+                e['row'] = len(rows) - 1
+            entries.append(e)
+        for name in todo:
+            mtime, size = files[name]
+            entry = {'name': os.path.splitext(name)[0], 'file': name, 'mtime': mtime, 'size': size, 'row': None}
+            try:
+                enc = face_recognition.face_encodings(
+                    face_recognition.load_image_file(os.path.join(REGISTRY_DIR, name)))
+                if enc:
+                    entry['row'] = len(rows)
+                    rows.append(enc[0])
+            except Exception as e:
+                print(f"[face_registry] could not encode {name}: {e}")
+            entries.append(entry)  # images without a face are remembered too, so they are not retried
+
+        cache['entries'] = entries
+        cache['encodings'] = np.array(rows, dtype=np.float64).reshape(-1, 128)
+        try:
+            _save_cache(np, cache)
+        except Exception as e:
+            print(f"[face_registry] could not save embedding cache: {e}")
+        return cache
+
 
 def register_face(name: str, image_path: str) -> bool:
     """Register a face image under the given name (copy into a local registry).
     Returns True on success, False otherwise."""
     try:
-        registry_dir = os.path.join(os.path.dirname(__file__), 'face_db')
+        registry_dir = REGISTRY_DIR
         os.makedirs(registry_dir, exist_ok=True)
         if not os.path.exists(image_path):
             return False
         dest = os.path.join(registry_dir, f"{name}.jpg")
         with open(image_path, 'rb') as src, open(dest, 'wb') as dst:
             dst.write(src.read())
+        # Encode now so identification never pays for it
+        face_recognition = _face_recognition()
+        if face_recognition is not None:
+            import numpy as np
+            _sync_cache(face_recognition, np)
         return True
     except Exception as e:
         print(f"[face_registry] register_face error: {e}")
         return False
 
-def identify_face(image_path: str):
+def identify_face(image_path: str, tolerance: float = TOLERANCE):
     """Try to identify a face in image_path against registered faces. Returns name or None.
-    This is a stub: if `face_recognition` is available it will attempt to match, otherwise returns None."""
-    try:
-        import importlib
-        face_recognition = importlib.import_module('face_recognition')
-    except Exception:
+    Needs `face_recognition`; registered faces come from the embedding cache, so only
+    the unknown image is encoded. The closest registered face within `tolerance` wins."""
+    face_recognition = _face_recognition()
+    if face_recognition is None:
         print("[face_registry] face_recognition not installed; identify_face not available.")
         return None
 
     try:
-        registry_dir = os.path.join(os.path.dirname(__file__), 'face_db')
-        known_encodings = []
-        known_names = []
-        if not os.path.exists(registry_dir):
+        import numpy as np
+        if not os.path.exists(REGISTRY_DIR):
+            return None
+        cache = _sync_cache(face_recognition, np)
+        known = cache['encodings']
+        if not len(known):
             return None
-        for f in os.listdir(registry_dir):
-            path = os.path.join(registry_dir, f)
-            img = face_recognition.load_image_file(path)
-            enc = face_recognition.face_encodings(img)
-            if enc:
-                known_encodings.append(enc[0])
-                known_names.append(os.path.splitext(f)[0])
         unknown_img = face_recognition.load_image_file(image_path)
         unknown_encs = face_recognition.face_encodings(unknown_img)
         if not unknown_encs:
             return None
-        results = face_recognition.compare_faces(known_encodings, unknown_encs[0])
-        for match, name in zip(results, known_names):
-            if match:
-                return name
-        return None
+        distances = np.linalg.norm(known - unknown_encs[0], axis=1)
+        best = int(np.argmin(distances))
+        if distances[best] > tolerance:
+            return None
+        names = {e['row']: e['name'] for e in cache['entries'] if e.get('row') is not None}
+        return names.get(best)
     except Exception as e:
         print(f"[face_registry] identify_face error: {e}")
         return None
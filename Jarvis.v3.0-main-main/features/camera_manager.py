@@ -10,8 +10,165 @@ import threading
 import atexit
 import sys
 import os
+import uuid
+from collections import deque
+from concurrent.futures import Future
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from features.storage import data_path, ensure_data_dir
+from features.frame_ring import FrameRing, FRAME_RING_NAME, new_generation
+from features.face_tracking import FaceTracker
+from features.frame_bundle import FrameBundle
+from features.frame_history import FrameHistory
+from features.mood_stage import MoodStage, attach_mood_log, mood_available
+from features.observation_bus import bus, attach_camera_view_file
+
+# Analysis (face count, movement) runs on its own thread at this rate on a
+# frame downscaled to this width, so capture never waits on it. Descriptions
+# go to the observation bus, which emits changes only.
+ANALYSIS_FPS = 5.0
+ANALYSIS_WIDTH = 320
+CAMERA_VIEW_FILE = True   # mirror bus changes into jarvis_data/camera_view.txt
+MOVEMENT_HOLD = 1.5       # seconds "movement" stays on after the last motion frame
+MOOD_ENABLED = False      # emotion of detected faces via deepface in a worker process (features/mood_stage.py)
+
+# Camera probing. Indices are probed in parallel, backends per index in
+# order (Windows-specific DSHOW and MSMF, then OpenCV's default); the last
+# working (index, backend) is kept in jarvis_data/camera_config.json and
+# tried first.
+PROBE_INDICES = list(range(4))
+PROBE_BACKENDS = [cv2.CAP_DSHOW, cv2.CAP_MSMF, None]
+PROBE_DEADLINE = 4.0
+CAMERA_CONFIG_FILE = 'camera_config.json'
+
+# A frame source (features/frame_sources.py spec: 'synthetic', a video file,
+# an image folder) used instead of probing for a webcam.
+FRAME_SOURCE_ENV = 'JARVIS_CAMERA_SOURCE'
+LATENCY_SAMPLES = 1000    # recent capture-to-analysis latencies kept for percentiles
+
+# The last seconds of frames are kept as JPEGs (features/frame_history.py)
+# for clip / contact-sheet export. Other processes ask the capturing one for
+# an export by dropping a <uuid>.json into EXPORT_REQUEST_DIR under
+# jarvis_data, one file per request so concurrent askers never overwrite
+# each other (export_clip() in a process reading the shared ring,
+# tools/camera_export.py and the agent's export tool do this).
+HISTORY_FPS = 10.0
+EXPORT_DIR = 'camera_exports'
+EXPORT_REQUEST_DIR = 'camera_export_requests'
+EXPORT_REQUEST_TIMEOUT = 30.0
+
+_face_cascade = None
+_face_cascade_lock = threading.Lock()
+
+
+def face_cascade():
+    """Haar frontal-face cascade, loaded from disk once per process."""
+    global _face_cascade
+    if _face_cascade is None:
+        with _face_cascade_lock:
+            if _face_cascade is None:
+                _face_cascade = cv2.CascadeClassifier(cv2.data.haarcascades + 'haarcascade_frontalface_default.xml')
+    return _face_cascade
+
+
+def load_camera_config() -> Dict[str, Any]:
+    try:
+        with open(data_path(CAMERA_CONFIG_FILE), 'r', encoding='utf-8') as f:
+            config = json.load(f)
+        return config if isinstance(config, dict) else {}
+    except Exception:
+        return {}
+
+
+def save_camera_config(config: Dict[str, Any]):
+    try:
+        path = data_path(CAMERA_CONFIG_FILE)
+        tmp = path + '.tmp'
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(config, f, indent=2)
+        os.replace(tmp, path)
+    except Exception as e:
+        print(f"Failed to save camera config: {str(e)}")
+
+
+def _probe_camera(idx: int, backend) -> Optional[Tuple[Any, Dict[str, Any]]]:
+    """Open camera idx with backend and check it delivers frames. Returns (cap, props) or None."""
+    cap = None
+    try:
+        cap = cv2.VideoCapture(idx) if backend is None else cv2.VideoCapture(idx, backend)
+        if not cap or not cap.isOpened():
+            print(f"Failed to open camera {idx} with backend {backend}")
+            return None
+
+        # Warm up and read a frame
+        time.sleep(0.2)
+        ret, frame = cap.read()
+        if not ret or frame is None or frame.size == 0:
+            print(f"Camera {idx} opened but failed to return a valid frame")
+            return None
+
+        # Good frame — set preferred properties
+        try:
+            cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
+            cap.set(cv2.CAP_PROP_FRAME_WIDTH, 640)
+            cap.set(cv2.CAP_PROP_FRAME_HEIGHT, 480)
+            cap.set(cv2.CAP_PROP_FPS, 30)
+        except Exception:
+            pass
+
+        # Verify subsequent frames are valid
+        for _ in range(2):
+            ret, tmp = cap.read()
+            if not ret or tmp is None or tmp.size == 0 or np.mean(tmp) < 1:
+                print(f"Camera {idx} produced invalid frames after init")
+                return None
+
+        props = {
+            'index': idx,
+            'backend': backend,
+            'width': cap.get(cv2.CAP_PROP_FRAME_WIDTH),
+            'height': cap.get(cv2.CAP_PROP_FRAME_HEIGHT),
+            'fps': cap.get(cv2.CAP_PROP_FPS),
+        }
+        found, cap = (cap, props), None
+        return found
+    except Exception as e:
+        print(f"Error trying camera {idx} with backend {backend}: {str(e)}")
+        return None
+    finally:
+        if cap is not None:
+            try:
+                cap.release()
+            except Exception:
+                pass
+
+
+class LatestFrameQueue:
+    """Single-slot hand-off between capture and analysis.
+
+    put() never blocks: a frame still waiting when the next one arrives is
+    replaced and counted in `dropped`.
+    """
+
+    def __init__(self):
+        self._cond = threading.Condition()
+        self._item = None
+        self.dropped = 0
+
+    def put(self, item):
+        with self._cond:
+            if self._item is not None:
+                self.dropped += 1
+            self._item = item
+            self._cond.notify()
+
+    def get(self, timeout: Optional[float] = None):
+        """Take the waiting frame, or None after timeout."""
+        with self._cond:
+            if self._item is None:
+                self._cond.wait(timeout)
+            item, self._item = self._item, None
+            return item
+
 
 class CameraManager:
     _instance = None
@@ -31,11 +188,38 @@ class CameraManager:
         self.current_camera_index = -1
         self.last_frame = None
         self.last_frame_time = 0
+        # Newest frame with its lazily computed resized/gray versions,
+        # shared by every consumer in this process (see features/frame_bundle.py).
+        self._bundle = None
+        self._bundle_cond = threading.Condition()
+        self._seq = 0
+        self._generation = new_generation()   # for frames numbered by _seq (no ring)
         self.camera_properties = {}
         self.is_running = False
         self.background_thread = None
         # Do NOT start background capture automatically. Call start(owner) to begin capturing.
         self.owner = None
+        # Frames are published to a shared-memory ring when this process owns
+        # the camera; other processes attach to it instead of opening the
+        # camera again (see features/frame_ring.py).
+        self.ring = None
+        self._shared = None
+        self.ring_name = FRAME_RING_NAME
+        self.frame_source = os.environ.get(FRAME_SOURCE_ENV) or None
+        self._source_changed = False
+        self.analysis_fps = ANALYSIS_FPS
+        self.analysis_width = ANALYSIS_WIDTH
+        self._analysis_queue = LatestFrameQueue()
+        self.analysis_thread = None
+        self.face_tracker = FaceTracker(lambda gray: face_cascade().detectMultiScale(gray, 1.3, 5))
+        self._faces = None   # (boxes in frame coordinates, time) from the last analysed frame
+        self.history = FrameHistory()
+        self.mood = None
+        self.history_thread = None
+        self._history_running = False
+        self.stats = {'captured': 0, 'analyzed': 0, 'analysis_ms': 0.0,
+                      'capture_cpu': 0.0, 'analysis_cpu': 0.0, 'history_cpu': 0.0}
+        self._latency = deque(maxlen=LATENCY_SAMPLES)
         atexit.register(self.cleanup)
         
     def _start_background_capture(self):
@@ -46,14 +230,100 @@ class CameraManager:
         self.background_thread = threading.Thread(target=self._background_capture_task)
         self.background_thread.daemon = True
         self.background_thread.start()
+        if self.mood is None and MOOD_ENABLED and mood_available():
+            try:
+                self.mood = MoodStage()
+                attach_mood_log()
+            except Exception as e:
+                print(f"Mood stage unavailable: {str(e)}")
+                self.mood = None
+        if self.analysis_thread is None or not self.analysis_thread.is_alive():
+            self.analysis_thread = threading.Thread(target=self._analysis_task, daemon=True)
+            self.analysis_thread.start()
+
+    def configure_analysis(self, fps: Optional[float] = None, width: Optional[int] = None):
+        """Change the analysis rate (frames/s, 0 pauses it) and downscale width."""
+        if fps is not None:
+            self.analysis_fps = max(0.0, float(fps))
+        if width is not None:
+            self.analysis_width = max(32, int(width))
+
+    def set_frame_source(self, source=None):
+        """Capture from a frame source instead of a webcam; None goes back to probing.
+
+        source is a features.frame_sources spec string (opened afresh on every
+        (re)initialization) or an object with the cv2.VideoCapture read()
+        interface. A running capture switches over on its next read.
+        """
+        self.frame_source = source
+        if self._capturing():
+            self._source_changed = True
+        elif self.cap is not None:
+            self.cap.release()
+            self.cap = None
+
+    def pipeline_stats(self) -> Dict[str, Any]:
+        """Capture/analysis counters: frames captured, analysed and dropped for analysis.
+
+        capture_cpu/analysis_cpu are CPU seconds spent by each thread;
+        latency_ms is capture-to-analysis-done over the last LATENCY_SAMPLES frames.
+        """
+        out = dict(self.stats)
+        out['dropped'] = self._analysis_queue.dropped
+        out['faces'] = dict(self.face_tracker.stats)
+        out['analysis_fps'] = self.analysis_fps
+        out['history'] = dict(self.history.stats, bytes=self.history.nbytes)
+        if self.mood is not None:
+            out['mood'] = dict(self.mood.stats, current=self.mood.mood)
+        samples = list(self._latency)
+        if samples:
+            p50, p95, p99 = np.percentile(samples, [50, 95, 99])
+            out['latency_ms'] = {'p50': float(p50), 'p95': float(p95), 'p99': float(p99),
+                                 'max': float(max(samples)), 'samples': len(samples)}
+        if self.cap is not None and hasattr(self.cap, 'dropped'):
+            out['source_dropped'] = self.cap.dropped
+        return out
+
+    def reset_stats(self):
+        """Zero the pipeline counters (e.g. after a benchmark warm-up)."""
+        for key in self.stats:
+            self.stats[key] = 0 if isinstance(self.stats[key], int) else 0.0
+        self._latency.clear()
+        self._analysis_queue.dropped = 0
+        self.face_tracker.stats = dict.fromkeys(self.face_tracker.stats, 0)
+        self.history.stats = dict.fromkeys(self.history.stats, 0)
+        if self.cap is not None and hasattr(self.cap, 'dropped'):
+            self.cap.dropped = 0
 
     def start(self, owner: str = 'default') -> Tuple[bool, str]:
-        """Start background capture if no other owner is active. Returns (ok, message)."""
+        """Start background capture if no other owner is active. Returns (ok, message).
+
+        If another process already captures and publishes frames, this process
+        reads from its shared ring instead of opening the camera.
+        """
         if self.owner and self.owner != owner:
             return False, f"Camera already owned by {self.owner}"
         if self.background_thread is None or not self.background_thread.is_alive():
+            shared = self._shared_ring()
+            if shared is not None:
+                # History and export serving stay with the capture owner;
+                # export_clip() here asks it through EXPORT_REQUEST_DIR.
+                self.owner = owner
+                info = shared.info()
+                return True, f"Camera shared from {info['owner']} (pid {info['pid']})"
+            try:
+                self.ring = FrameRing.create(self.ring_name, owner=owner)
+            except FileExistsError as e:
+                return False, str(e)
+            except Exception as e:
+                # No shared memory: still capture for this process.
+                print(f"Frame ring unavailable: {str(e)}")
+                self.ring = None
             self.owner = owner
+            if CAMERA_VIEW_FILE:
+                attach_camera_view_file()
             self._start_background_capture()
+            self._start_history()
             return True, f"Camera started by {owner}"
         self.owner = owner
         return True, "Camera already running"
@@ -64,21 +334,71 @@ class CameraManager:
             return False, f"Cannot stop camera owned by {self.owner}"
         self.owner = None
         self.is_running = False
+        self._history_running = False
         if self.background_thread is not None:
             self.background_thread.join(timeout=1.0)
             self.background_thread = None
+        if self.history_thread is not None:
+            self.history_thread.join(timeout=1.0)
+            self.history_thread = None
+        if self.analysis_thread is not None:
+            self.analysis_thread.join(timeout=1.0)
+            self.analysis_thread = None
+        if self.mood is not None:
+            self.mood.stop()
+        self._close_rings()
+        self._bundle = None
+        self._faces = None
         return True, "Camera stopped"
+
+    def _capturing(self) -> bool:
+        return self.background_thread is not None and self.background_thread.is_alive()
+
+    def _shared_ring(self) -> Optional[FrameRing]:
+        """Ring published by another process, if one is alive."""
+        if self.ring is not None:
+            return None
+        if self._shared is not None:
+            if self._shared.alive():
+                return self._shared
+            self._shared.close()
+            self._shared = None
+        try:
+            ring = FrameRing.attach(self.ring_name)
+        except Exception:
+            return None
+        if not ring.alive():
+            ring.close()
+            return None
+        self._shared = ring
+        return ring
+
+    def _close_rings(self):
+        for ring in (self.ring, self._shared):
+            if ring is not None:
+                try:
+                    ring.close()
+                except Exception:
+                    pass
+        self.ring = None
+        self._shared = None
     
     def _background_capture_task(self):
         """Background task to continuously capture frames"""
+        cpu = time.thread_time()
         while self.is_running:
+            now_cpu = time.thread_time()
+            self.stats['capture_cpu'] += now_cpu - cpu
+            cpu = now_cpu
             try:
-                if self.cap is None or not self.cap.isOpened():
+                if self.cap is None or not self.cap.isOpened() or self._source_changed:
+                    self._source_changed = False
                     print("Trying to initialize camera...")
+                    if self.ring is not None:
+                        self.ring.beat()
                     if not self._initialize_camera():
                         print("Failed to initialize camera, retrying in 2 seconds...")
-                        with open(data_path('camera_view.txt'), 'w', encoding='utf-8') as f:
-                            f.write("Camera initialization in progress...")
+                        bus.publish("Camera initialization in progress...", immediate=True)
                         time.sleep(2)
                         continue
 
@@ -94,127 +414,301 @@ class CameraManager:
                     self._initialize_camera()
                     continue
 
-                self.last_frame = frame.copy()
+                # read() returns a new array each time, so no copy is needed
+                self.last_frame = frame
                 self.last_frame_time = time.time()
-                self._process_frame(frame)
+                self.stats['captured'] += 1
+                seq, generation = self._seq + 1, self._generation
+                if self.ring is not None:
+                    try:
+                        seq, generation = self.ring.publish(frame, self.last_frame_time), self.ring.generation
+                    except ValueError as e:
+                        print(f"Frame not published: {str(e)}")
+                self._seq = seq
+                with self._bundle_cond:
+                    self._bundle = FrameBundle(frame, seq, self.last_frame_time, generation)
+                    self._bundle_cond.notify_all()
+                self._analysis_queue.put(self._bundle)
                 
             except Exception as e:
                 print(f"Camera error: {str(e)}")
-                with open(data_path('camera_view.txt'), 'w', encoding='utf-8') as f:
-                    f.write("Camera error occurred, trying to recover...")
+                bus.publish("Camera error occurred, trying to recover...", immediate=True)
                 time.sleep(2)
                 
-    def _initialize_camera(self) -> bool:
-        """Initialize the camera, trying multiple indices and backends"""
-        if self.cap is not None:
-            self.cap.release()
-            self.cap = None
-            
-        # Try a list of indices and backends. We'll attempt:
-        #  - Windows-specific backends (DSHOW, MSMF)
-        #  - Open with no backend (let OpenCV choose)
-        backends = [cv2.CAP_DSHOW, cv2.CAP_MSMF, None]
-        indices = list(range(4))  # try 0..3
-
-        last_error = None
-        for idx in indices:
-            for backend in backends:
-                try:
-                    if backend is None:
-                        print(f"Trying camera index {idx} with default backend...")
-                        cap = cv2.VideoCapture(idx)
-                    else:
-                        print(f"Trying camera index {idx} with backend {backend}...")
-                        cap = cv2.VideoCapture(idx, backend)
-
-                    if not cap or not cap.isOpened():
-                        print(f"Failed to open camera {idx} with backend {backend}")
-                        try:
-                            cap.release()
-                        except Exception:
-                            pass
-                        continue
+    def _analysis_task(self):
+        """Analyse the newest captured frame at most analysis_fps times per second."""
+        next_due = 0.0
+        cpu = time.thread_time()
+        while self.is_running:
+            now_cpu = time.thread_time()
+            self.stats['analysis_cpu'] += now_cpu - cpu
+            cpu = now_cpu
+            bundle = self._analysis_queue.get(timeout=0.5)
+            if bundle is None:
+                continue
+            if self.analysis_fps <= 0:
+                continue
+            wait = next_due - time.monotonic()
+            if wait > 0:
+                # Sleep off the rest of the interval, then take whatever is newest.
+                time.sleep(wait)
+                newer = self._analysis_queue.get(timeout=0)
+                if newer is not None:
+                    bundle = newer
+            started = time.monotonic()
+            next_due = started + 1.0 / self.analysis_fps
+            width = min(self.analysis_width, bundle.size[0])
+            faces = self._process_frame(bundle.resized(width), bundle.resized(width, gray=True))
+            scale = bundle.size[0] / width
+            self._faces = ([tuple(int(v * scale) for v in box) for box in faces], time.time())
+            if self.mood is not None:
+                # Face crops go to the mood process; this never waits for it.
+                self.mood.offer(bundle, faces, scale)
+            self.stats['analyzed'] += 1
+            self.stats['analysis_ms'] = (time.monotonic() - started) * 1000.0
+            self._latency.append((time.time() - bundle.timestamp) * 1000.0)
 
-                    # Warm up and read a frame
-                    time.sleep(0.2)
-                    ret, frame = cap.read()
-                    if not ret or frame is None or frame.size == 0:
-                        print(f"Camera {idx} opened but failed to return a valid frame")
-                        try:
-                            cap.release()
-                        except Exception:
-                            pass
-                        continue
+    def _start_history(self):
+        if self.history_thread is not None and self.history_thread.is_alive():
+            return
+        self._history_running = True
+        self.history_thread = threading.Thread(target=self._history_task, name='camera_history', daemon=True)
+        self.history_thread.start()
 
-                    # Good frame — set preferred properties
-                    try:
-                        cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
-                        cap.set(cv2.CAP_PROP_FRAME_WIDTH, 640)
-                        cap.set(cv2.CAP_PROP_FRAME_HEIGHT, 480)
-                        cap.set(cv2.CAP_PROP_FPS, 30)
-                    except Exception:
-                        pass
+    def _history_task(self):
+        """Feed newly captured frames into the history; serve export requests."""
+        last_seq, next_poll = None, 0.0
+        cpu = time.thread_time()
+        while self._history_running:
+            started = time.monotonic()
+            try:
+                bundle = self.latest_bundle()
+                if bundle is not None and bundle.seq != last_seq:
+                    last_seq = bundle.seq
+                    self.history.add(bundle)
+                if started >= next_poll:
+                    next_poll = started + 1.0
+                    self._serve_export_requests()
+            except Exception as e:
+                print(f"Camera history error: {str(e)}")
+            now_cpu = time.thread_time()
+            self.stats['history_cpu'] += now_cpu - cpu
+            cpu = now_cpu
+            time.sleep(max(0.0, 1.0 / HISTORY_FPS - (time.monotonic() - started)))
 
-                    # Verify subsequent frames are valid
-                    valid = True
-                    for _ in range(2):
-                        ret, tmp = cap.read()
-                        if not ret or tmp is None or tmp.size == 0:
-                            valid = False
-                            break
-                        if np.mean(tmp) < 1:
-                            valid = False
-                            break
-
-                    if not valid:
-                        print(f"Camera {idx} produced invalid frames after init")
-                        try:
-                            cap.release()
-                        except Exception:
-                            pass
-                        continue
+    def export_clip(self, path: Optional[str] = None, seconds: Optional[float] = None, fps: float = HISTORY_FPS):
+        """Export recent frames as a video in the background. Returns a Future of the path."""
+        path = path or self._export_path('clip', '.avi')
+        if self._reading_shared():
+            return self.request_export('clip', path, seconds, fps=fps)
+        return self.history.export_clip(path, seconds, fps)
 
-                    # Camera works
-                    self.cap = cap
-                    self.current_camera_index = idx
-                    self.camera_properties = {
-                        'index': idx,
-                        'backend': backend,
-                        'width': cap.get(cv2.CAP_PROP_FRAME_WIDTH),
-                        'height': cap.get(cv2.CAP_PROP_FRAME_HEIGHT),
-                        'fps': cap.get(cv2.CAP_PROP_FPS),
-                    }
-                    print(f"Successfully initialized camera {idx} with backend {backend}")
-                    try:
-                        with open(data_path('camera_view.txt'), 'w', encoding='utf-8') as f:
-                            f.write('Camera initialized successfully')
-                    except Exception:
-                        pass
-                    return True
+    def export_contact_sheet(self, path: Optional[str] = None, seconds: Optional[float] = None, count: int = 12):
+        """Export recent frames as one contact-sheet image in the background. Returns a Future."""
+        path = path or self._export_path('sheet', '.jpg')
+        if self._reading_shared():
+            return self.request_export('sheet', path, seconds, count=count)
+        return self.history.export_contact_sheet(path, seconds, count)
+
+    def _reading_shared(self) -> bool:
+        return not self._capturing() and self._shared_ring() is not None
+
+    def request_export(self, kind: str, path: str, seconds: Optional[float] = None, count: int = 12,
+                       fps: float = HISTORY_FPS, timeout: float = EXPORT_REQUEST_TIMEOUT) -> Future:
+        """Ask the process that owns the capture for an export. Returns a Future of the path.
+
+        Only the owner keeps a frame history; it picks the request up within
+        a second and writes `path` (or `path`.error if the export failed).
+        """
+        req = {'kind': kind, 'path': path, 'seconds': seconds, 'count': count, 'fps': fps,
+               'requested': time.time()}
+        folder = data_path(EXPORT_REQUEST_DIR)
+        os.makedirs(folder, exist_ok=True)
+        req_path = os.path.join(folder, f"{uuid.uuid4().hex}.json")
+        with open(req_path + '.tmp', 'w', encoding='utf-8') as f:
+            json.dump(req, f)
+        os.replace(req_path + '.tmp', req_path)
+        future = Future()
 
-                except Exception as e:
-                    last_error = e
-                    print(f"Error trying camera {idx} with backend {backend}: {str(e)}")
+        def wait():
+            deadline = time.monotonic() + timeout
+            while time.monotonic() < deadline:
+                if os.path.exists(path):
+                    future.set_result(path)
+                    return
+                if os.path.exists(path + '.error'):
+                    with open(path + '.error', 'r', encoding='utf-8') as f:
+                        error = f.read()
                     try:
-                        if 'cap' in locals() and cap is not None:
-                            cap.release()
-                    except Exception:
+                        os.remove(path + '.error')
+                    except OSError:
                         pass
-                    continue
+                    future.set_exception(RuntimeError(error))
+                    return
+                time.sleep(0.2)
+            try:
+                os.remove(req_path)
+            except OSError:
+                pass
+            future.set_exception(TimeoutError(f"No answer from the camera process within {timeout}s"))
+        threading.Thread(target=wait, name='camera_export_request', daemon=True).start()
+        return future
+
+    def _export_path(self, kind: str, ext: str) -> str:
+        folder = data_path(EXPORT_DIR)
+        os.makedirs(folder, exist_ok=True)
+        return os.path.join(folder, f"{kind}_{datetime.now().strftime('%Y%m%d_%H%M%S')}_{uuid.uuid4().hex[:6]}{ext}")
 
-        # No camera succeeded
-        print("Failed to initialize any camera")
+    def _serve_export_requests(self):
+        """Run the exports other processes asked for, one request file each."""
+        folder = data_path(EXPORT_REQUEST_DIR)
         try:
-            with open(data_path('camera_view.txt'), 'w', encoding='utf-8') as f:
-                f.write('No camera available or failed to initialize')
+            names = os.listdir(folder)
+        except OSError:
+            return
+        for name in names:
+            if name.endswith('.json'):
+                self._serve_export_request(os.path.join(folder, name))
+
+    def _serve_export_request(self, req_path: str):
+        """Run one export request. Failures are reported in <path>.error."""
+        try:
+            with open(req_path, 'r', encoding='utf-8') as f:
+                req = json.load(f)
         except Exception:
-            pass
-        if last_error:
-            print(f"Last error: {str(last_error)}")
-        return False
+            req = {}
+        finally:
+            try:
+                os.remove(req_path)
+            except OSError:
+                pass
+        path = req.get('path')
+        if not path:
+            return
+        if req.get('kind') == 'sheet':
+            future = self.export_contact_sheet(path, req.get('seconds'), int(req.get('count', 12)))
+        else:
+            future = self.export_clip(path, req.get('seconds'), float(req.get('fps', HISTORY_FPS)))
+
+        def report(f):
+            if f.exception() is not None:
+                with open(path + '.error', 'w', encoding='utf-8') as out:
+                    out.write(str(f.exception()))
+        future.add_done_callback(report)
+
+    def _initialize_camera(self) -> bool:
+        """Open a working camera: last-known-good first, then every candidate in parallel."""
+        if self.cap is not None:
+            self.cap.release()
+            self.cap = None
+
+        if self.frame_source is not None:
+            return self._open_frame_source()
+
+        started = time.monotonic()
+        config = load_camera_config()
+        found = None
+        last = config.get('last_good')
+        if last:
+            print(f"Trying last working camera {last['index']} with backend {last['backend']}...")
+            found = _probe_camera(last['index'], last['backend'])
+        if found is None:
+            found = self._probe_all(skip=(last['index'], last['backend']) if last else None)
+
+        if found is None:
+            print("Failed to initialize any camera")
+            bus.publish('No camera available or failed to initialize', immediate=True)
+            return False
+
+        cap, props = found
+        props['probe_ms'] = round((time.monotonic() - started) * 1000.0, 1)
+        self.cap = cap
+        self.current_camera_index = props['index']
+        self.camera_properties = props
+        print(f"Successfully initialized camera {props['index']} with backend {props['backend']}")
+        config['last_good'] = props
+        config['updated'] = time.time()
+        save_camera_config(config)
+        bus.publish('Camera initialized successfully', immediate=True)
+        return True
+
+    def _open_frame_source(self) -> bool:
+        source = self.frame_source
+        try:
+            if isinstance(source, str):
+                from features.frame_sources import make_source
+                cap = make_source(source)
+            else:
+                cap = source
+            if cap is None or not cap.isOpened():
+                raise ValueError("source is not open")
+        except Exception as e:
+            print(f"Failed to open frame source {source}: {str(e)}")
+            bus.publish('No camera available or failed to initialize', immediate=True)
+            return False
+        self.cap = cap
+        self.current_camera_index = -1
+        self.camera_properties = {
+            'source': source if isinstance(source, str) else type(source).__name__,
+            'width': cap.get(cv2.CAP_PROP_FRAME_WIDTH),
+            'height': cap.get(cv2.CAP_PROP_FRAME_HEIGHT),
+            'fps': cap.get(cv2.CAP_PROP_FPS),
+        }
+        print(f"Using frame source {self.camera_properties['source']}")
+        bus.publish('Camera initialized successfully', immediate=True)
+        return True
+
+    def _probe_all(self, skip=None):
+        """Probe all indices concurrently; return the first working (cap, props) or None.
+
+        Backends of one index are tried in order on one worker (opening the
+        same device twice at once fails on most drivers). Workers that finish
+        after a camera was chosen, or after the deadline, release their device.
+        """
+        chosen = []
+        lock = threading.Lock()
+        done = threading.Event()
+        remaining = [len(PROBE_INDICES)]
+
+        def worker(idx):
+            try:
+                for backend in PROBE_BACKENDS:
+                    if done.is_set():
+                        return
+                    if skip is not None and (idx, backend) == tuple(skip):
+                        continue
+                    found = _probe_camera(idx, backend)
+                    if found is None:
+                        continue
+                    with lock:
+                        if not chosen:
+                            chosen.append(found)
+                            done.set()
+                            return
+                    found[0].release()
+                    return
+            finally:
+                with lock:
+                    remaining[0] -= 1
+                    if remaining[0] == 0:
+                        done.set()
+
+        for idx in PROBE_INDICES:
+            threading.Thread(target=worker, args=(idx,), daemon=True).start()
+        if not done.wait(PROBE_DEADLINE):
+            print(f"Camera probe deadline ({PROBE_DEADLINE}s) reached")
+        with lock:
+            done.set()
+            if not chosen:
+                chosen.append(None)  # late finishers release their device
+            return chosen[0]
         
-    def _process_frame(self, frame):
-        """Process the captured frame and update camera_view.txt"""
+    def _process_frame(self, frame, gray=None):
+        """Describe the frame and publish the description to the observation bus.
+
+        Returns the face boxes found (in frame coordinates).
+        """
+        faces = []
         try:
             # Basic frame validation
             if frame is None or frame.size == 0:
@@ -222,25 +716,20 @@ class CameraManager:
 
             # Check if frame is too dark or too bright
             average_brightness = np.mean(frame)
+            num_faces, movement = 0, False
             if average_brightness < 30:
                 description = "Camera me kuch clear nahi dikh raha hai, bahut andhera hai."
             elif average_brightness > 240:
                 description = "Camera me kuch clear nahi dikh raha hai, bahut roshni hai."
             else:
-                # Convert to grayscale for processing
-                gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+                # Convert to grayscale for processing (the bundle already has it)
+                if gray is None:
+                    gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
                 
-                # Try to detect faces
-                face_cascade = cv2.CascadeClassifier(cv2.data.haarcascades + 'haarcascade_frontalface_default.xml')
-                faces = face_cascade.detectMultiScale(gray, 1.3, 5)
-                
-                # Look for movement/changes in the frame
-                if hasattr(self, 'last_gray'):
-                    frame_delta = cv2.absdiff(self.last_gray, gray)
-                    movement = np.mean(frame_delta) > 10
-                else:
-                    movement = False
-                self.last_gray = gray
+                # Faces (the cascade only runs when the scene changes;
+                # boxes are tracked in between) and movement
+                faces = self.face_tracker.update(gray)
+                movement = self.face_tracker.moving_within(MOVEMENT_HOLD)
                 
                 # Create detailed description
                 num_faces = len(faces)
@@ -256,34 +745,113 @@ class CameraManager:
                     else:
                         description = "Camera me koi person nahi dikh raha hai aur koi movement bhi nahi hai."
             
-            # Save description
-            with open(data_path('camera_view.txt'), 'w', encoding='utf-8') as f:
-                f.write(description)
+            # Subscribers only hear about it when the description changes
+            bus.publish(description, {'faces': num_faces, 'movement': bool(movement),
+                                      'brightness': float(average_brightness)})
                 
         except Exception as e:
             print(f"Camera processing error: {str(e)}")
-            try:
-                with open(data_path('camera_view.txt'), 'w', encoding='utf-8') as f:
-                    f.write("Camera processing me error aa raha hai, dubara koshish kar raha hun...")
-            except Exception as e2:
-                print(f"Failed to write camera_view.txt: {str(e2)}")
+            bus.publish("Camera processing me error aa raha hai, dubara koshish kar raha hun...", immediate=True)
+        return faces
                 
     def get_latest_frame(self) -> Tuple[bool, Optional[Any]]:
         """Get the most recent frame"""
+        if not self._capturing():
+            shared = self._shared_ring()
+            if shared is not None:
+                latest = shared.latest(copy=True, max_age=5)
+                if latest is not None:
+                    return True, latest.frame
         if self.last_frame is None:
             return False, None
         if time.time() - self.last_frame_time > 5:  # Frame is too old
             return False, None
         return True, self.last_frame.copy()
+
+    def latest_faces(self, max_age: float = 1.0) -> Optional[list]:
+        """Face boxes (x, y, w, h in frame coordinates) of the last analysed frame.
+
+        None if this process does not analyse frames (it reads another
+        process's ring, or analysis is off). Empty until the first frame is
+        analysed and once the last result is older than max_age.
+        """
+        if not self._capturing() or self.analysis_fps <= 0:
+            return None
+        faces = self._faces
+        if faces is None or time.time() - faces[1] > max_age:
+            return []
+        return faces[0]
+
+    def latest_bundle(self, max_age: float = 5) -> Optional[FrameBundle]:
+        """Newest frame as a FrameBundle (one per frame sequence number), or None.
+
+        Own captures are bundled as they arrive; frames from another
+        process's ring are copied out once per sequence number.
+        """
+        if self._capturing():
+            bundle = self._bundle
+            if bundle is None or time.time() - bundle.timestamp > max_age:
+                return None
+            return bundle
+        shared = self._shared_ring()
+        if shared is None:
+            return None
+        bundle = self._bundle
+        if (bundle is not None and bundle.generation == shared.generation and bundle.seq == shared.latest_seq
+                and time.time() - bundle.timestamp <= max_age):
+            return bundle
+        latest = shared.latest(copy=True, max_age=max_age)
+        if latest is None:
+            return None
+        if bundle is None or (bundle.generation, bundle.seq) != (latest.generation, latest.seq):
+            bundle = self._bundle = FrameBundle(latest.frame, latest.seq, latest.timestamp, latest.generation)
+        return bundle
+
+    def wait_bundle(self, after_seq: int = 0, timeout: float = 1.0) -> Optional[FrameBundle]:
+        """Block until there is a bundle other than after_seq (or timeout); returns the newest.
+
+        Callers compare the returned seq with after_seq: on timeout the same
+        bundle (or None) comes back.
+        """
+        if self._capturing():
+            with self._bundle_cond:
+                self._bundle_cond.wait_for(
+                    lambda: self._bundle is not None and self._bundle.seq != after_seq, timeout)
+            return self.latest_bundle()
+        shared = self._shared_ring()
+        if shared is None:
+            time.sleep(timeout)
+            return None
+        shared.wait_next(after_seq, timeout)
+        return self.latest_bundle()
+
+    def latest_view(self):
+        """Newest frame as a zero-copy RingFrame (own or shared ring), or None.
+
+        The frame is a view into shared memory: use it right away (resize,
+        convert, encode) or check `.valid()` afterwards; it is overwritten
+        once the ring wraps around.
+        """
+        ring = self.ring if self.ring is not None else self._shared_ring()
+        if ring is None:
+            return None
+        return ring.latest(max_age=5)
             
     def cleanup(self):
         """Cleanup resources"""
         self.is_running = False
+        self._history_running = False
         if self.background_thread is not None:
             self.background_thread.join(timeout=1.0)
+        if self.analysis_thread is not None:
+            self.analysis_thread.join(timeout=1.0)
+        if self.mood is not None:
+            self.mood.close()
+            self.mood = None
         if self.cap is not None:
             self.cap.release()
             self.cap = None
+        self._close_rings()
             
     def release(self):
         """Safely release the camera"""
@@ -291,11 +859,23 @@ class CameraManager:
             
     def get_camera_status(self) -> Dict[str, Any]:
         """Get current camera status"""
+        if not self._capturing():
+            shared = self._shared_ring()
+            if shared is not None:
+                info = shared.info()
+                return {
+                    'initialized': True,
+                    'camera_index': self.current_camera_index,
+                    'last_frame_time': info['heartbeat'],
+                    'properties': self.camera_properties,
+                    'shared_from': info,
+                }
         return {
             'initialized': self.cap is not None and self.cap.isOpened(),
             'camera_index': self.current_camera_index,
             'last_frame_time': self.last_frame_time,
-            'properties': self.camera_properties
+            'properties': self.camera_properties,
+            'pipeline': self.pipeline_stats(),
         }
 
     # Public wrapper for external callers/tests
@@ -321,6 +901,18 @@ class CameraManager:
         If owner is provided it must match current owner.
         """
         try:
+            # The capture thread is already reading the device; reading it
+            # here too would steal frames from it, so hand out the latest.
+            if self._capturing():
+                if owner is not None and self.owner is not None and owner != self.owner:
+                    return False, None
+                return self.get_latest_frame()
+            # Another process owns the camera: read from its shared ring.
+            shared = self._shared_ring()
+            if shared is not None:
+                latest = shared.latest(copy=True, max_age=5)
+                return (True, latest.frame) if latest is not None else (False, None)
+
             # Enforce ownership: camera must be started and owner must match (if provided)
             if self.owner is None:
                 return False, None
@@ -0,0 +1,149 @@
+"""Motion-gated face detection for the camera pipeline.
+
+Running a Haar cascade on every frame is the most expensive thing the camera
+code does, and on an idle desk nothing changes between frames. `FaceTracker`
+runs the detector only when it has to:
+
+  * a `MotionGate` compares tiny grayscale thumbnails; a static scene keeps
+    the last result (with a slow periodic re-check),
+  * while something moves, known face boxes are followed with sparse
+    Lucas-Kanade optical flow, and
+  * the full detector runs again when motion starts, when the tracker loses
+    its points, every `redetect_interval` seconds while tracking, and every
+    `search_interval` seconds while something moves but no face is known.
+"""
+import time
+from typing import Callable, List, Optional, Tuple
+
+import cv2
+import numpy as np
+
+Box = Tuple[int, int, int, int]  # x, y, w, h
+
+
+class MotionGate:
+    """Cheap change detector on a downscaled frame.
+
+    Frames are compared with the last frame that counted as motion, not with
+    the previous one, so slow drift adds up until it is reported.
+    """
+
+    def __init__(self, size: Tuple[int, int] = (64, 48), pixel_threshold: int = 25,
+                 min_changed: float = 0.01):
+        self.size = size
+        self.pixel_threshold = pixel_threshold
+        self.min_changed = min_changed
+        self._prev = None
+        self.changed = 0.0  # fraction of thumbnail pixels that changed last update
+
+    def update(self, gray: np.ndarray) -> bool:
+        """Feed a grayscale frame; True if it differs noticeably from the previous one."""
+        thumb = cv2.resize(gray, self.size, interpolation=cv2.INTER_AREA)
+        thumb = cv2.GaussianBlur(thumb, (3, 3), 0)
+        if self._prev is None or self._prev.shape != thumb.shape:
+            self._prev = thumb
+            self.changed = 1.0
+            return True
+        diff = cv2.absdiff(self._prev, thumb)
+        self.changed = float(np.count_nonzero(diff > self.pixel_threshold)) / diff.size
+        if self.changed < self.min_changed:
+            return False
+        self._prev = thumb
+        return True
+
+
+class FaceTracker:
+    """Face boxes per frame, calling `detector(gray)` only when needed."""
+
+    def __init__(self, detector: Callable[[np.ndarray], List[Box]], redetect_interval: float = 2.0,
+                 search_interval: float = 0.5, idle_redetect: float = 10.0, min_points: int = 6,
+                 min_track_ratio: float = 0.5, gate: Optional[MotionGate] = None):
+        self.detector = detector
+        self.redetect_interval = redetect_interval  # while moving with faces tracked
+        self.search_interval = search_interval      # while moving with no face known
+        self.idle_redetect = idle_redetect          # while static
+        self.min_points = min_points
+        self.min_track_ratio = min_track_ratio
+        self.gate = gate or MotionGate()
+        self.boxes: List[Box] = []
+        self.moving = False
+        self.last_motion = 0.0  # time of the last frame the gate reported as motion
+        self._points: List[np.ndarray] = []
+        self._prev_gray = None  # frame the current boxes/points belong to
+        self._last_detect = 0.0
+        self.stats = {'frames': 0, 'detections': 0, 'tracked': 0, 'skipped': 0}
+
+    def reset(self):
+        self.boxes = []
+        self._points = []
+        self._prev_gray = None
+        self._last_detect = 0.0
+
+    def update(self, gray: np.ndarray, now: Optional[float] = None) -> List[Box]:
+        """Return face boxes for this grayscale frame."""
+        now = time.monotonic() if now is None else now
+        self.stats['frames'] += 1
+        was_moving = self.moving
+        self.moving = self.gate.update(gray)
+        if self.moving:
+            self.last_motion = now
+        since = now - self._last_detect
+        if self._prev_gray is not None and self._prev_gray.shape != gray.shape:
+            self.reset()
+            since = float('inf')
+
+        if not self.moving:
+            # Static scene: the previous answer still holds.
+            if since < self.idle_redetect:
+                self.stats['skipped'] += 1
+            else:
+                self._detect(gray, now)
+        elif self.boxes:
+            if since < self.redetect_interval and self._track(gray):
+                self.stats['tracked'] += 1
+            else:
+                self._detect(gray, now)
+        elif not was_moving or since >= self.search_interval:
+            self._detect(gray, now)
+        else:
+            self.stats['skipped'] += 1
+        return list(self.boxes)
+
+    def moving_within(self, seconds: float, now: Optional[float] = None) -> bool:
+        """True if motion was seen in the last `seconds` (steadier than `moving`)."""
+        now = time.monotonic() if now is None else now
+        return now - self.last_motion < seconds
+
+    def _detect(self, gray: np.ndarray, now: float):
+        self.boxes = [tuple(int(v) for v in b) for b in self.detector(gray)]
+        self._points = [self._features(gray, b) for b in self.boxes]
+        self._prev_gray = gray
+        self._last_detect = now
+        self.stats['detections'] += 1
+
+    def _features(self, gray: np.ndarray, box: Box) -> Optional[np.ndarray]:
+        x, y, w, h = box
+        mask = np.zeros_like(gray)
+        mask[max(0, y):y + h, max(0, x):x + w] = 255
+        return cv2.goodFeaturesToTrack(gray, maxCorners=30, qualityLevel=0.01, minDistance=3, mask=mask)
+
+    def _track(self, gray: np.ndarray) -> bool:
+        """Move every box by the median flow of its points. False if any box is lost."""
+        boxes, points = [], []
+        for box, pts in zip(self.boxes, self._points):
+            if pts is None or len(pts) < self.min_points:
+                return False
+            nxt, status, _ = cv2.calcOpticalFlowPyrLK(self._prev_gray, gray, pts, None,
+                                                      winSize=(15, 15), maxLevel=2)
+            if nxt is None:
+                return False
+            good = status.reshape(-1) == 1
+            if good.sum() < max(self.min_points, self.min_track_ratio * len(pts)):
+                return False
+            dx, dy = np.median((nxt[good] - pts[good]).reshape(-1, 2), axis=0)
+            x, y, w, h = box
+            boxes.append((int(round(x + dx)), int(round(y + dy)), w, h))
+            points.append(nxt[good].reshape(-1, 1, 2))
+        self.boxes, self._points = boxes, points
+        self._prev_gray = gray
+        return True
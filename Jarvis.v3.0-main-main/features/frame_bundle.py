@@ -0,0 +1,101 @@
+"""One captured frame plus the resized / grayscale versions consumers need.
+
+The GUI preview, the analysis thread and take_snapshot all used to resize
+and colour-convert the same frame on their own. A `FrameBundle` is created
+once per captured frame (CameraManager.latest_bundle()) and computes each
+derivative lazily, at most once, no matter how many consumers ask:
+
+    bundle.full                  # BGR as captured
+    bundle.half, bundle.quarter  # pyramid levels, each from the one above
+    bundle.gray()                # grayscale of the full frame
+    bundle.resized(320, 240)     # smallest covering level, resized if needed
+    bundle.resized(320, gray=True)
+
+Arrays are shared between consumers and therefore read-only; copy before
+drawing on one.
+"""
+import threading
+from typing import Dict, Optional, Tuple
+
+import cv2
+import numpy as np
+
+
+class FrameBundle:
+    __slots__ = ('seq', 'generation', 'timestamp', 'full', 'size', '_cache', '_lock', 'computed')
+
+    def __init__(self, frame: np.ndarray, seq: int, timestamp: float, generation: int = 0):
+        frame.flags.writeable = False
+        self.seq = seq
+        self.generation = generation   # frame source (seq restarts per source, see frame_ring)
+        self.timestamp = timestamp
+        self.full = frame
+        self.size = (frame.shape[1], frame.shape[0])   # (w, h)
+        self._cache: Dict[Tuple[str, int, int], np.ndarray] = {('bgr',) + self.size: frame}
+        self._lock = threading.Lock()
+        self.computed = 0   # conversions done for this frame (for tests/benchmarks)
+
+    @property
+    def half(self) -> np.ndarray:
+        return self.level(1)
+
+    @property
+    def quarter(self) -> np.ndarray:
+        return self.level(2)
+
+    def level(self, n: int) -> np.ndarray:
+        """Pyramid level n (0 = full, 1 = half, 2 = quarter, ...)."""
+        w, h = self.size
+        return self.resized(max(1, w >> n), max(1, h >> n))
+
+    def gray(self, level: int = 0) -> np.ndarray:
+        w, h = self.size
+        return self.resized(max(1, w >> level), max(1, h >> level), gray=True)
+
+    def resized(self, width: int, height: Optional[int] = None, gray: bool = False) -> np.ndarray:
+        """The frame at width x height (height keeps the aspect ratio if omitted)."""
+        w, h = self.size
+        if height is None:
+            height = max(1, int(round(h * width / w)))
+        key = ('gray' if gray else 'bgr', width, height)
+        out = self._cache.get(key)
+        if out is not None:
+            return out
+        with self._lock:
+            if not gray:
+                return self._bgr_locked(width, height)
+            out = self._cache.get(key)
+            if out is None:
+                out = cv2.cvtColor(self._bgr_locked(width, height), cv2.COLOR_BGR2GRAY)
+                self._store(key, out)
+            return out
+
+    def _store(self, key, out: np.ndarray):
+        out.flags.writeable = False
+        self._cache[key] = out
+        self.computed += 1
+
+    def _bgr_locked(self, width: int, height: int) -> np.ndarray:
+        key = ('bgr', width, height)
+        out = self._cache.get(key)
+        if out is None:
+            src = self._source_locked(width, height)
+            out = self._cache.get(key)   # the target may itself be a pyramid level
+            if out is None:
+                out = cv2.resize(src, (width, height), interpolation=cv2.INTER_AREA)
+                self._store(key, out)
+        return out
+
+    def _source_locked(self, width: int, height: int) -> np.ndarray:
+        """Smallest pyramid level at least width x height (building levels on the way)."""
+        w, h = self.size
+        src, n = self.full, 0
+        while (w >> (n + 1)) >= width and (h >> (n + 1)) >= height:
+            n += 1
+            key = ('bgr', w >> n, h >> n)
+            nxt = self._cache.get(key)
+            if nxt is None:
+                nxt = cv2.resize(src, (w >> n, h >> n), interpolation=cv2.INTER_AREA)
+                self._store(key, nxt)
+            src = nxt
+        return src
@@ -0,0 +1,196 @@
+"""Bounded in-memory history of recent camera frames, exportable on demand.
+
+`FrameHistory` keeps the last `seconds` of camera frames as JPEG bytes so
+"what just happened?" can be answered after the fact. To stay small it only
+stores a frame when the picture changed noticeably since the last stored
+one, plus a keyframe every `keyframe_interval` seconds so a still scene
+still has a timeline. Frames older than `seconds` are dropped, and the
+oldest are dropped early if the total would exceed `max_bytes`, so memory
+use is fixed no matter how long the camera runs.
+
+    history.add(bundle)                                   # a features.frame_bundle.FrameBundle
+    history.export_clip('clip.avi').result()              # encoded on a background thread
+    history.export_contact_sheet('sheet.jpg', count=12)
+"""
+import os
+import threading
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from datetime import datetime
+from typing import List, NamedTuple, Optional
+
+import cv2
+import numpy as np
+
+HISTORY_SECONDS = 15.0
+HISTORY_MAX_BYTES = 16 * 1024 * 1024
+HISTORY_WIDTH = 640
+JPEG_QUALITY = 70
+KEYFRAME_INTERVAL = 2.0
+CHANGE_THRESHOLD = 0.02   # fraction of thumbnail pixels that must change
+PIXEL_THRESHOLD = 20      # gray-level difference that counts as a changed pixel
+THUMB_SIZE = (64, 48)
+
+# Clips and contact sheets are decoded/encoded here, never on the caller's thread.
+_export_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='frame_export')
+
+
+class HistoryFrame(NamedTuple):
+    timestamp: float
+    seq: int
+    jpeg: bytes
+    keyframe: bool
+
+
+class FrameHistory:
+    def __init__(self, seconds: float = HISTORY_SECONDS, max_bytes: int = HISTORY_MAX_BYTES,
+                 width: int = HISTORY_WIDTH, quality: int = JPEG_QUALITY,
+                 keyframe_interval: float = KEYFRAME_INTERVAL, change_threshold: float = CHANGE_THRESHOLD):
+        self.seconds = seconds
+        self.max_bytes = max_bytes
+        self.width = width
+        self.quality = quality
+        self.keyframe_interval = keyframe_interval
+        self.change_threshold = change_threshold
+        self._lock = threading.Lock()
+        self._frames = deque()
+        self._bytes = 0
+        self._last_thumb = None
+        self._last_key = 0.0
+        self.stats = {'offered': 0, 'stored': 0, 'keyframes': 0, 'unchanged': 0, 'evicted': 0}
+
+    def add(self, bundle) -> bool:
+        """Offer a frame bundle; returns True if it was stored."""
+        self.stats['offered'] += 1
+        ts = bundle.timestamp
+        thumb = bundle.resized(THUMB_SIZE[0], THUMB_SIZE[1], gray=True)
+        keyframe = ts - self._last_key >= self.keyframe_interval
+        if not keyframe and self._last_thumb is not None:
+            changed = np.count_nonzero(cv2.absdiff(thumb, self._last_thumb) > PIXEL_THRESHOLD) / thumb.size
+            if changed < self.change_threshold:
+                self.stats['unchanged'] += 1
+                self._evict(ts)
+                return False
+        frame = bundle.resized(min(self.width, bundle.size[0]))
+        ok, jpg = cv2.imencode('.jpg', frame, [cv2.IMWRITE_JPEG_QUALITY, self.quality])
+        if not ok:
+            return False
+        self._last_thumb = thumb
+        if keyframe:
+            self._last_key = ts
+            self.stats['keyframes'] += 1
+        entry = HistoryFrame(ts, bundle.seq, jpg.tobytes(), keyframe)
+        with self._lock:
+            self._frames.append(entry)
+            self._bytes += len(entry.jpeg)
+        self.stats['stored'] += 1
+        self._evict(ts)
+        return True
+
+    def _evict(self, now: float):
+        with self._lock:
+            while self._frames and (self._frames[0].timestamp < now - self.seconds or self._bytes > self.max_bytes):
+                self._bytes -= len(self._frames.popleft().jpeg)
+                self.stats['evicted'] += 1
+
+    @property
+    def nbytes(self) -> int:
+        return self._bytes
+
+    def frames(self, seconds: Optional[float] = None) -> List[HistoryFrame]:
+        """Stored frames (oldest first), optionally only the last `seconds`."""
+        with self._lock:
+            frames = list(self._frames)
+        if seconds is not None and frames:
+            since = frames[-1].timestamp - seconds
+            frames = [f for f in frames if f.timestamp >= since]
+        return frames
+
+    def clear(self):
+        with self._lock:
+            self._frames.clear()
+            self._bytes = 0
+        self._last_thumb = None
+        self._last_key = 0.0
+
+    def export_clip(self, path: str, seconds: Optional[float] = None, fps: float = 10.0) -> Future:
+        """Write the history as a video in the background. The future resolves to path."""
+        return _export_executor.submit(write_clip, self.frames(seconds), path, fps)
+
+    def export_contact_sheet(self, path: str, seconds: Optional[float] = None, count: int = 12,
+                             cols: int = 4) -> Future:
+        """Write evenly spaced frames as one labelled grid image in the background."""
+        return _export_executor.submit(write_contact_sheet, self.frames(seconds), path, count, cols)
+
+
+def _decode(entry: HistoryFrame) -> np.ndarray:
+    return cv2.imdecode(np.frombuffer(entry.jpeg, np.uint8), cv2.IMREAD_COLOR)
+
+
+def write_clip(frames: List[HistoryFrame], path: str, fps: float = 10.0) -> str:
+    """Encode frames as a constant-rate video; each frame is held until the next one.
+
+    .mp4 uses mp4v, anything else Motion-JPEG (.avi).
+    """
+    if not frames:
+        raise ValueError("no frames in history")
+    first = _decode(frames[0])
+    h, w = first.shape[:2]
+    fourcc = cv2.VideoWriter_fourcc(*('mp4v' if path.lower().endswith('.mp4') else 'MJPG'))
+    tmp = path + '.part' + os.path.splitext(path)[1]
+    writer = cv2.VideoWriter(tmp, fourcc, fps, (w, h))
+    if not writer.isOpened():
+        raise RuntimeError(f"cannot open video writer for {path}")
+    try:
+        current, i = first, 0
+        t, end = frames[0].timestamp, frames[-1].timestamp
+        while t <= end + 1e-6:
+            while i + 1 < len(frames) and frames[i + 1].timestamp <= t:
+                i += 1
+                current = _decode(frames[i])
+                if current.shape[:2] != (h, w):
+                    current = cv2.resize(current, (w, h))
+            writer.write(current)
+            t += 1.0 / fps
+    finally:
+        writer.release()
+    os.replace(tmp, path)
+    return path
+
+
+def write_contact_sheet(frames: List[HistoryFrame], path: str, count: int = 12, cols: int = 4,
+                        thumb_width: int = 320) -> str:
+    """Grid of `count` frames evenly spaced in time, each labelled with its clock time."""
+    if not frames:
+        raise ValueError("no frames in history")
+    start, end = frames[0].timestamp, frames[-1].timestamp
+    picks, j = [], 0
+    for k in range(min(count, len(frames))):
+        target = start + (end - start) * k / max(1, min(count, len(frames)) - 1)
+        while j + 1 < len(frames) and frames[j + 1].timestamp <= target:
+            j += 1
+        if not picks or picks[-1] is not frames[j]:
+            picks.append(frames[j])
+    thumbs = []
+    for entry in picks:
+        img = _decode(entry)
+        th = int(img.shape[0] * thumb_width / img.shape[1])
+        img = cv2.resize(img, (thumb_width, th), interpolation=cv2.INTER_AREA)
+        label = datetime.fromtimestamp(entry.timestamp).strftime('%H:%M:%S.%f')[:-5]
+        cv2.putText(img, label, (6, th - 8), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 0, 0), 3)
+        cv2.putText(img, label, (6, th - 8), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255, 255, 255), 1)
+        thumbs.append(img)
+    cols = min(cols, len(thumbs))
+    th = max(t.shape[0] for t in thumbs)
+    rows = (len(thumbs) + cols - 1) // cols
+    sheet = np.zeros((rows * th, cols * thumb_width, 3), np.uint8)
+    for k, img in enumerate(thumbs):
+        r, c = divmod(k, cols)
+        sheet[r * th:r * th + img.shape[0], c * thumb_width:(c + 1) * thumb_width] = img
+    ok, data = cv2.imencode(os.path.splitext(path)[1] or '.jpg', sheet)
+    if not ok:
+        raise RuntimeError(f"cannot encode {path}")
+    with open(path + '.part', 'wb') as f:
+        f.write(data.tobytes())
+    os.replace(path + '.part', path)
+    return path
@@ -0,0 +1,268 @@
+"""Shared-memory ring of camera frames.
+
+One process (the one that opened the camera) publishes every captured frame
+into a small ring of fixed-size slots in `multiprocessing.shared_memory`.
+Any other process (GUI, agent, demos) attaches by name and reads the newest
+frame as a NumPy view into the shared block: no second camera open, no
+pickling, no copy unless the reader asks for one.
+
+Each slot is guarded by a sequence lock: the writer stamps `seq_begin`
+before copying pixels and `seq_end` after, so a reader that sees both equal
+to the sequence number it wanted knows the slot holds that complete frame.
+A zero-copy view stays valid until the writer laps the ring (`slots` frames
+later); call `RingFrame.valid()` after using it, or pass copy=True to keep
+a frame around.
+
+Sequence numbers restart at 1 with every new ring (e.g. after the camera
+owner restarts), so each ring also carries a random `generation`; caches
+keyed on frames use (generation, seq).
+"""
+import os
+import time
+from multiprocessing import shared_memory
+from typing import Optional, Dict
+
+import numpy as np
+
+FRAME_RING_NAME = 'jarvis_frames'
+DEFAULT_SLOTS = 4
+DEFAULT_SLOT_BYTES = 1920 * 1080 * 3   # largest frame a slot can hold
+STALE_AFTER = 5.0                      # seconds without a heartbeat before a ring counts as dead
+
+_MAGIC = 0x3252464A  # 'JFR2' (JFR1 had no generation)
+_ALIGN = 64
+
+_HEADER = np.dtype([
+    ('magic', '<u4'),
+    ('slots', '<u4'),
+    ('slot_bytes', '<u8'),
+    ('latest', '<u8'),        # sequence number of the newest complete frame (0 = none yet)
+    ('heartbeat', '<f8'),     # writer's last sign of life (time.time())
+    ('generation', '<u8'),    # random id of this ring (see new_generation)
+    ('pid', '<u4'),
+    ('closed', '<u4'),
+    ('owner', 'S32'),
+], align=True)
+
+_SLOT = np.dtype([
+    ('seq_begin', '<u8'),
+    ('seq_end', '<u8'),
+    ('timestamp', '<f8'),
+    ('height', '<u4'),
+    ('width', '<u4'),
+    ('channels', '<u4'),     # 0 for single-channel 2-D frames
+    ('dtype', 'S8'),
+], align=True)
+
+
+def _round_up(n: int) -> int:
+    return (n + _ALIGN - 1) // _ALIGN * _ALIGN
+
+
+def _layout(slots: int, slot_bytes: int):
+    slots_off = _round_up(_HEADER.itemsize)
+    data_off = _round_up(slots_off + _SLOT.itemsize * slots)
+    stride = _round_up(slot_bytes)
+    return slots_off, data_off, stride, data_off + stride * slots
+
+
+def new_generation() -> int:
+    """Random id telling apart frame sequences that restart at 1."""
+    return int.from_bytes(os.urandom(8), 'little') >> 1
+
+
+def _attach_shm(name: str):
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)  # Python 3.13+
+    except TypeError:
+        shm = shared_memory.SharedMemory(name=name)
+        if os.name == 'posix':
+            # Before 3.13 attaching registers the block with this process's
+            # resource tracker, which would unlink it when a reader exits.
+            try:
+                from multiprocessing import resource_tracker
+                resource_tracker.unregister(shm._name, 'shared_memory')
+            except Exception:
+                pass
+        return shm
+
+
+class RingFrame:
+    """A frame read from the ring. `frame` may be a view into shared memory."""
+    __slots__ = ('frame', 'seq', 'timestamp', '_ring', '_slot')
+
+    def __init__(self, frame, seq: int, timestamp: float, ring, slot: int):
+        self.frame = frame
+        self.seq = seq
+        self.timestamp = timestamp
+        self._ring = ring
+        self._slot = slot
+
+    @property
+    def generation(self) -> int:
+        return self._ring.generation
+
+    def valid(self) -> bool:
+        """True while the writer has not started overwriting this frame's slot."""
+        return int(self._ring._slots['seq_begin'][self._slot]) == self.seq
+
+
+class FrameRing:
+    """Fixed-slot frame ring in shared memory. Use create() or attach()."""
+
+    def __init__(self, shm, is_owner: bool):
+        self._shm = shm
+        self.is_owner = is_owner
+        self.name = shm.name
+        self._header = np.ndarray((1,), dtype=_HEADER, buffer=shm.buf)
+        if not is_owner and int(self._header['magic'][0]) != _MAGIC:
+            self._header = None
+            raise ValueError(f"shared memory '{shm.name}' is not a frame ring")
+        self.slots = int(self._header['slots'][0])
+        self.slot_bytes = int(self._header['slot_bytes'][0])
+        slots_off, data_off, stride, _ = _layout(self.slots, self.slot_bytes)
+        self._slots = np.ndarray((self.slots,), dtype=_SLOT, buffer=shm.buf, offset=slots_off)
+        self._data = np.ndarray((self.slots, stride), dtype=np.uint8, buffer=shm.buf, offset=data_off)
+        self.generation = int(self._header['generation'][0])
+
+    @classmethod
+    def create(cls, name: str = FRAME_RING_NAME, slots: int = DEFAULT_SLOTS,
+               slot_bytes: int = DEFAULT_SLOT_BYTES, owner: str = '') -> 'FrameRing':
+        """Create and own the ring. Raises FileExistsError if a live writer already has it."""
+        size = _layout(slots, slot_bytes)[3]
+        try:
+            shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+        except FileExistsError:
+            # Left behind by a writer that crashed (POSIX keeps it until unlinked)?
+            try:
+                old = cls.attach(name)
+            except (FileNotFoundError, ValueError):
+                old = None
+            if old is not None:
+                alive, info = old.alive(), old.info()
+                old.close()
+                if alive:
+                    raise FileExistsError(f"frame ring '{name}' is published by {info['owner']} (pid {info['pid']})")
+            stale = _attach_shm(name)
+            stale.close()
+            stale.unlink()
+            shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+        header = np.ndarray((1,), dtype=_HEADER, buffer=shm.buf)
+        header['slots'] = slots
+        header['slot_bytes'] = slot_bytes
+        header['latest'] = 0
+        header['heartbeat'] = time.time()
+        header['generation'] = new_generation()
+        header['pid'] = os.getpid()
+        header['closed'] = 0
+        header['owner'] = owner.encode('utf-8')[:32]
+        header['magic'] = _MAGIC
+        del header
+        return cls(shm, is_owner=True)
+
+    @classmethod
+    def attach(cls, name: str = FRAME_RING_NAME) -> 'FrameRing':
+        """Attach to an existing ring as a reader. Raises FileNotFoundError if there is none."""
+        return cls(_attach_shm(name), is_owner=False)
+
+    # ---- writer side ----
+
+    def publish(self, frame: np.ndarray, timestamp: Optional[float] = None) -> int:
+        """Copy frame into the next slot and make it the latest. Returns its sequence number."""
+        if frame.ndim not in (2, 3):
+            raise ValueError('frame must be 2-D or 3-D')
+        if frame.nbytes > self.slot_bytes:
+            raise ValueError(f'frame of {frame.nbytes} bytes does not fit a {self.slot_bytes} byte slot')
+        seq = int(self._header['latest'][0]) + 1
+        i = seq % self.slots
+        slots = self._slots
+        slots['seq_begin'][i] = seq
+        dst = self._data[i, :frame.nbytes].view(frame.dtype).reshape(frame.shape)
+        np.copyto(dst, frame)
+        slots['height'][i] = frame.shape[0]
+        slots['width'][i] = frame.shape[1]
+        slots['channels'][i] = frame.shape[2] if frame.ndim == 3 else 0
+        slots['dtype'][i] = frame.dtype.str.encode('ascii')
+        now = time.time()
+        slots['timestamp'][i] = now if timestamp is None else timestamp
+        slots['seq_end'][i] = seq
+        self._header['latest'] = seq
+        self._header['heartbeat'] = now
+        return seq
+
+    def beat(self):
+        """Keep the ring alive while no frames are coming (e.g. camera reconnecting)."""
+        self._header['heartbeat'] = time.time()
+
+    # ---- reader side ----
+
+    @property
+    def latest_seq(self) -> int:
+        return int(self._header['latest'][0])
+
+    def latest(self, copy: bool = False, max_age: Optional[float] = None) -> Optional[RingFrame]:
+        """Newest complete frame, or None if there is none (or it is older than max_age)."""
+        slots = self._slots
+        for _ in range(3):
+            seq = int(self._header['latest'][0])
+            if seq == 0:
+                return None
+            i = seq % self.slots
+            if int(slots['seq_end'][i]) != seq:
+                continue
+            ts = float(slots['timestamp'][i])
+            h, w, c = int(slots['height'][i]), int(slots['width'][i]), int(slots['channels'][i])
+            dtype = np.dtype(slots['dtype'][i].decode('ascii'))
+            shape = (h, w, c) if c else (h, w)
+            nbytes = h * w * max(c, 1) * dtype.itemsize
+            frame = self._data[i, :nbytes].view(dtype).reshape(shape)
+            if copy:
+                frame = frame.copy()
+            if int(slots['seq_begin'][i]) != seq:
+                continue  # overwritten while we were reading it
+            if max_age is not None and time.time() - ts > max_age:
+                return None
+            return RingFrame(frame, seq, ts, self, i)
+        return None
+
+    def wait_next(self, after_seq: int, timeout: float = 1.0, copy: bool = False,
+                  poll: float = 0.002) -> Optional[RingFrame]:
+        """Block until a frame newer than after_seq is published (or timeout)."""
+        deadline = time.monotonic() + timeout
+        while True:
+            if self.latest_seq > after_seq:
+                frame = self.latest(copy=copy)
+                if frame is not None:
+                    return frame
+            if time.monotonic() >= deadline:
+                return None
+            time.sleep(poll)
+
+    def alive(self, max_age: float = STALE_AFTER) -> bool:
+        """True if the writer has not closed the ring and beat within max_age seconds."""
+        h = self._header
+        return not int(h['closed'][0]) and time.time() - float(h['heartbeat'][0]) <= max_age
+
+    def info(self) -> Dict:
+        h = self._header
+        return {'name': self.name, 'owner': h['owner'][0].decode('utf-8', 'replace'), 'pid': int(h['pid'][0]),
+                'latest': int(h['latest'][0]), 'generation': self.generation, 'heartbeat': float(h['heartbeat'][0]),
+                'slots': self.slots, 'slot_bytes': self.slot_bytes}
+
+    def close(self):
+        """Detach; the owner also marks the ring closed and unlinks it."""
+        if self._header is None:
+            return
+        if self.is_owner:
+            self._header['closed'] = 1
+        self._header = self._slots = self._data = None
+        try:
+            self._shm.close()
+        except BufferError:
+            # A caller still holds a zero-copy view; the mapping goes away with it.
+            pass
+        if self.is_owner:
+            try:
+                self._shm.unlink()
+            except FileNotFoundError:
+                pass
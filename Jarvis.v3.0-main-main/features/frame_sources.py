@@ -0,0 +1,191 @@
+"""Frame sources that stand in for a webcam.
+
+Each source has the subset of the `cv2.VideoCapture` interface that
+CameraManager uses (isOpened, read, get, set, release), so the capture and
+analysis pipeline can run from a video file, a folder of images or a
+synthetic NumPy generator on machines without a camera (CI, headless
+Linux), e.g. for tools/bench_camera_pipeline.py.
+
+    camera.set_frame_source('synthetic:1280x720@30')
+    camera.set_frame_source('clips/desk.mp4')
+    JARVIS_CAMERA_SOURCE=frames/ python jarvis_gui.py
+
+Sources pace themselves to their fps (realtime=True) like a real device;
+with realtime=False they return frames as fast as they can be produced.
+"""
+import glob
+import os
+import re
+import time
+from typing import Optional
+
+import cv2
+import numpy as np
+
+
+class FrameSource:
+    """Base class: paced read() loop plus the VideoCapture-style accessors."""
+
+    def __init__(self, width: int, height: int, fps: float, realtime: bool = True):
+        self.width = width
+        self.height = height
+        self.fps = fps
+        self.realtime = realtime
+        self.frames_read = 0
+        self.dropped = 0  # frames skipped because read() was called late
+        self._opened = True
+        self._next_due = None
+
+    def isOpened(self) -> bool:
+        return self._opened
+
+    def release(self):
+        self._opened = False
+
+    def get(self, prop) -> float:
+        if prop == cv2.CAP_PROP_FRAME_WIDTH:
+            return float(self.width)
+        if prop == cv2.CAP_PROP_FRAME_HEIGHT:
+            return float(self.height)
+        if prop == cv2.CAP_PROP_FPS:
+            return float(self.fps)
+        return 0.0
+
+    def set(self, prop, value) -> bool:
+        return False
+
+    def _pace(self):
+        if not self.realtime or self.fps <= 0:
+            return
+        interval = 1.0 / self.fps
+        now = time.monotonic()
+        if self._next_due is None:
+            self._next_due = now
+        wait = self._next_due - now
+        if wait > 0:
+            time.sleep(wait)
+        else:
+            # The reader fell behind: like a real camera, skip the frames it
+            # missed instead of handing them out late.
+            missed = int(-wait / interval)
+            if missed:
+                self.dropped += missed
+                self._next_due += missed * interval
+        self._next_due += interval
+
+    def read(self):
+        if not self._opened:
+            return False, None
+        self._pace()
+        frame = self._next_frame()
+        if frame is None:
+            return False, None
+        self.frames_read += 1
+        return True, frame
+
+    def _next_frame(self) -> Optional[np.ndarray]:
+        raise NotImplementedError
+
+
+class SyntheticSource(FrameSource):
+    """Textured background with a bright square moving across it, plus sensor noise."""
+
+    def __init__(self, width: int = 640, height: int = 480, fps: float = 30.0, realtime: bool = True,
+                 box: int = 96, speed: float = 4.0, noise: bool = True, frames: Optional[int] = None,
+                 seed: int = 0):
+        super().__init__(width, height, fps, realtime)
+        rng = np.random.default_rng(seed)
+        self._background = rng.integers(60, 140, (height, width, 3), dtype=np.uint8)
+        self._patch = rng.integers(150, 255, (box, box, 3), dtype=np.uint8)
+        self._noise = [rng.integers(0, 6, (height, width, 3), dtype=np.uint8) for _ in range(4)] if noise else None
+        self.box = box
+        self.speed = speed
+        self.limit = frames
+        self._i = 0
+
+    def _next_frame(self):
+        if self.limit is not None and self._i >= self.limit:
+            return None
+        i = self._i
+        self._i += 1
+        frame = self._background.copy()
+        if self._noise is not None:
+            frame += self._noise[i % len(self._noise)]
+        span_x = max(1, self.width - self.box)
+        x = int(i * self.speed) % (2 * span_x)
+        x = x if x < span_x else 2 * span_x - x
+        y = (self.height - self.box) // 2
+        frame[y:y + self.box, x:x + self.box] = self._patch
+        return frame
+
+
+class VideoFileSource(FrameSource):
+    """Frames from a video file, optionally looping at the end."""
+
+    def __init__(self, path: str, loop: bool = True, realtime: bool = True):
+        self.path = path
+        self.loop = loop
+        self._cap = cv2.VideoCapture(path)
+        fps = self._cap.get(cv2.CAP_PROP_FPS) or 30.0
+        super().__init__(int(self._cap.get(cv2.CAP_PROP_FRAME_WIDTH)),
+                         int(self._cap.get(cv2.CAP_PROP_FRAME_HEIGHT)), fps, realtime)
+        self._opened = self._cap.isOpened()
+
+    def _next_frame(self):
+        ret, frame = self._cap.read()
+        if not ret and self.loop:
+            self._cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
+            ret, frame = self._cap.read()
+        return frame if ret else None
+
+    def release(self):
+        super().release()
+        self._cap.release()
+
+
+class ImageSequenceSource(FrameSource):
+    """Frames from image files (a directory or a glob pattern), in name order."""
+
+    def __init__(self, pattern: str, fps: float = 30.0, loop: bool = True, realtime: bool = True,
+                 preload: bool = True):
+        if os.path.isdir(pattern):
+            pattern = os.path.join(pattern, '*')
+        exts = ('.jpg', '.jpeg', '.png', '.bmp')
+        self.paths = sorted(p for p in glob.glob(pattern) if p.lower().endswith(exts))
+        self.loop = loop
+        # Decoding is not what the benchmark measures, so decode up front by default.
+        self._frames = [cv2.imread(p) for p in self.paths] if preload else None
+        first = self._frames[0] if self._frames else (cv2.imread(self.paths[0]) if self.paths else None)
+        h, w = first.shape[:2] if first is not None else (0, 0)
+        super().__init__(w, h, fps, realtime)
+        self._opened = bool(self.paths)
+        self._i = 0
+
+    def _next_frame(self):
+        if self._i >= len(self.paths):
+            if not self.loop or not self.paths:
+                return None
+            self._i = 0
+        i = self._i
+        self._i += 1
+        return self._frames[i].copy() if self._frames is not None else cv2.imread(self.paths[i])
+
+
+_SYNTHETIC_RE = re.compile(r'^synthetic(?::(\d+)x(\d+))?(?:@(\d+(?:\.\d+)?))?$')
+
+
+def make_source(spec: str, realtime: bool = True) -> FrameSource:
+    """Build a source from a spec string.
+
+    'synthetic', 'synthetic:WxH', 'synthetic:WxH@FPS', a video file path,
+    an image directory, or a glob pattern of images.
+    """
+    m = _SYNTHETIC_RE.match(spec.strip())
+    if m:
+        w, h, fps = m.groups()
+        return SyntheticSource(int(w or 640), int(h or 480), float(fps or 30), realtime=realtime)
+    if os.path.isdir(spec) or any(c in spec for c in '*?['):
+        return ImageSequenceSource(spec, realtime=realtime)
+    if os.path.exists(spec):
+        return VideoFileSource(spec, realtime=realtime)
+    raise ValueError(f"Unknown frame source: {spec}")
@@ -2,7 +2,16 @@ import csv
 import os
 from datetime import datetime
 
-LOG_FILE = os.path.join(os.path.dirname(__file__), '..', '..', 'mood_log.csv')
+from features.storage import data_path, migrate_existing
+
+LOG_FILENAME = 'mood_log.csv'
+
+
+def _log_file() -> str:
+    """jarvis_data/mood_log.csv (a log left in the working directory is moved there)."""
+    migrate_existing([LOG_FILENAME])
+    return data_path(LOG_FILENAME)
+
 
 def log_mood(description: str):
     """Append a mood entry to mood_log.csv. If description contains 'Mood:', extract it."""
@@ -17,9 +26,10 @@ def log_mood(description: str):
         'mood': mood if mood else '',
         'description': description
     }
-    write_header = not os.path.exists(LOG_FILE)
+    log_file = _log_file()
+    write_header = not os.path.exists(log_file)
     try:
-        with open(LOG_FILE, 'a', newline='', encoding='utf-8') as f:
+        with open(log_file, 'a', newline='', encoding='utf-8') as f:
             writer = csv.DictWriter(f, fieldnames=['timestamp','mood','description'])
             if write_header:
                 writer.writeheader()
@@ -30,11 +40,12 @@ def log_mood(description: str):
 
 def read_logs(limit: int = 50):
     """Read last `limit` logs from the CSV."""
-    if not os.path.exists(LOG_FILE):
+    log_file = _log_file()
+    if not os.path.exists(log_file):
         return []
     rows = []
     try:
-        with open(LOG_FILE, 'r', encoding='utf-8') as f:
+        with open(log_file, 'r', encoding='utf-8') as f:
             reader = csv.DictReader(f)
             for r in reader:
                 rows.append(r)
@@ -0,0 +1,269 @@
+"""Mood (facial emotion) stage of the camera pipeline.
+
+Emotion models are far too slow to run on every frame, and the old mood log
+shows why running them often is pointless: the answer is 'neutral' over and
+over. `MoodStage` therefore:
+
+  * only looks at face boxes the analysis thread already found, cropping
+    them from the full-resolution frame,
+  * runs at most `fps` inferences per second, and never queues more than one
+    batch: while a batch is in flight new frames are skipped,
+  * sends all faces of a frame to the model as one batch in a separate
+    process (DeepFace/TensorFlow never run on the GUI or capture threads;
+    deepface versions whose analyze() takes no list get one call per face),
+  * starts that process on the first face and stops it with the camera,
+  * smooths the primary (largest) face's emotion over the last `window`
+    results and publishes to `mood_bus` only when the smoothed mood changes.
+
+    from features.mood_stage import mood_bus
+    mood_bus.subscribe(lambda obs: print(obs.text, obs.data))
+
+Off unless camera_manager.MOOD_ENABLED is set, and needs the optional
+`deepface` package; if deepface is missing, or is installed but fails to
+load in the worker, the stage stays off.
+"""
+import importlib.util
+import multiprocessing
+import threading
+import time
+from collections import Counter, deque
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import List, Optional, Sequence, Tuple
+
+import cv2
+import numpy as np
+
+from features.observation_bus import ObservationBus
+
+MOOD_FPS = 2.0
+MOOD_WINDOW = 5          # recent results the smoothed mood is voted from
+MOOD_MIN_SHARE = 0.6     # share of the window a new mood needs to take over
+CROP_SIZE = 224
+CROP_MARGIN = 0.2        # extra border around the face box, as a share of its size
+MIN_FACE = 32            # px (full-resolution); smaller faces are not worth classifying
+ABSENT_AFTER = 5.0       # seconds without faces before the mood becomes 'none'
+
+# Change-only mood events: Observation(text=mood, data={'confidence', 'faces', 'moods'}).
+mood_bus = ObservationBus(debounce=0.0, min_interval=0.0)
+
+
+def mood_available() -> bool:
+    """True if deepface is installed (checked without importing it here)."""
+    try:
+        return importlib.util.find_spec('deepface') is not None
+    except Exception:
+        return False
+
+
+# ---------- Worker process ----------
+
+_deepface = None
+_batched = True     # False once analyze() turned out not to take a list of images
+
+
+def _init_worker():
+    global _deepface
+    try:
+        from deepface import DeepFace
+        _deepface = DeepFace
+    except Exception as e:
+        print(f"[mood] deepface unavailable in worker: {e}")
+        _deepface = None
+
+
+def _emotion(r) -> Tuple[str, float]:
+    r = r[0] if isinstance(r, list) else r
+    mood = r['dominant_emotion']
+    return mood, float(r['emotion'][mood]) / 100.0
+
+
+def _analyze_crops(crops: List[np.ndarray]) -> Optional[List[Optional[Tuple[str, float]]]]:
+    """(dominant emotion, confidence 0..1) per face crop; None where it failed.
+
+    Returns None (not a list) if deepface could not be imported in the worker.
+    """
+    global _batched
+    if _deepface is None:
+        return None
+    if _batched and len(crops) > 1:
+        # Recent deepface takes a list of images and returns one result list per image.
+        try:
+            rs = _deepface.analyze(list(crops), actions=['emotion'], enforce_detection=False,
+                                   detector_backend='skip', silent=True)
+            if isinstance(rs, list) and len(rs) == len(crops) and all(isinstance(r, list) for r in rs):
+                return [_emotion(r) if r else None for r in rs]
+        except Exception:
+            pass
+        _batched = False
+    out = []
+    for crop in crops:
+        try:
+            out.append(_emotion(_deepface.analyze(crop, actions=['emotion'], enforce_detection=False,
+                                                  detector_backend='skip', silent=True)))
+        except Exception:
+            out.append(None)
+    return out
+
+
+# ---------- Stage ----------
+
+class MoodStage:
+    def __init__(self, fps: float = MOOD_FPS, window: int = MOOD_WINDOW, min_share: float = MOOD_MIN_SHARE,
+                 bus: ObservationBus = mood_bus, workers: int = 1):
+        self.fps = fps
+        self.min_share = min_share
+        self.bus = bus
+        self.workers = workers
+        self._pool = None       # started on the first face, see _ensure_pool()
+        self._lock = threading.Lock()
+        self._in_flight = False
+        self._broken = False
+        self._closed = False
+        self._next_due = 0.0
+        self._last_face = time.monotonic()
+        self._window = deque(maxlen=window)
+        self.mood: Optional[str] = None
+        self.stats = {'offered': 0, 'submitted': 0, 'busy': 0, 'rate_limited': 0, 'crops': 0,
+                      'results': 0, 'changes': 0, 'infer_ms': 0.0}
+
+    def offer(self, bundle, faces: Sequence[Tuple[int, int, int, int]], scale: float = 1.0,
+              now: Optional[float] = None) -> bool:
+        """Hand over a frame bundle and its face boxes (scaled by `scale` to full size).
+
+        Never blocks. Returns True if the faces were sent for inference.
+        """
+        now = time.monotonic() if now is None else now
+        self.stats['offered'] += 1
+        if self._broken or self._closed:
+            return False
+        if not len(faces):
+            with self._lock:
+                if now - self._last_face < ABSENT_AFTER or self.mood in (None, 'none'):
+                    return False
+                self._window.clear()
+                self.mood = 'none'
+            self._publish('none', 0.0, 0, [])
+            return False
+        with self._lock:
+            self._last_face = now
+            if self._in_flight:
+                self.stats['busy'] += 1
+                return False
+            if now < self._next_due:
+                self.stats['rate_limited'] += 1
+                return False
+            crops = self._crops(bundle.full, faces, scale)
+            if not crops:
+                return False
+            self._in_flight = True
+            self._next_due = now + 1.0 / self.fps
+        self.stats['submitted'] += 1
+        self.stats['crops'] += len(crops)
+        started = time.monotonic()
+        try:
+            future = self._ensure_pool().submit(_analyze_crops, crops)
+        except Exception as e:
+            self._fail(e)
+            return False
+        future.add_done_callback(lambda f: self._on_result(f, started))
+        return True
+
+    def _ensure_pool(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("mood stage is closed")
+            if self._pool is None:
+                # spawn: forking a process that already runs capture threads is unsafe
+                self._pool = ProcessPoolExecutor(max_workers=self.workers, initializer=_init_worker,
+                                                 mp_context=multiprocessing.get_context('spawn'))
+            return self._pool
+
+    def _crops(self, frame: np.ndarray, faces, scale: float) -> List[np.ndarray]:
+        """Face crops, largest face first."""
+        h, w = frame.shape[:2]
+        crops = []
+        for x, y, bw, bh in sorted(faces, key=lambda b: b[2] * b[3], reverse=True):
+            x, y, bw, bh = x * scale, y * scale, bw * scale, bh * scale
+            if bw < MIN_FACE or bh < MIN_FACE:
+                continue
+            mx, my = bw * CROP_MARGIN, bh * CROP_MARGIN
+            x1, y1 = max(0, int(x - mx)), max(0, int(y - my))
+            x2, y2 = min(w, int(x + bw + mx)), min(h, int(y + bh + my))
+            if x2 > x1 and y2 > y1:
+                crops.append(cv2.resize(frame[y1:y2, x1:x2], (CROP_SIZE, CROP_SIZE), interpolation=cv2.INTER_AREA))
+        return crops
+
+    def _on_result(self, future, started: float):
+        with self._lock:
+            self._in_flight = False
+        if future.cancelled():
+            return
+        try:
+            results = future.result()
+        except BrokenProcessPool as e:
+            self._fail(e)
+            return
+        except Exception as e:
+            print(f"[mood] inference failed: {e}")
+            return
+        if results is None:
+            # deepface is installed but does not load (e.g. a broken TensorFlow):
+            # turn off for good rather than respawn the worker on every start.
+            print("[mood] deepface could not be loaded in the worker; mood stage disabled")
+            self.close()
+            return
+        self.stats['results'] += 1
+        self.stats['infer_ms'] = (time.monotonic() - started) * 1000.0
+        moods = [r[0] for r in results if r is not None]
+        if not moods or results[0] is None:
+            return
+        with self._lock:
+            self._window.append(results[0][0])
+            mood, votes = Counter(self._window).most_common(1)[0]
+            if mood == self.mood or votes < self.min_share * len(self._window):
+                return
+            self.mood = mood
+        self._publish(mood, results[0][1], len(results), moods)
+
+    def _fail(self, error: Exception):
+        """The worker process died (or could not start): turn the stage off."""
+        with self._lock:
+            self._in_flight = False
+            if self._broken:
+                return
+            self._broken = True
+        print(f"[mood] mood stage disabled: {error}")
+
+    def _publish(self, mood: str, confidence: float, faces: int, moods: List[str]):
+        self.stats['changes'] += 1
+        self.bus.publish(mood, {'confidence': round(confidence, 3), 'faces': faces, 'moods': moods},
+                         immediate=True)
+
+    def stop(self):
+        """Shut the worker process down; the next offer() starts a new one."""
+        with self._lock:
+            pool, self._pool = self._pool, None
+            self._in_flight = False
+            self._broken = False
+        if pool is not None:
+            pool.shutdown(wait=False, cancel_futures=True)
+
+    def close(self):
+        with self._lock:
+            self._closed = True
+        self.stop()
+
+
+_log_attached = False
+
+
+def attach_mood_log():
+    """Append mood changes (not every inference) to the mood log CSV (idempotent)."""
+    global _log_attached
+    if _log_attached:
+        return
+    _log_attached = True
+    from features.mood_logger.mood_logger import log_mood
+    mood_bus.subscribe(lambda obs: log_mood(f"Camera me {obs.data.get('faces', 0) if obs.data else 0} "
+                                            f"person dikh rahe hain. Mood: {obs.text}"))
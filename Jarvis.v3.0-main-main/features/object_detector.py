@@ -0,0 +1,371 @@
+"""CPU object detection for the camera pipeline (OpenCV DNN, MobileNet-SSD).
+
+One `ObjectDetector` per process loads the network once and serves every
+consumer (take_snapshot, the HUD) from a single worker thread:
+
+  * requests for the same frame share one inference, and results are cached
+    per frame: (generation, seq), since seq restarts with every frame ring,
+  * requests arriving together are run as one batch (blobFromImages),
+  * inference is paced to `cpu_budget` (fraction of one core); callers that
+    do not wait get the newest result available instead of queueing work.
+
+The model is read from MODEL_DIR (override with JARVIS_MODEL_DIR):
+
+  MobileNetSSD_deploy.prototxt + MobileNetSSD_deploy.caffemodel   (Caffe, 20 VOC classes)
+  ssd_mobilenet_v2_coco.pbtxt + frozen_inference_graph.pb          (TensorFlow, COCO classes)
+
+Without a model file the detector reports itself unavailable and callers
+carry on without object descriptions.
+
+    dets = detector().detect(frame, priority=True)   # blocking, for one-off snapshots
+    dets = detector().request(bundle.full, bundle.seq, bundle.generation)  # non-blocking, per-frame UI
+"""
+import os
+import threading
+import time
+from collections import Counter, OrderedDict
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+
+MODEL_DIR = os.environ.get('JARVIS_MODEL_DIR') or os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'models')
+CONFIDENCE = 0.5
+INPUT_SIZE = 300
+MAX_BATCH = 4
+BATCH_WINDOW = 0.02   # seconds to wait for more requests before running a batch
+CPU_BUDGET = 0.25     # share of one core inference may use on average
+CACHE_SIZE = 16       # results kept, keyed by (generation, seq) of the frame
+
+VOC_NAMES = ['background', 'aeroplane', 'bicycle', 'bird', 'boat', 'bottle', 'bus', 'car', 'cat',
+             'chair', 'cow', 'diningtable', 'dog', 'horse', 'motorbike', 'person', 'pottedplant',
+             'sheep', 'sofa', 'train', 'tvmonitor']
+
+COCO_NAMES = ['person', 'bicycle', 'car', 'motorcycle', 'airplane', 'bus', 'train', 'truck', 'boat',
+              'traffic light', 'fire hydrant', 'stop sign', 'parking meter', 'bench', 'bird', 'cat',
+              'dog', 'horse', 'sheep', 'cow', 'elephant', 'bear', 'zebra', 'giraffe', 'backpack',
+              'umbrella', 'handbag', 'tie', 'suitcase', 'frisbee', 'skis', 'snowboard', 'sports ball',
+              'kite', 'baseball bat', 'baseball glove', 'skateboard', 'surfboard', 'tennis racket',
+              'bottle', 'wine glass', 'cup', 'fork', 'knife', 'spoon', 'bowl', 'banana', 'apple',
+              'sandwich', 'orange', 'broccoli', 'carrot', 'hot dog', 'pizza', 'donut', 'cake', 'chair',
+              'couch', 'potted plant', 'bed', 'dining table', 'toilet', 'tv', 'laptop', 'mouse',
+              'remote', 'keyboard', 'cell phone', 'microwave', 'oven', 'toaster', 'sink', 'refrigerator',
+              'book', 'clock', 'vase', 'scissors', 'teddy bear', 'hair drier', 'toothbrush']
+
+# TensorFlow COCO models number the 80 classes 1..90 with gaps.
+_COCO_UNUSED_IDS = {12, 26, 29, 30, 45, 66, 68, 69, 71, 83}
+COCO_LABELS = dict(zip([i for i in range(1, 91) if i not in _COCO_UNUSED_IDS], COCO_NAMES))
+
+# (framework, config file, weights file, class id -> name, blob scale, blob mean, swapRB)
+MODELS = [
+    ('caffe', 'MobileNetSSD_deploy.prototxt', 'MobileNetSSD_deploy.caffemodel',
+     dict(enumerate(VOC_NAMES)), 0.007843, (127.5, 127.5, 127.5), False),
+    ('tensorflow', 'ssd_mobilenet_v2_coco.pbtxt', 'frozen_inference_graph.pb',
+     COCO_LABELS, 1.0, (0, 0, 0), True),
+]
+
+
+class Detection(NamedTuple):
+    label: str
+    confidence: float
+    box: Tuple[int, int, int, int]  # x, y, w, h in frame pixels
+
+
+class _Request:
+    __slots__ = ('key', 'image', 'size', 'priority', 'waiters', 'event', 'result')
+
+    def __init__(self, key, image, size, priority):
+        self.key = key
+        self.image = image    # INPUT_SIZE x INPUT_SIZE BGR copy
+        self.size = size      # (w, h) of the original frame
+        self.priority = priority
+        self.waiters = 0
+        self.event = threading.Event()
+        self.result: Optional[List[Detection]] = None
+
+
+class ObjectDetector:
+    def __init__(self, model_dir: str = MODEL_DIR, confidence: float = CONFIDENCE,
+                 input_size: int = INPUT_SIZE, max_batch: int = MAX_BATCH,
+                 batch_window: float = BATCH_WINDOW, cpu_budget: float = CPU_BUDGET,
+                 cache_size: int = CACHE_SIZE):
+        self.model_dir = model_dir
+        self.confidence = confidence
+        self.input_size = input_size
+        self.max_batch = max_batch
+        self.batch_window = batch_window
+        self.cpu_budget = cpu_budget
+        self.cache_size = cache_size
+        self.model = None          # MODELS entry in use
+        self._cv2 = None
+        self._net = None
+        self._load_lock = threading.Lock()
+        self._load_failed = False
+        self._cond = threading.Condition()
+        self._pending: 'OrderedDict[object, _Request]' = OrderedDict()
+        self._inflight: Dict[object, _Request] = {}   # taken by the worker, not finished
+        self._cache: 'OrderedDict[Tuple[int, int], List[Detection]]' = OrderedDict()
+        self._latest: Optional[List[Detection]] = None
+        self._next_allowed = 0.0
+        self._worker = None
+        self._closed = False
+        self.stats = {'requests': 0, 'cache_hits': 0, 'coalesced': 0, 'superseded': 0,
+                      'batches': 0, 'frames': 0, 'infer_ms': 0.0}
+
+    # ---------- Model ----------
+
+    def available(self) -> bool:
+        """Load the network on first use; False if OpenCV or the model files are missing."""
+        if self._net is not None:
+            return True
+        if self._load_failed:
+            return False
+        with self._load_lock:
+            if self._net is None and not self._load_failed:
+                self._load()
+        return self._net is not None
+
+    def _load(self):
+        try:
+            import cv2
+        except Exception:
+            self._load_failed = True
+            return
+        for model in MODELS:
+            framework, config, weights = model[:3]
+            config, weights = os.path.join(self.model_dir, config), os.path.join(self.model_dir, weights)
+            if not (os.path.exists(config) and os.path.exists(weights)):
+                continue
+            try:
+                if framework == 'caffe':
+                    net = cv2.dnn.readNetFromCaffe(config, weights)
+                else:
+                    net = cv2.dnn.readNetFromTensorflow(weights, config)
+                net.setPreferableBackend(cv2.dnn.DNN_BACKEND_OPENCV)
+                net.setPreferableTarget(cv2.dnn.DNN_TARGET_CPU)
+            except Exception as e:
+                print(f"[object_detector] could not load {os.path.basename(weights)}: {e}")
+                continue
+            self._cv2, self._net, self.model = cv2, net, model
+            return
+        print(f"[object_detector] no MobileNet-SSD model in {self.model_dir}; object detection disabled")
+        self._load_failed = True
+
+    # ---------- Requests ----------
+
+    def cached(self, seq: int, generation: int = 0) -> Optional[List[Detection]]:
+        with self._cond:
+            return self._cache.get((generation, seq))
+
+    def detect(self, frame: np.ndarray, seq: Optional[int] = None, timeout: float = 2.0,
+               priority: bool = False, generation: int = 0) -> Optional[List[Detection]]:
+        """Detections for frame (blocking). None if unavailable or timed out.
+
+        priority=True skips the CPU budget wait (a user-requested snapshot).
+        """
+        req = self._submit(frame, seq, generation, priority, wait=True)
+        if req is None:
+            return None
+        if isinstance(req, list):
+            return req
+        try:
+            req.event.wait(timeout)
+            return req.result
+        finally:
+            with self._cond:
+                req.waiters -= 1
+
+    def request(self, frame: np.ndarray, seq: int, generation: int = 0) -> Optional[List[Detection]]:
+        """Queue frame for detection without waiting.
+
+        Returns the result for the frame if it is cached, otherwise the newest
+        result available (from an earlier frame), or None. Older queued frames
+        nobody waits for are replaced by this one.
+        """
+        req = self._submit(frame, seq, generation, False, wait=False)
+        if isinstance(req, list):
+            return req
+        with self._cond:
+            return self._latest
+
+    def detect_latest(self, camera=None, timeout: float = 2.0,
+                      priority: bool = False) -> Tuple[Optional[int], Optional[List[Detection]]]:
+        """Detect on the newest frame of the camera ring. Returns (seq, detections)."""
+        if camera is None:
+            from features.camera_manager import camera
+        view = camera.latest_view()
+        if view is None:
+            return None, None
+        return view.seq, self.detect(view.frame, view.seq, timeout, priority, view.generation)
+
+    def _submit(self, frame, seq, generation, priority, wait):
+        if frame is None or not self.available():
+            return None
+        key = (generation, seq) if seq is not None else None
+        with self._cond:
+            self.stats['requests'] += 1
+            found = self._find(key, priority, wait)
+            if found is not None:
+                return found
+        # Resize outside the lock so the worker and other callers are not held up.
+        h, w = frame.shape[:2]
+        image = self._cv2.resize(frame, (self.input_size, self.input_size))
+        with self._cond:
+            found = self._find(key, priority, wait)   # queued by someone else meanwhile?
+            if found is not None:
+                return found
+            req = _Request(key if key is not None else object(), image, (w, h), priority)
+            if not wait:
+                for k in [k for k, r in self._pending.items() if r.waiters == 0 and not r.priority]:
+                    del self._pending[k]
+                    self.stats['superseded'] += 1
+            self._pending[req.key] = req
+            if wait:
+                req.waiters += 1
+            self._ensure_worker()
+            self._cond.notify()
+            return req
+
+    def _find(self, key, priority, wait):
+        """Cached result (a list) or already queued request for key; lock held."""
+        if key is None:
+            return None
+        if key in self._cache:
+            self.stats['cache_hits'] += 1
+            self._cache.move_to_end(key)
+            return self._cache[key]
+        req = self._pending.get(key) or self._inflight.get(key)
+        if req is not None:
+            self.stats['coalesced'] += 1
+            req.priority = req.priority or priority
+            if wait:
+                req.waiters += 1
+            self._cond.notify()
+        return req
+
+    def _ensure_worker(self):
+        if self._worker is None or not self._worker.is_alive():
+            self._worker = threading.Thread(target=self._run, name='object_detector', daemon=True)
+            self._worker.start()
+
+    # ---------- Worker ----------
+
+    def _take_batch(self) -> Optional[List[_Request]]:
+        with self._cond:
+            while True:
+                if self._closed:
+                    return None
+                if not self._pending:
+                    self._cond.wait()
+                    continue
+                urgent = any(r.priority for r in self._pending.values())
+                wait = self._next_allowed - time.monotonic()
+                if wait > 0 and not urgent:
+                    self._cond.wait(wait)
+                    continue
+                if len(self._pending) < self.max_batch and self.batch_window > 0:
+                    # Give concurrent consumers a moment to join this batch.
+                    self._cond.wait(self.batch_window)
+                    if self._closed:
+                        return None
+                    if not self._pending:
+                        continue
+                reqs = sorted(self._pending.values(), key=lambda r: not r.priority)[:self.max_batch]
+                for r in reqs:
+                    del self._pending[r.key]
+                    self._inflight[r.key] = r
+                return reqs
+
+    def _run(self):
+        while True:
+            reqs = self._take_batch()
+            if reqs is None:
+                return
+            started = time.monotonic()
+            try:
+                results = self._infer(reqs)
+            except Exception as e:
+                print(f"[object_detector] inference error: {e}")
+                results = [None] * len(reqs)
+            took = time.monotonic() - started
+            with self._cond:
+                self.stats['batches'] += 1
+                self.stats['frames'] += len(reqs)
+                self.stats['infer_ms'] = took * 1000.0
+                if self.cpu_budget > 0:
+                    self._next_allowed = time.monotonic() + took * (1.0 / self.cpu_budget - 1.0)
+                for req, result in zip(reqs, results):
+                    self._inflight.pop(req.key, None)
+                    req.result = result
+                    if result is not None:
+                        self._latest = result
+                        if isinstance(req.key, tuple):
+                            self._cache[req.key] = result
+                while len(self._cache) > self.cache_size:
+                    self._cache.popitem(last=False)
+            for req in reqs:
+                req.event.set()
+
+    def _infer(self, reqs: List[_Request]) -> List[List[Detection]]:
+        cv2 = self._cv2
+        _, _, _, labels, scale, mean, swap_rb = self.model
+        size = (self.input_size, self.input_size)
+        if len(reqs) > 1:
+            try:
+                blob = cv2.dnn.blobFromImages([r.image for r in reqs], scale, size, mean, swap_rb)
+                self._net.setInput(blob)
+                return self._parse(self._net.forward(), reqs, labels)
+            except cv2.error as e:
+                # Some graphs only accept batch 1: stop batching.
+                print(f"[object_detector] batched inference failed, falling back to single frames: {e}")
+                self.max_batch = 1
+        out = []
+        for r in reqs:
+            self._net.setInput(cv2.dnn.blobFromImage(r.image, scale, size, mean, swap_rb))
+            out.extend(self._parse(self._net.forward(), [r], labels))
+        return out
+
+    def _parse(self, output: np.ndarray, reqs: List[_Request], labels: Dict[int, str]) -> List[List[Detection]]:
+        """SSD DetectionOutput rows: [image_id, class_id, confidence, x1, y1, x2, y2] (normalized)."""
+        rows = output.reshape(-1, 7)
+        rows = rows[rows[:, 2] >= self.confidence]
+        out = [[] for _ in reqs]
+        for image_id, class_id, conf, x1, y1, x2, y2 in rows:
+            i = int(image_id)
+            label = labels.get(int(class_id))
+            if not 0 <= i < len(reqs) or label is None or label == 'background':
+                continue
+            w, h = reqs[i].size
+            x1, y1 = max(0, int(x1 * w)), max(0, int(y1 * h))
+            x2, y2 = min(w, int(x2 * w)), min(h, int(y2 * h))
+            if x2 > x1 and y2 > y1:
+                out[i].append(Detection(label, float(conf), (x1, y1, x2 - x1, y2 - y1)))
+        return out
+
+    def close(self):
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+
+
+def describe_objects(detections: List[Detection], limit: int = 5) -> str:
+    """'2 chair, laptop aur cup' style summary, most frequent first."""
+    counts = Counter(d.label for d in detections).most_common(limit)
+    parts = [f"{n} {label}" if n > 1 else label for label, n in counts]
+    if len(parts) > 1:
+        return ", ".join(parts[:-1]) + " aur " + parts[-1]
+    return parts[0] if parts else ""
+
+
+_detector: Optional[ObjectDetector] = None
+_detector_lock = threading.Lock()
+
+
+def detector() -> ObjectDetector:
+    """Process-wide detector (the network is loaded once, on first use)."""
+    global _detector
+    if _detector is None:
+        with _detector_lock:
+            if _detector is None:
+                _detector = ObjectDetector()
+    return _detector
@@ -0,0 +1,230 @@
+"""In-process bus for camera scene descriptions.
+
+The camera analysis produces a description several times per second, but
+the scene rarely changes that often. `ObservationBus.publish` only emits
+when the description actually changes, and only after the new one has held
+for `debounce` seconds (so a face count flickering 1 -> 0 -> 1 for a frame
+or two is ignored). At most one change is emitted per `min_interval`. A
+change still held back when publishing stops is emitted by a timer once
+its wait is over, so the last change is never stuck behind the debounce.
+
+Subscribers are plain callbacks (called on the publishing thread) or
+asyncio queues fed thread-safely into their event loop:
+
+    q = bus.subscribe_queue()          # inside a running loop
+    obs = await q.get()                # Observation(text, data, timestamp, previous)
+
+`camera_view.txt` is just one optional subscriber: `attach_camera_view_file()`
+adds a `FileSink` that writes changes at most once per `min_interval`.
+"""
+import asyncio
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, List, NamedTuple, Optional
+
+from features.storage import data_path
+
+
+class Observation(NamedTuple):
+    text: str
+    data: Optional[Dict[str, Any]]
+    timestamp: float
+    previous: Optional[str]
+
+
+class ObservationBus:
+    """Change-only, debounced fan-out of scene descriptions."""
+
+    def __init__(self, debounce: float = 1.0, min_interval: float = 0.5):
+        self.debounce = debounce
+        self.min_interval = min_interval
+        self._lock = threading.Lock()
+        self._callbacks: List[Callable[[Observation], None]] = []
+        self._queues: List[tuple] = []
+        self._current: Optional[Observation] = None
+        self._pending: Optional[str] = None
+        self._pending_data: Optional[Dict[str, Any]] = None
+        self._pending_since = 0.0
+        self._timer: Optional[threading.Timer] = None
+        self._last_emit = 0.0
+        self.stats = {'published': 0, 'emitted': 0, 'suppressed': 0}
+
+    @property
+    def current(self) -> Optional[Observation]:
+        return self._current
+
+    def subscribe(self, callback: Callable[[Observation], None]) -> Callable[[], None]:
+        """Call callback(observation) on every change. Returns an unsubscribe function."""
+        with self._lock:
+            self._callbacks.append(callback)
+
+        def unsubscribe():
+            with self._lock:
+                if callback in self._callbacks:
+                    self._callbacks.remove(callback)
+        return unsubscribe
+
+    def subscribe_queue(self, maxsize: int = 16, loop: Optional[asyncio.AbstractEventLoop] = None) -> asyncio.Queue:
+        """asyncio.Queue receiving changes in loop (default: the running loop).
+
+        When the consumer falls behind, the oldest queued change is dropped.
+        """
+        loop = loop or asyncio.get_running_loop()
+        q: asyncio.Queue = asyncio.Queue(maxsize)
+        with self._lock:
+            self._queues.append((loop, q))
+        return q
+
+    def unsubscribe_queue(self, q: asyncio.Queue):
+        with self._lock:
+            self._queues = [(l, x) for l, x in self._queues if x is not q]
+
+    def publish(self, text: str, data: Optional[Dict[str, Any]] = None, immediate: bool = False,
+                now: Optional[float] = None) -> bool:
+        """Offer a description. Returns True if it was emitted as a change.
+
+        immediate=True skips debounce and rate limiting (status messages such
+        as "camera initializing" or a snapshot the user asked for).
+        """
+        now = time.time() if now is None else now
+        with self._lock:
+            self.stats['published'] += 1
+            current = self._current.text if self._current else None
+            if text == current:
+                self._pending = None
+                self.stats['suppressed'] += 1
+                return False
+            if not immediate:
+                if text != self._pending:
+                    self._pending, self._pending_since = text, now
+                self._pending_data = data
+                if not self._due(now):
+                    self.stats['suppressed'] += 1
+                    self._schedule_flush(now)
+                    return False
+            obs, callbacks, queues = self._emit(text, data, now)
+        self._deliver(obs, callbacks, queues)
+        return True
+
+    def _due(self, now: float) -> bool:
+        return now - self._pending_since >= self.debounce and now - self._last_emit >= self.min_interval
+
+    def _schedule_flush(self, now: float):
+        """Arm a timer for when the pending change may be emitted. Caller holds the lock."""
+        if self._timer is not None:
+            return
+        due = max(self._pending_since + self.debounce, self._last_emit + self.min_interval)
+        self._timer = threading.Timer(max(0.0, due - now), self._flush_pending)
+        self._timer.daemon = True
+        self._timer.start()
+
+    def _flush_pending(self):
+        """Emit the pending change if it has waited long enough, else wait again."""
+        now = time.time()
+        with self._lock:
+            self._timer = None
+            if self._pending is None:
+                return
+            if not self._due(now):
+                self._schedule_flush(now)
+                return
+            obs, callbacks, queues = self._emit(self._pending, self._pending_data, now)
+        self._deliver(obs, callbacks, queues)
+
+    def _emit(self, text: str, data: Optional[Dict[str, Any]], now: float):
+        """Make text the current observation. Caller holds the lock."""
+        obs = Observation(text, data, now, self._current.text if self._current else None)
+        self._current = obs
+        self._pending = None
+        self._pending_data = None
+        self._last_emit = now
+        self.stats['emitted'] += 1
+        return obs, list(self._callbacks), list(self._queues)
+
+    def _deliver(self, obs: Observation, callbacks, queues):
+        for cb in callbacks:
+            try:
+                cb(obs)
+            except Exception as e:
+                print(f"Observation subscriber error: {str(e)}")
+        for loop, q in queues:
+            try:
+                loop.call_soon_threadsafe(_offer, q, obs)
+            except RuntimeError:
+                # loop closed: forget the queue
+                self.unsubscribe_queue(q)
+
+
+def _offer(q: asyncio.Queue, obs: Observation):
+    if q.full():
+        try:
+            q.get_nowait()
+        except asyncio.QueueEmpty:
+            pass
+    q.put_nowait(obs)
+
+
+class FileSink:
+    """Bus subscriber that mirrors the current description into a text file.
+
+    Writes at most once per min_interval; a change arriving sooner is written
+    when the interval is up, so the file always ends on the latest text.
+    """
+
+    def __init__(self, path: str, min_interval: float = 1.0):
+        self.path = path
+        self.min_interval = min_interval
+        self._lock = threading.Lock()
+        self._text: Optional[str] = None
+        self._written: Optional[str] = None
+        self._last_write = 0.0
+        self._timer: Optional[threading.Timer] = None
+        self.writes = 0
+
+    def __call__(self, obs: Observation):
+        with self._lock:
+            self._text = obs.text
+            if self._timer is not None:
+                return
+            delay = self._last_write + self.min_interval - time.monotonic()
+            if delay > 0:
+                self._timer = threading.Timer(delay, self._flush)
+                self._timer.daemon = True
+                self._timer.start()
+                return
+        self._flush()
+
+    def _flush(self):
+        with self._lock:
+            self._timer = None
+            text = self._text
+            if text is None or text == self._written:
+                return
+            self._last_write = time.monotonic()
+            self._written = text
+            self.writes += 1
+        try:
+            tmp = self.path + '.tmp'
+            with open(tmp, 'w', encoding='utf-8') as f:
+                f.write(text)
+            os.replace(tmp, self.path)
+        except Exception as e:
+            print(f"Failed to write {os.path.basename(self.path)}: {str(e)}")
+
+
+# Process-wide bus used by the camera pipeline.
+bus = ObservationBus()
+
+_camera_view_sink: Optional[FileSink] = None
+_sink_lock = threading.Lock()
+
+
+def attach_camera_view_file(min_interval: float = 1.0) -> FileSink:
+    """Mirror bus changes into jarvis_data/camera_view.txt (idempotent)."""
+    global _camera_view_sink
+    with _sink_lock:
+        if _camera_view_sink is None:
+            _camera_view_sink = FileSink(data_path('camera_view.txt'), min_interval)
+            bus.subscribe(_camera_view_sink)
+    return _camera_view_sink
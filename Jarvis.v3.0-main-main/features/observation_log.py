@@ -0,0 +1,144 @@
+"""Append-only, time-indexed log of camera observations.
+
+Stored in SQLite (jarvis_data/camera_observations.db) rather than a JSON file
+that is re-read and rewritten on every save. Identical consecutive
+observations are run-length encoded: instead of a new row, the open run's
+`end_ts` and `count` are bumped, so a quiet room costs one row per change,
+not one per sample.
+
+    log = ObservationLog()
+    log.append('Camera me 1 person dikh raha hai.', num_faces=1)
+    log.face_stats(since=two_pm, until=three_pm)   # max / average people, time with people
+
+Older `camera_observations.json` history is imported once on first open.
+"""
+import json
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from features.storage import data_path
+
+DB_FILENAME = 'camera_observations.db'
+MAX_RUN_GAP = 60.0   # seconds: a repeat after a longer silence starts a new run
+
+
+class ObservationLog:
+    def __init__(self, path: Optional[str] = None, max_run_gap: float = MAX_RUN_GAP):
+        self.path = path or data_path(DB_FILENAME)
+        self.max_run_gap = max_run_gap
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, timeout=10, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS observations (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                start_ts REAL NOT NULL,
+                end_ts REAL NOT NULL,
+                count INTEGER NOT NULL DEFAULT 1,
+                num_faces INTEGER,
+                description TEXT NOT NULL,
+                data TEXT
+            )
+            """
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_observations_start ON observations(start_ts)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_observations_end ON observations(end_ts)")
+        self._conn.commit()
+        self._last = self._conn.execute(
+            "SELECT id, end_ts, num_faces, description, data FROM observations ORDER BY id DESC LIMIT 1").fetchone()
+        self._import_json(os.path.join(os.path.dirname(self.path), 'camera_observations.json'))
+
+    def append(self, description: str, num_faces: Optional[int] = None, data: Optional[Dict[str, Any]] = None,
+               ts: Optional[float] = None) -> int:
+        """Record an observation. Returns the id of the run it was folded into."""
+        ts = time.time() if ts is None else float(ts)
+        data_json = json.dumps(data, sort_keys=True, ensure_ascii=False) if data else None
+        with self._lock:
+            last = self._last
+            if (last is not None and last[3] == description and last[2] == num_faces and last[4] == data_json
+                    and 0 <= ts - last[1] <= self.max_run_gap):
+                self._conn.execute("UPDATE observations SET end_ts = ?, count = count + 1 WHERE id = ?",
+                                   (ts, last[0]))
+                self._conn.commit()
+                self._last = (last[0], ts, num_faces, description, data_json)
+                return last[0]
+            cur = self._conn.execute(
+                "INSERT INTO observations (start_ts, end_ts, num_faces, description, data) VALUES (?, ?, ?, ?, ?)",
+                (ts, ts, num_faces, description, data_json))
+            self._conn.commit()
+            self._last = (cur.lastrowid, ts, num_faces, description, data_json)
+            return cur.lastrowid
+
+    def _rows(self, sql: str, params: tuple) -> List[Dict[str, Any]]:
+        with self._lock:
+            rows = self._conn.execute(sql, params).fetchall()
+        return [{'id': r[0], 'start_ts': r[1], 'end_ts': r[2], 'count': r[3], 'num_faces': r[4],
+                 'description': r[5], 'data': json.loads(r[6]) if r[6] else None} for r in rows]
+
+    def query(self, since: Optional[float] = None, until: Optional[float] = None,
+              limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Runs overlapping [since, until), oldest first."""
+        since = 0.0 if since is None else float(since)
+        until = float('inf') if until is None else float(until)
+        return self._rows("SELECT id, start_ts, end_ts, count, num_faces, description, data FROM observations "
+                          "WHERE end_ts >= ? AND start_ts < ? ORDER BY start_ts LIMIT ?",
+                          (since, until, -1 if limit is None else int(limit)))
+
+    def recent(self, n: int = 100) -> List[Dict[str, Any]]:
+        """Last n runs, oldest first."""
+        rows = self._rows("SELECT id, start_ts, end_ts, count, num_faces, description, data FROM observations "
+                          "ORDER BY id DESC LIMIT ?", (n,))
+        rows.reverse()
+        return rows
+
+    def face_stats(self, since: float, until: float) -> Dict[str, Any]:
+        """People seen in [since, until): max, time-weighted average, and seconds with anyone in view.
+
+        A run counts from its start until the next run starts (or its own end
+        for the last one), clipped to the range.
+        """
+        runs = self.query(since, until)
+        with self._lock:
+            nxt = self._conn.execute("SELECT MIN(start_ts) FROM observations WHERE start_ts >= ?",
+                                     (until,)).fetchone()[0]
+        weighted = seen = covered = 0.0
+        max_faces = 0
+        for i, run in enumerate(runs):
+            end = runs[i + 1]['start_ts'] if i + 1 < len(runs) else (nxt if nxt is not None else run['end_ts'])
+            end = min(end, run['end_ts'] + self.max_run_gap)
+            span = max(0.0, min(end, until) - max(run['start_ts'], since))
+            faces = run['num_faces'] or 0
+            max_faces = max(max_faces, faces)
+            weighted += faces * span
+            covered += span
+            if faces:
+                seen += span
+        return {'max_faces': max_faces, 'avg_faces': weighted / covered if covered else 0.0,
+                'seconds_with_faces': seen, 'seconds_observed': covered, 'runs': len(runs),
+                'samples': sum(r['count'] for r in runs)}
+
+    def _import_json(self, path: str):
+        if not os.path.exists(path):
+            return
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                old = json.load(f)
+            for obs in old if isinstance(old, list) else []:
+                try:
+                    ts = datetime.strptime(obs['timestamp'], "%Y-%m-%d %H:%M:%S").timestamp()
+                except Exception:
+                    continue
+                self.append(obs.get('description', ''), obs.get('num_faces'), ts=ts)
+            os.replace(path, path + '.imported')
+        except Exception as e:
+            print(f"Failed to import {os.path.basename(path)}: {str(e)}")
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
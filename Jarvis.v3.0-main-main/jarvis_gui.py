@@ -3,7 +3,7 @@
 # Requires: PySide6, psutil, opencv-python, deepface
 # Run: pip install PySide6 psutil opencv-python deepface
 
-import sys, math, random, time, os
+import sys, math, random, time, os, threading
 from datetime import datetime
 try:
     import psutil
@@ -13,8 +13,8 @@ except:
 cv2 = None
 DeepFace = None
 
-from PySide6.QtCore import Qt, QTimer, QRectF, QPointF, QSize
-from PySide6.QtGui import QPainter, QColor, QPen, QFont, QLinearGradient, QRadialGradient, QImage, QPixmap
+from PySide6.QtCore import Qt, QTimer, QEvent, QRectF, QPointF, QSize, QObject, QThread, Signal, Slot
+from PySide6.QtGui import QPainter, QColor, QPen, QFont, QCursor, QGradient, QLinearGradient, QRadialGradient, QImage, QPixmap
 from PySide6.QtWidgets import QApplication, QWidget, QMainWindow, QLabel, QVBoxLayout, QHBoxLayout, QFrame, QSizePolicy, QGridLayout
 
 # ---------- Helpers ----------
@@ -31,6 +31,168 @@ class SectionTitle(QLabel):
         super().__init__(text)
         self.setStyleSheet("color:#CFE7FF; font-weight:600; font-size:10px; letter-spacing:0.5px;")
 
+class CameraWorker(QObject):
+    """Produces display-ready camera frames on its own QThread.
+
+    Reads frames from the shared CameraManager (which may itself be reading a
+    ring published by another process); only if that is unavailable does it
+    open the device directly. Face boxes come from the camera's analysis
+    thread (a tracker of its own only runs when this process does not
+    analyse frames). Object boxes, resizing and the QImage conversion all
+    happen here, and a frame is only handed over once
+    the widget has shown the previous one, so stale frames are dropped
+    instead of queueing up on the GUI thread.
+    """
+    frameReady = Signal(QImage, int)
+    message = Signal(str)
+
+    def __init__(self, size=(320, 240)):
+        super().__init__()
+        self.size = size
+        self.camera = None
+        self.cap = None
+        self.face_tracker = None
+        self.detector = None
+        self.dropped = 0
+        # True from the start so a stop() before run() is not overwritten
+        self._running = True
+        self._shown = threading.Event()
+        self._shown.set()
+
+    def _setup(self):
+        global cv2
+        try:
+            if cv2 is None:
+                import cv2 as _cv2
+                cv2 = _cv2
+        except Exception as e:
+            print(f"[CameraWorker] cv2 import failed: {e}")
+            self.message.emit("OpenCV not installed")
+            return False
+
+        # The GUI owns the camera through the shared CameraManager, which
+        # publishes frames to a shared-memory ring the agent and demos read.
+        try:
+            from features.camera_manager import camera
+            ok, msg = camera.start(owner='gui')
+            print(f"[CameraWorker] {msg}")
+            self.camera = camera if ok else None
+        except Exception as e:
+            print(f"[CameraWorker] camera manager unavailable: {e}")
+            self.camera = None
+        if self.camera is None:
+            self.cap = cv2.VideoCapture(0)
+            if not self.cap.isOpened():
+                self.message.emit("Camera not available")
+                return False
+
+        # Objects come from the shared detector at its CPU budget; the HUD
+        # draws the newest result available and never waits for inference.
+        try:
+            from features.object_detector import detector
+            self.detector = detector() if detector().available() else None
+        except Exception as e:
+            print(f"[CameraWorker] object detector unavailable: {e}")
+        return True
+
+    def _next_bundle(self, last_seq):
+        if self.camera is not None:
+            return self.camera.wait_bundle(last_seq, timeout=0.5)
+        from features.frame_bundle import FrameBundle
+        ret, frame = self.cap.read()
+        if not ret or frame is None:
+            time.sleep(0.1)
+            return None
+        return FrameBundle(frame, last_seq + 1, time.time())
+
+    def _faces(self, bundle):
+        """Face boxes in frame coordinates, from the camera's analysis thread if it runs here."""
+        faces = self.camera.latest_faces() if self.camera is not None else None
+        if faces is not None:
+            return faces
+        if self.face_tracker is None:
+            # Detection only runs when the picture changes; boxes are tracked in between.
+            try:
+                face_cascade = cv2.CascadeClassifier(cv2.data.haarcascades + 'haarcascade_frontalface_default.xml')
+                from features.face_tracking import FaceTracker
+                self.face_tracker = FaceTracker(lambda gray: face_cascade.detectMultiScale(gray, 1.1, 4))
+            except Exception as e:
+                print(f"[CameraWorker] face tracker unavailable: {e}")
+                self.face_tracker = False
+        if not self.face_tracker:
+            return []
+        w, h = self.size
+        sx, sy = bundle.size[0] / w, bundle.size[1] / h
+        return [(int(x*sx), int(y*sy), int(fw*sx), int(fh*sy))
+                for (x, y, fw, fh) in self.face_tracker.update(bundle.resized(w, h, gray=True))]
+
+    def _render(self, bundle):
+        w, h = self.size
+        src_w, src_h = bundle.size
+        objects = self.detector.request(bundle.full, bundle.seq, bundle.generation) if self.detector else None
+        # The bundle's arrays are shared with the analysis thread: draw on a copy.
+        frame = bundle.resized(w, h).copy()
+        for (x, y, fw, fh) in self._faces(bundle):
+            x, y, fw, fh = int(x*w/src_w), int(y*h/src_h), int(fw*w/src_w), int(fh*h/src_h)
+            cv2.rectangle(frame, (x,y), (x+fw,y+fh), (100,220,255), 2)
+        for obj in objects or []:
+            x, y, bw, bh = obj.box
+            x, y, bw, bh = int(x*w/src_w), int(y*h/src_h), int(bw*w/src_w), int(bh*h/src_h)
+            cv2.rectangle(frame, (x,y), (x+bw,y+bh), (255,180,80), 1)
+            cv2.putText(frame, obj.label, (x+2, max(10, y-3)), cv2.FONT_HERSHEY_SIMPLEX, 0.35, (255,180,80), 1)
+        # copy() detaches the image from the numpy buffer before it crosses threads
+        return QImage(frame.data, w, h, 3*w, QImage.Format_BGR888).copy()
+
+    @Slot()
+    def run(self):
+        try:
+            if not self._setup():
+                return
+            last_seq = 0
+            while self._running:
+                try:
+                    bundle = self._next_bundle(last_seq)
+                    if bundle is None or bundle.seq == last_seq:
+                        continue
+                    last_seq = bundle.seq
+                    if not self._shown.is_set():
+                        # The GUI has not painted the previous frame yet: skip this one.
+                        self.dropped += 1
+                        continue
+                    image = self._render(bundle)
+                    self._shown.clear()
+                    self.frameReady.emit(image, bundle.seq)
+                except Exception as e:
+                    print(f"[CameraWorker] frame error: {e}")
+                    time.sleep(0.2)
+        finally:
+            self._teardown()
+
+    def _teardown(self):
+        """Release what _setup() opened; runs on the worker thread, after the last frame."""
+        if self.cap is not None:
+            self.cap.release()
+            self.cap = None
+        if self.camera is not None:
+            try:
+                self.camera.stop(owner='gui')
+            except Exception as e:
+                print(f"[CameraWorker] camera stop failed: {e}")
+            self.camera = None
+
+    def shown(self):
+        """Called by the widget once a frame is on screen (thread-safe)."""
+        self._shown.set()
+
+    def stop(self):
+        self._running = False
+
+
+# Closing the HUD waits this long for the camera worker: normally it is done
+# at once, but one still inside camera.start() first finishes probing.
+CAMERA_STOP_WAIT_MS = 5000
+_busy_workers = []   # (thread, worker) pairs that outlived stop_camera()
+
 class CameraWidget(QFrame):
     def __init__(self):
         super().__init__()
@@ -55,54 +217,58 @@ class CameraWidget(QFrame):
         layout.addWidget(self.title)
         layout.addWidget(self.video_label, 1)
 
-        global cv2
-        try:
-            if cv2 is None:
-                import cv2 as _cv2
-                cv2 = _cv2
-        except Exception as e:
-            print(f"[CameraWidget] cv2 import failed: {e}")
-            cv2 = None
-
-        try:
-            self.capture = cv2.VideoCapture(0) if cv2 else None
-            if cv2:
-                self.face_cascade = cv2.CascadeClassifier(cv2.data.haarcascades + 'haarcascade_frontalface_default.xml')
-            else:
-                self.face_cascade = None
-        except:
-            self.face_cascade = None
-
-        self.timer = QTimer(self)
-        self.timer.timeout.connect(self.update_frame)
-        self.timer.start(30)
-
-    def update_frame(self):
-        if cv2 is None or self.capture is None:
-            return
-        ret, frame = self.capture.read()
-        if not ret:
-            return
-        frame = cv2.resize(frame, (320,240))
-        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-        rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-        if self.face_cascade:
-            faces = self.face_cascade.detectMultiScale(gray, 1.1, 4)
-            for (x,y,w,h) in faces:
-                cv2.rectangle(frame, (x,y), (x+w,y+h), (100,220,255), 2)
-        h, w, ch = frame.shape
-        qt_image = QImage(frame.data, w, h, ch*w, QImage.Format_BGR888)
-        self.video_label.setPixmap(QPixmap.fromImage(qt_image))
+        # Capture, detection and conversion run on the worker thread; this
+        # widget only puts finished images on screen.
+        self.last_seq = 0
+        self.worker_thread = QThread(self)
+        self.worker = CameraWorker()
+        self.worker.moveToThread(self.worker_thread)
+        self.worker_thread.started.connect(self.worker.run)
+        self.worker.frameReady.connect(self.show_frame)
+        self.worker.message.connect(self.video_label.setText)
+        self.worker_thread.start()
+
+    @Slot(QImage, int)
+    def show_frame(self, image, seq):
+        self.last_seq = seq
+        self.video_label.setPixmap(QPixmap.fromImage(image))
+        self.worker.shown()
 
     def stop_camera(self):
-        self.timer.stop()
-        try:
-            if self.capture and self.capture.isOpened():
-                self.capture.release()
-        except:
-            pass
+        # The worker stops the camera itself once run() returns, which can
+        # take until camera.start() finishes probing; tearing it down from
+        # here while the worker is still inside start() would race with it.
+        # Wait a bounded time for that, then leave the worker to finish alone.
+        self.worker.stop()
+        self.worker_thread.quit()
+        if self.worker_thread.wait(CAMERA_STOP_WAIT_MS):
+            return
+        print("[CameraWidget] camera worker still busy; it releases the camera when it returns")
+        # A QThread destroyed while running aborts the process: detach it from
+        # this widget and keep it referenced.
+        self.worker_thread.setParent(None)
+        _busy_workers.append((self.worker_thread, self.worker))
+
+def _layer(size, dpr):
+    """Transparent HiDPI pixmap to pre-render a static layer into."""
+    pm = QPixmap(max(1, int(size.width()*dpr)), max(1, int(size.height()*dpr)))
+    pm.setDevicePixelRatio(dpr)
+    pm.fill(Qt.transparent)
+    return pm
+
+NEON_GRADIENTS = {
+    'rainbow': [(0.0, (30,220,140)), (0.5, (255,200,60)), (1.0, (255,90,80))],
+    'pink': [(0.0, (255,100,220)), (1.0, (200,50,255))],
+    'green': [(0.0, (40,220,120)), (1.0, (20,160,100))],
+    None: [(0.0, (80,200,255)), (1.0, (150,120,255))],
+}
 
 class NeonBar(QWidget):
+    """Labelled percentage bar.
+
+    The card, title and empty trough are painted once into a pixmap (again
+    only on resize); a repaint draws that pixmap, the fill and the value.
+    """
     def __init__(self, title, init=0.0, style='rainbow'):
         super().__init__()
         self.title = title
@@ -114,43 +280,55 @@ class NeonBar(QWidget):
         self.setMinimumHeight(40)  # Reduced height
         self.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Fixed)
         self.style = style
+        self.title_font = QFont("Segoe UI", 9, QFont.Bold)
+        self.value_font = QFont("Consolas", 10, QFont.DemiBold)
+        # Stretches over whatever rect it fills, like the per-paint gradient did.
+        self.grad = QLinearGradient(0, 0, 1, 0)
+        self.grad.setCoordinateMode(QGradient.ObjectBoundingMode)
+        for pos, rgb in NEON_GRADIENTS.get(style, NEON_GRADIENTS[None]):
+            self.grad.setColorAt(pos, QColor(*rgb))
+        self._static = None
     def setValue(self, v):
-        self.value = clamp(float(v), 0.0, 100.0)
+        v = clamp(float(v), 0.0, 100.0)
+        if abs(v - self.value) < 0.05:
+            return
+        self.value = v
         self.update()
-    def paintEvent(self, event):
-        p = QPainter(self)
-        p.setRenderHint(QPainter.Antialiasing)
+    def resizeEvent(self, event):
+        self._static = None
+        super().resizeEvent(event)
+    def _bar_rect(self):
         r = self.rect().adjusted(6,6,-6,-6)
+        return r, QRectF(r.x(), r.y()+16, r.width(), 10)
+    def _build_static(self):
+        pm = _layer(self.size(), self.devicePixelRatioF())
+        p = QPainter(pm)
+        p.setRenderHint(QPainter.Antialiasing)
+        r, bar = self._bar_rect()
         p.setPen(Qt.NoPen)
         p.setBrush(QColor(14,18,24,220))
         p.drawRoundedRect(self.rect(), 8, 8)
         p.setPen(QColor(170,190,210))
-        p.setFont(QFont("Segoe UI", 9, QFont.Bold))
+        p.setFont(self.title_font)
         p.drawText(r.x(), r.y()-2, r.width(), 16, Qt.AlignLeft|Qt.AlignTop, self.title.upper())
-        bar = QRectF(r.x(), r.y()+16, r.width(), 10)
         p.setBrush(QColor(28,36,48,220))
         p.setPen(Qt.NoPen)
         p.drawRoundedRect(bar, 6,6)
-        w = bar.width() * (self.value/100.0)
-        fill = QRectF(bar.x(), bar.y(), w, bar.height())
-        grad = QLinearGradient(fill.topLeft(), fill.topRight())
-        if self.style=='rainbow':
-            grad.setColorAt(0.0, QColor(30,220,140))
-            grad.setColorAt(0.5, QColor(255,200,60))
-            grad.setColorAt(1.0, QColor(255,90,80))
-        elif self.style=='pink':
-            grad.setColorAt(0.0, QColor(255,100,220))
-            grad.setColorAt(1.0, QColor(200,50,255))
-        elif self.style=='green':
-            grad.setColorAt(0.0, QColor(40,220,120))
-            grad.setColorAt(1.0, QColor(20,160,100))
-        else:
-            grad.setColorAt(0.0, QColor(80,200,255))
-            grad.setColorAt(1.0, QColor(150,120,255))
-        p.setBrush(grad)
+        p.end()
+        return pm
+    def paintEvent(self, event):
+        if self._static is None or self._static.devicePixelRatio() != self.devicePixelRatioF():
+            self._static = self._build_static()
+        p = QPainter(self)
+        p.drawPixmap(0, 0, self._static)
+        p.setRenderHint(QPainter.Antialiasing)
+        r, bar = self._bar_rect()
+        fill = QRectF(bar.x(), bar.y(), bar.width() * (self.value/100.0), bar.height())
+        p.setPen(Qt.NoPen)
+        p.setBrush(self.grad)
         p.drawRoundedRect(fill,6,6)
         p.setPen(QColor(230,240,255))
-        p.setFont(QFont("Consolas", 10, QFont.DemiBold))
+        p.setFont(self.value_font)
         txt = f"{int(self.value)}{self.unit if self.unit else '%'}"
         p.drawText(r, Qt.AlignRight|Qt.AlignVCenter, txt)
 
@@ -197,51 +375,95 @@ class ClockCard(QFrame):
         self.timeLbl.setText(now.strftime("%H:%M:%S"))
         self.dateLbl.setText(now.strftime("%A, %d %b %Y"))
 
+# (radius as share of the base radius, pen width, phase offset, colour)
+RINGS = [
+    (1.02, 9.0, 0.00, (80,220,255,220)),
+    (0.86, 6.0, 0.19, (255,160,90,210)),
+    (0.72, 4.0, 0.36, (180,120,255,200)),
+    (0.59, 3.0, 0.54, (100,220,200,200)),
+    (0.46, 2.2, 0.72, (255,110,200,180)),
+]
+
 class AnimatedRings(QWidget):
+    """Spinning rings over a glow, with the title on top.
+
+    The glow and the title are pre-rendered into pixmaps that are rebuilt
+    only on resize; pens are built once (and per frame only while the click
+    effect fades). Only the arcs are drawn per frame.
+    """
     def __init__(self):
         super().__init__()
         self.phase = 0.0
         self.click_boost = 0.0
         self.setMinimumSize(400,400)
         self.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Expanding)
-    def paintEvent(self, event):
-        p = QPainter(self)
-        p.setRenderHint(QPainter.Antialiasing, True)
+        self.title_font = QFont("Segoe UI", 36, QFont.Black)
+        self._pens = [self._pen(col, w) for _, w, _, col in RINGS]
+        self._background = None
+        self._title = None
+        self._last_paint = None
+    def _pen(self, rgba, width):
+        pen = QPen(QColor(*rgba), width)
+        pen.setCapStyle(Qt.RoundCap)
+        return pen
+    def resizeEvent(self, event):
+        self._background = self._title = None
+        super().resizeEvent(event)
+    def _build_layers(self):
+        dpr = self.devicePixelRatioF()
         rect = self.rect()
         cx, cy = rect.center().x(), rect.center().y()
         radius = min(rect.width(), rect.height()) * 0.42
+        self._background = _layer(self.size(), dpr)
+        p = QPainter(self._background)
         bg = QRadialGradient(QPointF(cx,cy), radius*1.8)
         bg.setColorAt(0.0, QColor(10,12,16))
         bg.setColorAt(1.0, QColor(6,8,12,0))
         p.fillRect(rect, bg)
-        rings = [
-            (radius*1.02, 9.0, 0.00, QColor(80,220,255,220)),
-            (radius*0.86, 6.0, 0.19, QColor(255,160,90,210)),
-            (radius*0.72, 4.0, 0.36, QColor(180,120,255,200)),
-            (radius*0.59, 3.0, 0.54, QColor(100,220,200,200)),
-            (radius*0.46, 2.2, 0.72, QColor(255,110,200,180)),
-        ]
-        for r, w, off, col in rings:
-            w += self.click_boost*2  # enlarge on click
-            self._draw_ring(p, QPointF(cx,cy), r, w, off, col)
+        p.end()
+        self._title = _layer(self.size(), dpr)
+        p = QPainter(self._title)
+        p.setRenderHint(QPainter.Antialiasing, True)
         p.setPen(QColor(200,240,255))
-        p.setFont(QFont("Segoe UI", 36, QFont.Black))
+        p.setFont(self.title_font)
         p.drawText(rect, Qt.AlignCenter, "J.A.R.V.I.S")
-        self.click_boost *= 0.92  # fade effect
-
-    def _draw_ring(self, p, center, radius, width, offset, color):
+        p.end()
+    def paintEvent(self, event):
+        if self._background is None or self._background.devicePixelRatio() != self.devicePixelRatioF():
+            self._build_layers()
+        p = QPainter(self)
+        p.drawPixmap(0, 0, self._background)
+        p.setRenderHint(QPainter.Antialiasing, True)
+        rect = self.rect()
+        center = QPointF(rect.center().x(), rect.center().y())
+        radius = min(rect.width(), rect.height()) * 0.42
+        boosted = self.click_boost > 0.05
+        for (share, w, off, col), pen in zip(RINGS, self._pens):
+            if boosted:
+                pen = self._pen(col, w + self.click_boost*2)  # enlarge on click
+            self._draw_ring(p, center, radius*share, off, pen)
+        p.drawPixmap(0, 0, self._title)
+        # fade effect, per elapsed time so it looks the same at any frame rate
+        now = time.monotonic()
+        if boosted and self._last_paint is not None:
+            self.click_boost *= 0.92 ** ((now - self._last_paint) * 60.0)
+        elif not boosted:
+            self.click_boost = 0.0
+        self._last_paint = now
+
+    def _draw_ring(self, p, center, radius, offset, pen):
         base = (self.phase + offset) % 1.0
+        p.setPen(pen)
+        rect = QRectF(center.x()-radius, center.y()-radius, radius*2, radius*2)
         for i in range(2):
             start = (base + i*0.48) * 360.0
             span = 200.0 if i==0 else 120.0
-            pen = QPen(color, width)
-            pen.setCapStyle(Qt.RoundCap)
-            p.setPen(pen)
-            rect = QRectF(center.x()-radius, center.y()-radius, radius*2, radius*2)
             p.drawArc(rect, int(-start*16), int(-span*16))
 
     def mousePressEvent(self, event):
         self.click_boost = 4.0  # trigger click animation
+        self._last_paint = time.monotonic()
+        self.update()
 
 class TitleBar(QFrame):
     def __init__(self, title):
@@ -254,6 +476,16 @@ class TitleBar(QFrame):
         lay.addWidget(lbl)
         lay.addStretch()
 
+# Ring animation rate: full while the HUD has focus, lower while another window
+# has it or neither the app state nor the mouse cursor changed for IDLE_AFTER
+# seconds, stopped while the window is minimized, hidden or not exposed
+# (whether a covered window counts as unexposed depends on the platform).
+ANIM_FPS = 60
+INACTIVE_FPS = 30
+IDLE_FPS = 10
+IDLE_AFTER = 60.0
+RING_SPEED = 0.45   # revolutions per second
+
 class NovaHUD(QMainWindow):
     def __init__(self):
         super().__init__()
@@ -307,17 +539,83 @@ class NovaHUD(QMainWindow):
         body.setRowStretch(0,1); body.setRowStretch(1,1)
 
         # timers
-        self.animTimer = QTimer(self); self.animTimer.timeout.connect(self.animate); self.animTimer.start(16)
+        self.animTimer = QTimer(self); self.animTimer.timeout.connect(self.animate); self.animTimer.start(1000 // ANIM_FPS)
+        self.paceTimer = QTimer(self); self.paceTimer.timeout.connect(self.pace); self.paceTimer.start(500)
         self.statTimer = QTimer(self); self.statTimer.timeout.connect(self.sampleStats); self.statTimer.start(1000)
         self.clockTimer = QTimer(self); self.clockTimer.timeout.connect(self.tick); self.clockTimer.start(1000)
         self.last_bytes = None
+        self.last_anim = time.monotonic()
+        self.last_input = time.monotonic()
+        self.last_cursor = QCursor.pos()
+        self.exposeWatched = None
+        QApplication.instance().applicationStateChanged.connect(self.appStateChanged)
         self.sampleStats()
         self.tick()
 
     def animate(self):
-        self.rings.phase = (self.rings.phase + 0.0075) % 1.0
+        # advance by elapsed time so the speed does not depend on the frame rate
+        now = time.monotonic()
+        dt = min(now - self.last_anim, 0.25)
+        self.last_anim = now
+        self.rings.phase = (self.rings.phase + RING_SPEED * dt) % 1.0
         self.rings.update()
 
+    def anim_fps(self):
+        """Frame rate the rings should run at right now (0 = paused)."""
+        handle = self.windowHandle()
+        if not self.isVisible() or self.isMinimized() or (handle is not None and not handle.isExposed()):
+            return 0
+        if time.monotonic() - self.last_input >= IDLE_AFTER:
+            return IDLE_FPS
+        if not self.isActiveWindow():
+            return INACTIVE_FPS
+        return ANIM_FPS
+
+    def pace(self):
+        # polling the cursor here is cheaper than filtering every input event
+        cursor = QCursor.pos()
+        if cursor != self.last_cursor:
+            self.last_cursor = cursor
+            self.last_input = time.monotonic()
+        fps = self.anim_fps()
+        if not fps:
+            self.animTimer.stop()
+            return
+        interval = 1000 // fps
+        if not self.animTimer.isActive():
+            self.last_anim = time.monotonic()
+            self.animTimer.start(interval)
+        elif self.animTimer.interval() != interval:
+            self.animTimer.setInterval(interval)
+
+    def appStateChanged(self, state):
+        if state == Qt.ApplicationActive:
+            self.last_input = time.monotonic()
+        self.pace()
+
+    def eventFilter(self, obj, event):
+        # installed on this window's QWindow only, for expose changes
+        if event.type() == QEvent.Expose:
+            self.pace()
+        return False
+
+    def changeEvent(self, event):
+        super().changeEvent(event)
+        if event.type() in (QEvent.WindowStateChange, QEvent.ActivationChange):
+            self.pace()
+
+    def showEvent(self, event):
+        super().showEvent(event)
+        handle = self.windowHandle()
+        if handle is not None and handle is not self.exposeWatched:
+            handle.installEventFilter(self)
+            self.exposeWatched = handle
+        self.pace()
+
+    def hideEvent(self, event):
+        super().hideEvent(event)
+        self.pace()
+
     def tick(self):
         self.clock.tick()
 
@@ -351,6 +649,10 @@ class NovaHUD(QMainWindow):
         self.disk.setValue(disk_pct)
 
     def closeEvent(self,event):
+        QApplication.instance().applicationStateChanged.disconnect(self.appStateChanged)
+        if self.exposeWatched is not None:
+            self.exposeWatched.removeEventFilter(self)
+        self.animTimer.stop(); self.paceTimer.stop()
         self.camera_view.stop_camera()
         event.accept()
 
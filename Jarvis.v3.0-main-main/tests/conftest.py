@@ -0,0 +1,29 @@
+import os
+import sys
+import types
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+try:
+    import features  # noqa: F401
+except (SyntaxError, ValueError):
+    # Some checkouts ship features/__init__.py as a file of NUL bytes. The
+    # package has no init code, so register it by path and import its modules.
+    features = types.ModuleType('features')
+    features.__path__ = [os.path.join(ROOT, 'features')]
+    sys.modules['features'] = features
+
+
+@pytest.fixture
+def memory(tmp_path, monkeypatch):
+    """Jarvis_memory against a fresh jarvis_data/ and data/ in a temp dir."""
+    import Jarvis_memory
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(Jarvis_memory, '_schema_ready', False, raising=False)
+    Jarvis_memory.init_db()
+    yield Jarvis_memory
+    Jarvis_memory.shutdown()
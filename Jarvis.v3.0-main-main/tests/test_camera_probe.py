@@ -0,0 +1,86 @@
+import threading
+import time
+
+import pytest
+
+cv2 = pytest.importorskip('cv2')
+
+from features import camera_manager as cm
+
+
+class FakeCap:
+    def __init__(self, idx):
+        self.idx = idx
+        self.released = False
+
+    def isOpened(self):
+        return not self.released
+
+    def release(self):
+        self.released = True
+
+
+@pytest.fixture
+def probes(tmp_path, monkeypatch):
+    """Replace device probing: index 2 works after 0.2 s, index 3 after 0.6 s."""
+    monkeypatch.chdir(tmp_path)
+    calls, caps = [], []
+    lock = threading.Lock()
+
+    def probe(idx, backend):
+        with lock:
+            calls.append((idx, backend))
+        time.sleep(0.2 if idx != 3 else 0.6)
+        if idx not in (2, 3):
+            return None
+        cap = FakeCap(idx)
+        caps.append(cap)
+        return cap, {'index': idx, 'backend': backend, 'width': 640, 'height': 480, 'fps': 30}
+    monkeypatch.setattr(cm, '_probe_camera', probe)
+    camera = cm.camera
+    saved = (camera.cap, camera.current_camera_index, camera.camera_properties)
+    camera.cap = None
+    if hasattr(camera, 'frame_source'):
+        monkeypatch.setattr(camera, 'frame_source', None)
+    yield camera, calls, caps
+    camera.cap, camera.current_camera_index, camera.camera_properties = saved
+
+
+def test_indices_are_probed_concurrently(probes):
+    camera, calls, caps = probes
+    started = time.monotonic()
+    cap, props = camera._probe_all()
+    elapsed = time.monotonic() - started
+    assert props['index'] == 2 and cap.idx == 2
+    # serially this would take at least one 0.2 s probe per index
+    assert elapsed < 0.2 * len(cm.PROBE_INDICES)
+    assert {idx for idx, _ in calls} == set(cm.PROBE_INDICES)
+
+
+def test_late_finds_are_released(probes):
+    camera, calls, caps = probes
+    cap, _ = camera._probe_all()
+    time.sleep(0.8)
+    late = [c for c in caps if c is not cap]
+    assert late and all(c.released for c in late)
+    assert not cap.released
+
+
+def test_last_good_camera_is_tried_first(probes):
+    camera, calls, caps = probes
+    assert camera._initialize_camera()
+    assert cm.load_camera_config()['last_good']['index'] == 2
+    calls.clear()
+    assert camera._initialize_camera()
+    assert calls == [(2, cm.load_camera_config()['last_good']['backend'])]
+    assert camera.current_camera_index == 2
+
+
+def test_failed_last_good_falls_back_to_a_full_probe(probes):
+    camera, calls, caps = probes
+    cm.save_camera_config({'last_good': {'index': 0, 'backend': None}})
+    assert camera._initialize_camera()
+    assert calls[0] == (0, None)
+    # the last-known-good pair is not probed twice
+    assert calls.count((0, None)) == 1
+    assert camera.current_camera_index == 2
@@ -0,0 +1,93 @@
+import asyncio
+import os
+import threading
+
+import numpy as np
+import pytest
+
+from features import camera_snapshot
+from features.observation_bus import ObservationBus
+
+
+class FakeCamera:
+    def __init__(self):
+        self.frame = _frame(0)
+        self.threads = []
+
+    def get_camera_status(self):
+        return {'initialized': True}
+
+    def latest_bundle(self):
+        return None
+
+    def read_frame(self, owner=None):
+        self.threads.append(threading.current_thread())
+        return True, self.frame.copy()
+
+
+class FakeCascade:
+    def __init__(self):
+        self.calls = 0
+
+    def detectMultiScale(self, gray, *args):
+        self.calls += 1
+        return [(10, 10, 40, 40)]
+
+
+def _frame(seed):
+    rng = np.random.default_rng(seed)
+    blocks = rng.integers(30, 220, (12, 16, 3), dtype=np.uint8)
+    return np.kron(blocks, np.ones((40, 40, 1), dtype=np.uint8))
+
+
+@pytest.fixture
+def snap(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    cam, cascade = FakeCamera(), FakeCascade()
+    camera_snapshot._load_cv2()
+    monkeypatch.setattr(camera_snapshot, 'camera', cam)
+    monkeypatch.setattr(camera_snapshot, 'face_cascade', cascade)
+    monkeypatch.setattr(camera_snapshot, 'bus', ObservationBus())
+    monkeypatch.setattr(camera_snapshot, 'attach_camera_view_file', lambda: None)
+    monkeypatch.setattr(camera_snapshot, '_last_hash', None)
+    monkeypatch.setattr(camera_snapshot, '_last_description', None)
+    return cam, cascade, tmp_path / 'jarvis_data' / 'camera_view.jpg'
+
+
+def test_snapshot_runs_off_the_event_loop(snap):
+    cam, cascade, jpg = snap
+
+    async def main():
+        return await camera_snapshot.take_snapshot(), threading.current_thread()
+    text, loop_thread = asyncio.run(main())
+    assert text.startswith('1 log camera ke samne')
+    assert cam.threads and cam.threads[0] is not loop_thread
+    assert jpg.exists()
+
+
+def test_same_view_reuses_the_last_description(snap):
+    cam, cascade, jpg = snap
+    first = camera_snapshot._snapshot_sync()
+    written = os.stat(jpg).st_mtime_ns
+    os.utime(jpg, ns=(0, 0))
+    cam.frame[0, 0] += 1           # sensor noise is not a new view
+    assert camera_snapshot._snapshot_sync() == first
+    assert cascade.calls == 1
+    assert os.stat(jpg).st_mtime_ns == 0 != written
+
+
+def test_changed_view_is_processed_again(snap):
+    cam, cascade, jpg = snap
+    camera_snapshot._snapshot_sync()
+    cam.frame = _frame(1)
+    camera_snapshot._snapshot_sync()
+    assert cascade.calls == 2
+
+
+def test_frame_hash_tolerates_noise_but_not_a_new_scene():
+    camera_snapshot._load_cv2()
+    a, b = _frame(0), _frame(1)
+    noisy = np.clip(a.astype(int) + np.random.default_rng(2).integers(-3, 4, a.shape), 0, 255).astype(np.uint8)
+    ha = camera_snapshot.frame_hash(a)
+    assert bin(ha ^ camera_snapshot.frame_hash(noisy)).count('1') <= camera_snapshot.HASH_TOLERANCE
+    assert bin(ha ^ camera_snapshot.frame_hash(b)).count('1') > camera_snapshot.HASH_TOLERANCE
@@ -0,0 +1,92 @@
+import json
+
+import numpy as np
+import pytest
+
+from features.addons import face_registry
+
+
+class FakeFaceRecognition:
+    """Images are text files holding a face 'id' (or 'none'); the encoding is a one-hot vector."""
+
+    def __init__(self):
+        self.encoded = []
+
+    def load_image_file(self, path):
+        with open(path, encoding='utf-8') as f:
+            return f.read().strip()
+
+    def face_encodings(self, img):
+        self.encoded.append(img)
+        if img == 'none':
+            return []
+        enc = np.zeros(128)
+        enc[int(img)] = 1.0
+        return [enc]
+
+
+@pytest.fixture
+def fr(tmp_path, monkeypatch):
+    fake = FakeFaceRecognition()
+    monkeypatch.setattr(face_registry, 'REGISTRY_DIR', str(tmp_path / 'face_db'))
+    monkeypatch.setattr(face_registry, '_cache', None)
+    monkeypatch.setattr(face_registry, '_face_recognition', lambda: fake)
+    return fake
+
+
+def _image(tmp_path, name, content):
+    path = tmp_path / name
+    path.write_text(content, encoding='utf-8')
+    return str(path)
+
+
+def test_registered_faces_are_encoded_once(tmp_path, fr):
+    assert face_registry.register_face('alice', _image(tmp_path, 'a.txt', '1'))
+    assert face_registry.register_face('bob', _image(tmp_path, 'b.txt', '2'))
+    assert fr.encoded == ['1', '2']
+    fr.encoded.clear()
+    probe = _image(tmp_path, 'probe.txt', '2')
+    assert face_registry.identify_face(probe) == 'bob'
+    assert face_registry.identify_face(probe) == 'bob'
+    assert fr.encoded == ['2', '2']                # only the unknown image
+
+
+def test_cache_survives_a_restart(tmp_path, fr, monkeypatch):
+    face_registry.register_face('alice', _image(tmp_path, 'a.txt', '1'))
+    monkeypatch.setattr(face_registry, '_cache', None)
+    fr.encoded.clear()
+    assert face_registry.identify_face(_image(tmp_path, 'probe.txt', '1')) == 'alice'
+    assert fr.encoded == ['1']
+
+
+def test_no_match_outside_tolerance(tmp_path, fr):
+    face_registry.register_face('alice', _image(tmp_path, 'a.txt', '1'))
+    assert face_registry.identify_face(_image(tmp_path, 'probe.txt', '3')) is None
+    assert face_registry.identify_face(_image(tmp_path, 'probe.txt', '3'), tolerance=2.0) == 'alice'
+
+
+def test_images_without_a_face_are_not_retried(tmp_path, fr):
+    face_registry.register_face('blurry', _image(tmp_path, 'x.txt', 'none'))
+    face_registry.register_face('carol', _image(tmp_path, 'c.txt', '5'))
+    fr.encoded.clear()
+    assert face_registry.identify_face(_image(tmp_path, 'probe.txt', '5')) == 'carol'
+    assert fr.encoded == ['5']
+
+
+def test_removed_images_are_dropped(tmp_path, fr):
+    face_registry.register_face('alice', _image(tmp_path, 'a.txt', '1'))
+    face_registry.register_face('bob', _image(tmp_path, 'b.txt', '2'))
+    (tmp_path / 'face_db' / 'bob.jpg').unlink()
+    assert face_registry.identify_face(_image(tmp_path, 'probe.txt', '2'), tolerance=2.0) == 'alice'
+
+
+def test_names_follow_the_saved_row_not_the_entry_order(tmp_path, fr):
+    face_registry.register_face('alice', _image(tmp_path, 'a.txt', '1'))
+    face_registry.register_face('blurry', _image(tmp_path, 'x.txt', 'none'))
+    face_registry.register_face('bob', _image(tmp_path, 'b.txt', '2'))
+    index = tmp_path / 'face_db' / face_registry.INDEX_FILE
+    entries = json.loads(index.read_text(encoding='utf-8'))
+    index.write_text(json.dumps(entries[::-1]), encoding='utf-8')
+    face_registry._cache = None
+    assert face_registry.identify_face(_image(tmp_path, 'probe.txt', '1')) == 'alice'
+    assert face_registry.identify_face(_image(tmp_path, 'probe.txt', '2')) == 'bob'
@@ -0,0 +1,71 @@
+import numpy as np
+
+from features.face_tracking import FaceTracker, MotionGate
+
+FACE = (200, 150, 120, 120)
+
+
+def _scene(shift=0):
+    """Blocky random texture, moved `shift` pixels to the right."""
+    rng = np.random.default_rng(0)
+    blocks = rng.integers(0, 256, (48, 64), dtype=np.uint8)
+    img = np.kron(blocks, np.ones((10, 10), dtype=np.uint8))
+    return np.roll(img, shift, axis=1)
+
+
+class CountingDetector:
+    def __init__(self, boxes=()):
+        self.boxes = list(boxes)
+        self.calls = 0
+
+    def __call__(self, gray):
+        self.calls += 1
+        return list(self.boxes)
+
+
+def test_gate_ignores_a_static_scene_and_reports_motion():
+    gate = MotionGate()
+    assert gate.update(_scene())        # first frame always counts
+    assert not gate.update(_scene())
+    assert gate.update(_scene(30))
+
+
+def test_static_scene_skips_the_detector_until_idle_redetect():
+    det = CountingDetector([FACE])
+    tracker = FaceTracker(det, idle_redetect=10.0)
+    for t in range(10):
+        assert tracker.update(_scene(), now=100.0 + t * 0.5) == [FACE]
+    assert det.calls == 1
+    assert tracker.stats['skipped'] == 9
+    tracker.update(_scene(), now=111.0)
+    assert det.calls == 2
+
+
+def test_moving_face_is_tracked_between_detections():
+    det = CountingDetector([FACE])
+    tracker = FaceTracker(det, redetect_interval=2.0)
+    tracker.update(_scene(), now=0.0)
+    boxes = tracker.update(_scene(6), now=0.1)
+    assert det.calls == 1 and tracker.stats['tracked'] == 1
+    x, y, w, h = boxes[0]
+    assert abs(x - (FACE[0] + 6)) <= 1 and abs(y - FACE[1]) <= 1 and (w, h) == FACE[2:]
+    # past redetect_interval the detector runs again even though tracking works
+    tracker.update(_scene(12), now=2.5)
+    assert det.calls == 2
+
+
+def test_motion_without_faces_searches_at_search_interval():
+    det = CountingDetector()
+    tracker = FaceTracker(det, search_interval=0.5)
+    for i, t in enumerate((0.0, 0.1, 0.2, 0.6, 0.7)):
+        assert tracker.update(_scene(i * 20), now=t) == []
+    # first frame, then once more after search_interval
+    assert det.calls == 2
+
+
+def test_resolution_change_resets_the_tracker():
+    det = CountingDetector([FACE])
+    tracker = FaceTracker(det)
+    tracker.update(_scene(), now=0.0)
+    tracker.update(_scene()[::2, ::2], now=0.1)
+    assert det.calls == 2
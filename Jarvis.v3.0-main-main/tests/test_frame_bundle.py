@@ -0,0 +1,69 @@
+import threading
+
+import numpy as np
+import pytest
+
+from features.frame_bundle import FrameBundle
+
+
+def _bundle():
+    frame = np.random.default_rng(0).integers(0, 256, (480, 640, 3), dtype=np.uint8)
+    return FrameBundle(frame, seq=1, timestamp=0.0)
+
+
+def test_nothing_is_computed_up_front():
+    b = _bundle()
+    assert b.computed == 0
+    assert b.level(0) is b.full
+
+
+def test_each_derivative_is_computed_once():
+    b = _bundle()
+    assert b.half.shape == (240, 320, 3)
+    assert b.half is b.half
+    assert b.gray() is b.gray()
+    assert b.gray().shape == (480, 640)
+    assert b.computed == 2
+
+
+def test_pyramid_levels_are_built_from_the_level_above():
+    b = _bundle()
+    assert b.quarter.shape == (120, 160, 3)
+    # the half level was built on the way and is reused
+    assert b.computed == 2
+    b.half
+    assert b.computed == 2
+
+
+def test_resized_keeps_the_aspect_ratio_and_uses_the_nearest_level():
+    b = _bundle()
+    small = b.resized(200)
+    assert small.shape == (150, 200, 3)
+    assert b.computed == 2          # half (the smallest level covering 200x150), then 200x150
+    assert b.resized(200, gray=True).shape == (150, 200)
+    assert b.computed == 3
+
+
+def test_arrays_are_read_only():
+    b = _bundle()
+    with pytest.raises(ValueError):
+        b.half[0, 0] = 0
+    with pytest.raises(ValueError):
+        b.full[0, 0] = 0
+
+
+def test_concurrent_consumers_share_one_conversion():
+    b = _bundle()
+    start = threading.Barrier(8)
+    results = []
+
+    def consume():
+        start.wait()
+        results.append(b.resized(320, 240, gray=True))
+    threads = [threading.Thread(target=consume) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert all(r is results[0] for r in results)
+    assert b.computed == 2
@@ -0,0 +1,97 @@
+import os
+
+import cv2
+import numpy as np
+import pytest
+
+from features.frame_bundle import FrameBundle
+from features.frame_history import FrameHistory
+
+
+def _bundle(seed, ts, seq=0):
+    blocks = np.random.default_rng(seed).integers(0, 256, (12, 16, 3), dtype=np.uint8)
+    return FrameBundle(np.kron(blocks, np.ones((40, 40, 1), dtype=np.uint8)), seq, ts)
+
+
+def test_unchanged_frames_are_stored_only_as_keyframes():
+    h = FrameHistory(keyframe_interval=2.0)
+    stored = [h.add(_bundle(0, 100.0 + i * 0.1, i)) for i in range(30)]
+    # the first frame, then one keyframe per 2 s of a still scene
+    assert [i for i, s in enumerate(stored) if s] == [0, 20]
+    assert h.stats['unchanged'] == 28
+    assert all(f.keyframe for f in h.frames())
+
+
+def test_a_changed_picture_is_stored_between_keyframes():
+    h = FrameHistory(keyframe_interval=10.0)
+    h.add(_bundle(0, 100.0))
+    assert h.add(_bundle(1, 100.1))
+    assert not h.frames()[-1].keyframe
+
+
+def test_history_is_bounded_in_time_and_bytes():
+    h = FrameHistory(seconds=1.0)
+    for i in range(20):
+        h.add(_bundle(i, 100.0 + i * 0.1, i))
+    frames = h.frames()
+    assert frames[0].timestamp >= 100.9 - 1e-9 and frames[-1].seq == 19
+
+    small = FrameHistory(max_bytes=3 * len(frames[-1].jpeg))
+    for i in range(10):
+        small.add(_bundle(i, 100.0 + i * 0.1, i))
+    assert small.nbytes <= small.max_bytes
+    assert small.frames()[-1].seq == 9 and small.stats['evicted'] > 0
+
+
+def test_frames_are_stored_downscaled():
+    h = FrameHistory(width=320)
+    h.add(_bundle(0, 100.0))
+    img = cv2.imdecode(np.frombuffer(h.frames()[0].jpeg, np.uint8), cv2.IMREAD_COLOR)
+    assert img.shape == (240, 320, 3)
+
+
+def test_contact_sheet_export(tmp_path):
+    h = FrameHistory()
+    for i in range(10):
+        h.add(_bundle(i, 100.0 + i * 0.5, i))
+    path = str(tmp_path / 'sheet.jpg')
+    assert h.export_contact_sheet(path, count=4, cols=2).result(timeout=10) == path
+    sheet = cv2.imread(path)
+    assert sheet.shape[:2] == (2 * 240, 2 * 320)
+
+
+def test_clip_export(tmp_path):
+    h = FrameHistory()
+    for i in range(5):
+        h.add(_bundle(i, 100.0 + i * 0.2, i))
+    path = str(tmp_path / 'clip.avi')
+    assert h.export_clip(path, fps=10.0).result(timeout=10) == path
+    cap = cv2.VideoCapture(path)
+    try:
+        assert cap.isOpened()
+        assert int(cap.get(cv2.CAP_PROP_FRAME_COUNT)) == 9
+    finally:
+        cap.release()
+
+
+def test_export_of_an_empty_history_fails(tmp_path):
+    with pytest.raises(ValueError):
+        FrameHistory().export_clip(str(tmp_path / 'clip.avi')).result(timeout=10)
+
+
+def test_concurrent_export_requests_are_all_served(tmp_path, monkeypatch):
+    from features import camera_manager as cm
+    monkeypatch.chdir(tmp_path)
+    camera = cm.camera
+    history = FrameHistory()
+    for i in range(5):
+        history.add(_bundle(i, 100.0 + i * 0.2, i))
+    monkeypatch.setattr(camera, 'history', history)
+    monkeypatch.setattr(camera, '_reading_shared', lambda: False)
+    clip = camera.request_export('clip', str(tmp_path / 'clip.avi'), timeout=10)
+    sheet = camera.request_export('sheet', str(tmp_path / 'sheet.jpg'), count=4, timeout=10)
+    assert len(os.listdir(cm.data_path(cm.EXPORT_REQUEST_DIR))) == 2
+    camera._serve_export_requests()
+    assert clip.result(timeout=10) == str(tmp_path / 'clip.avi')
+    assert sheet.result(timeout=10) == str(tmp_path / 'sheet.jpg')
+    assert os.listdir(cm.data_path(cm.EXPORT_REQUEST_DIR)) == []
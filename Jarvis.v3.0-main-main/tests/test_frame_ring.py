@@ -0,0 +1,113 @@
+import uuid
+
+import numpy as np
+import pytest
+
+from features.frame_ring import FrameRing
+
+
+@pytest.fixture
+def ring():
+    r = FrameRing.create(f"jarvis_test_{uuid.uuid4().hex[:8]}", slots=3, slot_bytes=64 * 48 * 3, owner='test')
+    yield r
+    r.close()
+
+
+def _frame(value):
+    return np.full((48, 64, 3), value, dtype=np.uint8)
+
+
+def test_empty_ring_has_no_frame(ring):
+    assert ring.latest() is None
+    assert ring.latest_seq == 0
+
+
+def test_reader_sees_the_latest_published_frame(ring):
+    reader = FrameRing.attach(ring.name)
+    try:
+        for v in (1, 2, 3):
+            seq = ring.publish(_frame(v), timestamp=100.0 + v)
+        latest = reader.latest(copy=True)
+        assert latest.seq == seq == 3
+        assert latest.timestamp == 103.0
+        assert latest.frame.shape == (48, 64, 3) and (latest.frame == 3).all()
+        assert reader.info()['owner'] == 'test'
+    finally:
+        reader.close()
+
+
+def test_grayscale_frames_keep_their_shape(ring):
+    ring.publish(np.arange(48 * 64, dtype=np.uint16).reshape(48, 64))
+    latest = ring.latest(copy=True)
+    assert latest.frame.dtype == np.uint16 and latest.frame.shape == (48, 64)
+    assert latest.frame[47, 63] == 48 * 64 - 1
+
+
+def test_view_is_invalidated_when_its_slot_is_rewritten(ring):
+    ring.publish(_frame(1))
+    view = ring.latest()
+    assert view.valid()
+    for v in range(2, 2 + ring.slots):
+        ring.publish(_frame(v))
+    assert not view.valid()
+
+
+def test_frame_being_written_is_not_returned(ring):
+    ring.publish(_frame(1))
+    seq = ring.publish(_frame(2))
+    # A writer that started on this slot again has bumped seq_begin but not seq_end.
+    i = seq % ring.slots
+    ring._slots['seq_begin'][i] = seq + ring.slots
+    assert ring.latest() is None
+
+
+def test_copy_is_detached_from_shared_memory(ring):
+    ring.publish(_frame(7))
+    copy = ring.latest(copy=True).frame
+    for v in range(ring.slots):
+        ring.publish(_frame(v))
+    assert (copy == 7).all()
+
+
+def test_oversized_frame_is_rejected(ring):
+    with pytest.raises(ValueError):
+        ring.publish(np.zeros((480, 640, 3), dtype=np.uint8))
+
+
+def test_wait_next_returns_newer_frames_only(ring):
+    ring.publish(_frame(1))
+    assert ring.wait_next(1, timeout=0.05) is None
+    ring.publish(_frame(2))
+    assert ring.wait_next(1, timeout=0.05).seq == 2
+
+
+def test_closed_ring_is_not_alive(ring):
+    reader = FrameRing.attach(ring.name)
+    try:
+        assert reader.alive()
+        ring.close()
+        assert not reader.alive()
+    finally:
+        reader.close()
+
+
+def test_readers_share_the_ring_generation(ring):
+    reader = FrameRing.attach(ring.name)
+    try:
+        ring.publish(_frame(1))
+        assert reader.generation == ring.generation == reader.latest().generation
+        assert reader.info()['generation'] == ring.generation
+    finally:
+        reader.close()
+
+
+def test_a_new_ring_gets_a_new_generation(ring):
+    ring.publish(_frame(1))
+    name, old = ring.name, ring.generation
+    ring.close()
+    new = FrameRing.create(name, slots=3, slot_bytes=64 * 48 * 3)
+    try:
+        assert new.generation != old
+        assert new.publish(_frame(2)) == 1    # seq restarts, so seq alone is not a key
+    finally:
+        new.close()
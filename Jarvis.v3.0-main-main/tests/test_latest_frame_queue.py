@@ -0,0 +1,51 @@
+import threading
+import time
+
+import pytest
+
+pytest.importorskip('cv2')
+
+from features.camera_manager import LatestFrameQueue
+
+
+def test_get_returns_the_newest_item_and_counts_drops():
+    q = LatestFrameQueue()
+    for i in range(3):
+        q.put(i)
+    assert q.get(timeout=0) == 2
+    assert q.dropped == 2
+
+
+def test_get_empties_the_slot():
+    q = LatestFrameQueue()
+    q.put('frame')
+    assert q.get(timeout=0) == 'frame'
+    assert q.get(timeout=0) is None
+    assert q.dropped == 0
+
+
+def test_get_times_out_when_nothing_arrives():
+    q = LatestFrameQueue()
+    started = time.monotonic()
+    assert q.get(timeout=0.05) is None
+    assert time.monotonic() - started < 1.0
+
+
+def test_put_wakes_a_waiting_get():
+    q = LatestFrameQueue()
+    got = []
+    t = threading.Thread(target=lambda: got.append(q.get(timeout=5)))
+    t.start()
+    time.sleep(0.05)
+    q.put('frame')
+    t.join(timeout=5)
+    assert got == ['frame']
+
+
+def test_put_never_blocks():
+    q = LatestFrameQueue()
+    started = time.monotonic()
+    for i in range(10000):
+        q.put(i)
+    assert time.monotonic() - started < 1.0
+    assert q.get(timeout=0) == 9999 and q.dropped == 9999
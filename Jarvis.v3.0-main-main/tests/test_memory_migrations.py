@@ -0,0 +1,78 @@
+import sqlite3
+import threading
+
+import pytest
+
+from Jarvis_memory import SCHEMA_VERSION, _apply_migrations
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    return str(tmp_path / 'memory.db')
+
+
+def _versions(conn):
+    return conn.execute("SELECT version, applied_at FROM schema_version ORDER BY version").fetchall()
+
+
+def _columns(conn, table):
+    return {r[1] for r in conn.execute(f"PRAGMA table_info({table})")}
+
+
+def test_fresh_db_is_migrated_to_the_latest_version(db_path):
+    conn = sqlite3.connect(db_path)
+    assert _apply_migrations(conn) == SCHEMA_VERSION
+    assert [v for v, _ in _versions(conn)] == list(range(1, SCHEMA_VERSION + 1))
+    assert 'metadata' in _columns(conn, 'messages')
+    conn.close()
+
+
+def test_migrations_are_applied_once(db_path):
+    conn = sqlite3.connect(db_path)
+    _apply_migrations(conn)
+    before = _versions(conn)
+    assert _apply_migrations(conn) == SCHEMA_VERSION
+    assert _versions(conn) == before
+    conn.close()
+
+
+def test_unversioned_db_keeps_its_rows(db_path):
+    # A DB written before schema_version existed
+    conn = sqlite3.connect(db_path)
+    conn.execute("CREATE TABLE messages (id INTEGER PRIMARY KEY AUTOINCREMENT, sender TEXT NOT NULL, "
+                 "text TEXT NOT NULL, timestamp REAL NOT NULL, metadata TEXT)")
+    conn.execute("INSERT INTO messages (sender, text, timestamp) VALUES ('user', 'hello', 1.0)")
+    conn.commit()
+    assert _apply_migrations(conn) == SCHEMA_VERSION
+    assert conn.execute("SELECT sender, text FROM messages").fetchall() == [('user', 'hello')]
+    conn.close()
+
+
+def test_schema_version_helper(memory):
+    assert memory.schema_version() == SCHEMA_VERSION
+
+
+def test_concurrent_migrations_do_not_collide(db_path):
+    # Separate connections stand in for the GUI and the agent process.
+    results, errors = [], []
+    start = threading.Barrier(4)
+
+    def migrate():
+        conn = sqlite3.connect(db_path, timeout=10)
+        try:
+            start.wait()
+            results.append(_apply_migrations(conn))
+        except Exception as e:
+            errors.append(e)
+        finally:
+            conn.close()
+    threads = [threading.Thread(target=migrate) for _ in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert errors == []
+    assert results == [SCHEMA_VERSION] * 4
+    conn = sqlite3.connect(db_path)
+    assert [v for v, _ in _versions(conn)] == list(range(1, SCHEMA_VERSION + 1))
+    conn.close()
@@ -0,0 +1,85 @@
+import time
+
+import pytest
+
+DAY = 86400.0
+
+
+@pytest.fixture
+def history(memory, monkeypatch):
+    monkeypatch.setattr(memory, 'RETENTION_BATCH_SIZE', 3)
+    now = time.time()
+    for i in range(10):
+        memory.save_message('user', f'old {i}', ts=now - 40 * DAY + i)
+    memory.save_message('user', 'recent', ts=now - DAY)
+    memory.save_message('assistant', 'newest', ts=now)
+    memory.flush()
+    return memory
+
+
+def test_job_runs_on_the_writer_between_batches(memory):
+    w = memory.MemoryWriter()
+    w.submit('user', 'a')
+    count = w.run_job(lambda conn: conn.execute("SELECT COUNT(*) FROM messages").fetchone()[0])
+    assert count.result(timeout=5) == 1
+    w.close()
+
+
+def test_prune_deletes_old_rows_in_batches(history, monkeypatch):
+    sizes = []
+    delete_batch = history._delete_batch
+
+    def spy(cutoff, limit, archive):
+        job = delete_batch(cutoff, limit, archive)
+        return lambda conn: sizes.append(job(conn)) or sizes[-1]
+    monkeypatch.setattr(history, '_delete_batch', spy)
+    assert history.prune_old(30) == 10
+    assert sizes == [3, 3, 3, 1]
+    assert [m['text'] for m in history.recall_last(20)] == ['newest', 'recent']
+
+
+def test_prune_none_keeps_everything(history):
+    assert history.prune_old(None) == 0
+    assert len(history.recall_last(20)) == 12
+
+
+def test_archive_keeps_pruned_rows(history):
+    assert history.prune_old(30, archive=True) == 10
+    month = time.strftime('%Y-%m', time.localtime(time.time() - 40 * DAY))
+    assert month in history.list_archives()
+    assert [m['text'] for m in history.load_archive(month)] == [f'old {i}' for i in range(10)]
+
+
+def test_prune_refreshes_summaries(history):
+    old = time.time() - 40 * DAY
+    assert history.get_summary('day', old)['message_count'] == 10
+    history.prune_old(30)
+    assert history.get_summary('day', old)['message_count'] == 0
+
+
+def test_retention_service_runs_in_the_background(history):
+    svc = history.start_retention(30, interval=3600)
+    try:
+        deadline = time.time() + 5
+        while svc.last_run is None and time.time() < deadline:
+            time.sleep(0.02)
+        assert svc.last_deleted == 10
+    finally:
+        history.stop_retention()
+    assert len(history.recall_last(20)) == 2
+
+
+def test_pruned_before_marks_the_cutoff(history):
+    assert history.pruned_before() == 0.0
+    before = time.time()
+    history.prune_old(30)
+    # the last batch was short, so everything before the cutoff is gone
+    assert before - 30 * DAY <= history.pruned_before() <= time.time() - 30 * DAY
+
+
+def test_full_batch_records_its_last_row(history):
+    cutoff = time.time() - 30 * DAY
+    job = history._delete_batch(cutoff, 3, False)
+    assert history.get_writer().run_job(job).result() == 3
+    oldest_left = min(m['timestamp'] for m in history.recall_last(20))
+    assert history.pruned_before() == oldest_left - 1
@@ -0,0 +1,51 @@
+import pytest
+
+
+@pytest.fixture
+def messages(memory):
+    memory.save_message('user', 'what is the weather in Mumbai today', ts=100.0)
+    memory.save_message('assistant', 'Mumbai weather: 31 degrees and humid', ts=200.0)
+    memory.save_message('user', 'play some music', ts=300.0)
+    memory.save_message('user', 'remind me about the weather tomorrow', ts=400.0)
+    memory.flush()
+    if not memory._fts_available:
+        pytest.skip('SQLite without FTS5')
+    return memory
+
+
+def _texts(results):
+    return [r['text'] for r in results]
+
+
+def test_every_word_must_match(messages):
+    assert _texts(messages.search_ranked('weather mumbai')) and all(
+        'umbai' in t for t in _texts(messages.search_ranked('weather mumbai')))
+    assert messages.search_ranked('weather music') == []
+
+
+def test_words_match_as_prefixes(messages):
+    assert len(messages.search_ranked('weath')) == 3
+    assert _texts(messages.search_ranked('mus')) == ['play some music']
+
+
+def test_filters(messages):
+    assert {r['sender'] for r in messages.search_ranked('weather', sender='user')} == {'user'}
+    assert [r['timestamp'] for r in messages.search_ranked('weather', since=150.0, until=400.0)] == [200.0]
+
+
+def test_results_are_ranked_and_highlighted(messages):
+    results = messages.search_ranked('mumbai weather')
+    assert [r['rank'] for r in results] == sorted(r['rank'] for r in results)
+    assert '[' in results[0]['snippet'] and ']' in results[0]['snippet']
+    assert 'snippet' not in messages.search_ranked('mumbai', highlight=False)[0]
+
+
+def test_query_syntax_is_not_interpreted(messages):
+    # FTS operators and quotes in user text are searched as plain words
+    assert messages.search_ranked('weather OR music') == []
+    assert messages.search_ranked('"weather') != []
+    assert messages.search_ranked('***') == []
+
+
+def test_search_history_uses_the_index(messages):
+    assert set(_texts(messages.search_history('music'))) == {'play some music'}
@@ -0,0 +1,67 @@
+import time
+
+import pytest
+
+# Monday 2024-01-15 10:00 local time
+MONDAY = time.mktime((2024, 1, 15, 10, 0, 0, 0, 0, -1))
+HOUR, DAY = 3600.0, 86400.0
+
+
+@pytest.fixture
+def week(memory):
+    memory.save_message('user', 'open the calculator please', ts=MONDAY + 5 * 60)
+    memory.save_message('assistant', 'calculator opened', ts=MONDAY + 6 * 60)
+    memory.save_message('user', 'what is the weather', ts=MONDAY + HOUR + 60)
+    memory.save_message('user', 'calculator again', ts=MONDAY + 2 * DAY)
+    memory.flush()
+    return memory
+
+
+def test_hour_bucket(week):
+    s = week.get_summary('hour', MONDAY + 30 * 60)
+    assert (s['bucket_start'], s['bucket_end']) == (MONDAY, MONDAY + HOUR)
+    assert (s['message_count'], s['user_count'], s['assistant_count']) == (2, 1, 1)
+    assert s['keywords']['calculator'] == 2
+    assert s['highlights'] == ['open the calculator please']
+    assert s['summary'].startswith('Hour of 2024-01-15 10:00: 2 messages')
+
+
+def test_day_and_week_merge_their_children(week):
+    day = week.get_summary('day', MONDAY)
+    assert day['message_count'] == 3
+    assert day['bucket_end'] - day['bucket_start'] == DAY
+    weekly = week.get_summary('week', MONDAY + 2 * DAY)
+    assert weekly['message_count'] == 4 and weekly['user_count'] == 3
+    assert weekly['bucket_start'] == MONDAY - 10 * HOUR
+    assert weekly['keywords']['calculator'] == 3
+    assert 'Topics: calculator' in week.summarize_period('week', MONDAY)
+
+
+def test_empty_bucket(week):
+    s = week.get_summary('day', MONDAY + DAY)
+    assert s['message_count'] == 0
+    assert s['summary'].endswith('no conversation.')
+
+
+def test_new_messages_update_stored_summaries(week):
+    assert week.get_summary('week', MONDAY)['message_count'] == 4
+    week.save_message('user', 'play music', ts=MONDAY + 3 * DAY)
+    week.flush()
+    weekly = week.get_summary('week', MONDAY)
+    assert weekly['message_count'] == 5
+    assert weekly['keywords']['music'] == 1
+    assert week.get_summary('hour', MONDAY)['message_count'] == 2
+
+
+def test_unknown_granularity(memory):
+    with pytest.raises(ValueError):
+        memory.get_summary('month')
+
+
+def test_long_tokens_are_not_topics(memory):
+    blob = 'a' * 10000
+    memory.save_message('user', f'here is the dump {blob}', ts=MONDAY)
+    memory.flush()
+    s = memory.get_summary('week', MONDAY)
+    assert blob not in s['keywords'] and blob not in s['summary']
+    assert 'dump' in s['keywords']
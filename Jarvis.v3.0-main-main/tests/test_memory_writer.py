@@ -0,0 +1,90 @@
+import json
+import sqlite3
+
+import pytest
+
+import Jarvis_memory
+from Jarvis_memory import MemoryWriter
+
+
+@pytest.fixture
+def workdir(memory, tmp_path):
+    return tmp_path
+
+
+@pytest.fixture
+def batches(monkeypatch):
+    """Record the size of every batch the writer commits."""
+    sizes = []
+    write_batch = MemoryWriter._write_batch
+
+    def spy(self, conn, batch):
+        sizes.append(len(batch))
+        return write_batch(self, conn, batch)
+    monkeypatch.setattr(MemoryWriter, '_write_batch', spy)
+    return sizes
+
+
+def _rows(workdir):
+    conn = sqlite3.connect(str(workdir / 'jarvis_data' / Jarvis_memory.DB_FILENAME))
+    try:
+        return conn.execute("SELECT id, sender, text FROM messages ORDER BY id").fetchall()
+    finally:
+        conn.close()
+
+
+def test_messages_are_group_committed(workdir, batches):
+    w = MemoryWriter(flush_interval=1.0)
+    futures = [w.submit('user', f"message {i}") for i in range(20)]
+    assert w.flush(timeout=5)
+    ids = [f.result(timeout=0) for f in futures]
+    assert ids == sorted(ids) and len(set(ids)) == 20
+    # all 20 messages and the flush barrier went into one transaction
+    assert batches == [21]
+    assert [r[2] for r in _rows(workdir)] == [f"message {i}" for i in range(20)]
+    with open(workdir / 'data' / 'memory.jsonl', encoding='utf-8') as f:
+        assert [json.loads(line)['id'] for line in f] == ids
+    w.close()
+
+
+def test_batch_size_caps_a_transaction(workdir, batches):
+    w = MemoryWriter(batch_size=5, flush_interval=1.0)
+    futures = [w.submit('user', str(i)) for i in range(12)]
+    assert w.flush(timeout=5)
+    assert all(f.result(timeout=0) for f in futures)
+    assert max(batches) <= 5 and sum(batches) == 13
+    w.close()
+
+
+def test_urgent_message_skips_the_flush_interval(workdir):
+    w = MemoryWriter(flush_interval=30.0)
+    fut = w.submit('user', 'now', urgent=True)
+    assert fut.result(timeout=5) > 0
+    w.close()
+
+
+def test_failed_connect_fails_pending_futures_and_writer_restarts(workdir, monkeypatch):
+    connect = Jarvis_memory._connect
+
+    def broken():
+        raise OSError('disk gone')
+    monkeypatch.setattr(Jarvis_memory, '_connect', broken)
+    w = MemoryWriter(flush_interval=0.2)
+    futures = [w.submit('user', str(i)) for i in range(5)]
+    for f in futures:
+        with pytest.raises(OSError):
+            f.result(timeout=5)
+    assert w.pending == 0
+
+    monkeypatch.setattr(Jarvis_memory, '_connect', connect)
+    assert w.submit('user', 'again', urgent=True).result(timeout=5) > 0
+    w.close()
+
+
+def test_close_flushes_and_refuses_new_work(workdir):
+    w = MemoryWriter(flush_interval=30.0)
+    fut = w.submit('user', 'last words')
+    w.close()
+    assert fut.result(timeout=0) > 0
+    with pytest.raises(RuntimeError):
+        w.submit('user', 'too late')
@@ -0,0 +1,70 @@
+import sqlite3
+
+import pytest
+
+import Jarvis_memory
+from Jarvis_memory import BODY_COMPRESS_THRESHOLD, BODY_PREVIEW_CHARS, FLAG_BODY_EXTERNAL
+
+
+@pytest.fixture
+def cur(tmp_path):
+    conn = sqlite3.connect(str(tmp_path / 'bodies.db'))
+    Jarvis_memory._create_messages(conn)
+    Jarvis_memory._create_message_bodies(conn)
+    yield conn.cursor()
+    conn.close()
+
+
+def _body(cur, h):
+    return cur.execute("SELECT codec, data FROM message_bodies WHERE hash = ?", (h,)).fetchone()
+
+
+def test_small_text_stays_inline(cur):
+    assert Jarvis_memory._pack_body(cur, 'short') == ('short', 0, None, False)
+    assert Jarvis_memory._unpack_text('short', None, None) == 'short'
+
+
+def test_large_text_round_trips(cur):
+    text = 'tool output line ✓\n' * (BODY_COMPRESS_THRESHOLD // 10)
+    inline, flags, h, new = Jarvis_memory._pack_body(cur, text)
+    assert flags == FLAG_BODY_EXTERNAL and new
+    assert inline == text[:BODY_PREVIEW_CHARS]
+    codec, data = _body(cur, h)
+    assert len(data) < len(text.encode('utf-8'))
+    assert Jarvis_memory._unpack_text(inline, codec, data) == text
+
+
+def test_identical_bodies_are_stored_once(cur):
+    text = 'x' * (BODY_COMPRESS_THRESHOLD + 1)
+    first = Jarvis_memory._pack_body(cur, text)
+    second = Jarvis_memory._pack_body(cur, text)
+    assert first[2] == second[2] and first[3] and not second[3]
+    assert cur.execute("SELECT COUNT(*) FROM message_bodies").fetchone()[0] == 1
+
+
+def test_unreadable_body_falls_back_to_the_preview(cur):
+    assert Jarvis_memory._unpack_text('preview', 'zstd', b'not zstd') == 'preview'
+
+
+def test_saved_messages_read_back_in_full(memory):
+    big = 'result row\n' * 2000
+    for _ in range(3):
+        memory.save_message('assistant', big, ts=1.0)
+    memory.save_message('user', 'thanks', ts=2.0)
+    memory.flush()
+    assert [m['text'] for m in memory.recall_last(4)] == ['thanks', big, big, big]
+    stats = memory.body_storage_stats()
+    assert stats['bodies'] == 1 and stats['messages'] == 3
+    assert stats['stored_bytes'] < len(big)
+
+
+def test_existing_large_rows_are_compressed(memory):
+    big = 'legacy tool output ' * 500
+    conn = sqlite3.connect(memory._db_path())
+    conn.execute("INSERT INTO messages (sender, text, timestamp) VALUES ('assistant', ?, 1.0)", (big,))
+    conn.commit()
+    conn.close()
+    assert memory.compress_existing_bodies() == 1
+    assert memory.compress_existing_bodies() == 0
+    assert memory.recall_last(1)[0]['text'] == big
+    assert memory.body_storage_stats()['bodies'] == 1
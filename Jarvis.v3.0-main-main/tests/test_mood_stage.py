@@ -0,0 +1,155 @@
+from concurrent.futures import Future
+
+import numpy as np
+import pytest
+
+from features import mood_stage
+from features.frame_bundle import FrameBundle
+from features.mood_stage import MoodStage
+from features.observation_bus import ObservationBus
+
+FACE = (100, 100, 80, 80)
+
+
+class FakeDeepFace:
+    """analyze() answers from a script of moods; records the batch sizes it saw."""
+
+    def __init__(self, moods, batched=True):
+        self.moods = list(moods)
+        self.batched = batched
+        self.calls = []
+
+    def _one(self):
+        mood = self.moods.pop(0)
+        return [{'dominant_emotion': mood, 'emotion': {mood: 90.0}}]
+
+    def analyze(self, img, **kwargs):
+        if isinstance(img, list):
+            if not self.batched:
+                raise ValueError('a list is not an image')
+            self.calls.append(len(img))
+            return [self._one() for _ in img]
+        self.calls.append(1)
+        return self._one()
+
+
+class InlineExecutor:
+    """Runs work on submit(), or holds it until release() when paused."""
+
+    def __init__(self):
+        self.paused = False
+        self.held = []
+
+    def submit(self, fn, *args):
+        fut = Future()
+        if self.paused:
+            self.held.append((fut, fn, args))
+        else:
+            fut.set_result(fn(*args))
+        return fut
+
+    def release(self):
+        for fut, fn, args in self.held:
+            fut.set_result(fn(*args))
+        self.held = []
+
+    def shutdown(self, wait=True, cancel_futures=False):
+        pass
+
+
+@pytest.fixture
+def stage(monkeypatch):
+    def make(moods, batched=True, **kwargs):
+        fake = FakeDeepFace(moods, batched)
+        monkeypatch.setattr(mood_stage, '_deepface', fake)
+        monkeypatch.setattr(mood_stage, '_batched', True)
+        events = []
+        bus = ObservationBus(debounce=0.0, min_interval=0.0)
+        bus.subscribe(events.append)
+        s = MoodStage(bus=bus, **kwargs)
+        s.executor = InlineExecutor()
+        monkeypatch.setattr(s, '_ensure_pool', lambda: s.executor)
+        return s, fake, events
+    return make
+
+
+def _bundle():
+    return FrameBundle(np.zeros((480, 640, 3), dtype=np.uint8), seq=1, timestamp=0.0)
+
+
+def test_offers_are_rate_limited(stage):
+    s, fake, _ = stage(['happy'] * 10, fps=2.0)
+    sent = [s.offer(_bundle(), [FACE], now=100.0 + i * 0.1) for i in range(10)]
+    assert [i for i, ok in enumerate(sent) if ok] == [0, 5]
+    assert s.stats['rate_limited'] == 8
+
+
+def test_no_new_batch_while_one_is_in_flight(stage):
+    s, fake, _ = stage(['happy'] * 3, fps=100.0)
+    s.executor.paused = True
+    assert s.offer(_bundle(), [FACE], now=100.0)
+    assert not s.offer(_bundle(), [FACE], now=101.0)
+    assert s.stats['busy'] == 1
+    s.executor.release()
+    assert s.offer(_bundle(), [FACE], now=102.0)
+
+
+def test_all_faces_of_a_frame_go_in_one_batch(stage):
+    s, fake, events = stage(['happy', 'sad'])
+    s.offer(_bundle(), [(300, 100, 40, 40), FACE, (0, 0, 10, 10)], now=100.0)
+    # the 10 px face is too small to classify; the largest face is the primary one
+    assert fake.calls == [2]
+    assert events[-1].data['moods'] == ['happy', 'sad'] and events[-1].data['faces'] == 2
+
+
+def test_deepface_without_list_input_is_called_per_face(stage):
+    s, fake, events = stage(['happy', 'sad', 'angry', 'fear'], batched=False, fps=100.0)
+    s.offer(_bundle(), [FACE, (300, 100, 40, 40)], now=100.0)
+    s.offer(_bundle(), [FACE, (300, 100, 40, 40)], now=101.0)
+    assert fake.calls == [1, 1, 1, 1]
+    assert mood_stage._batched is False
+
+
+def test_mood_is_smoothed_and_published_on_change_only(stage):
+    s, fake, events = stage(['happy', 'happy', 'sad', 'happy', 'sad', 'sad', 'sad'], fps=100.0, window=5)
+    for i in range(7):
+        s.offer(_bundle(), [FACE], now=100.0 + i)
+    # window 5, a new mood needs 60% of it
+    assert [e.text for e in events] == ['happy', 'sad']
+    assert s.mood == 'sad'
+
+
+def test_mood_becomes_none_when_faces_are_gone(stage):
+    s, fake, events = stage(['happy'])
+    s.offer(_bundle(), [FACE], now=100.0)
+    assert not s.offer(_bundle(), [], now=102.0)
+    assert s.mood == 'happy'
+    s.offer(_bundle(), [], now=100.0 + mood_stage.ABSENT_AFTER + 1)
+    assert [e.text for e in events] == ['happy', 'none']
+
+
+def test_closed_stage_refuses_work(stage):
+    s, fake, _ = stage(['happy'])
+    s.close()
+    assert not s.offer(_bundle(), [FACE], now=100.0)
+    assert fake.calls == []
+
+
+def test_worker_without_deepface_turns_the_stage_off(stage, monkeypatch):
+    s, fake, events = stage(['happy'])
+    monkeypatch.setattr(mood_stage, '_deepface', None)
+    assert s.offer(_bundle(), [FACE], now=100.0)
+    assert events == []
+    # stays off, even after the camera restarts
+    s.stop()
+    assert not s.offer(_bundle(), [FACE], now=200.0)
+
+
+def test_mood_log_goes_to_the_data_directory(tmp_path, monkeypatch):
+    from features.mood_logger.mood_logger import log_mood, read_logs
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / 'mood_log.csv').write_text('timestamp,mood,description\nt,sad,old\n', encoding='utf-8')
+    log_mood('Camera me 1 person dikh rahe hain. Mood: happy')
+    assert not (tmp_path / 'mood_log.csv').exists()
+    assert (tmp_path / 'jarvis_data' / 'mood_log.csv').exists()
+    assert [r['mood'] for r in read_logs()] == ['sad', 'happy']
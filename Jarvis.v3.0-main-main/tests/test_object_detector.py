@@ -0,0 +1,111 @@
+import threading
+import time
+
+import cv2
+import numpy as np
+import pytest
+
+from features.object_detector import MODELS, Detection, ObjectDetector, describe_objects
+
+
+class FakeNet:
+    """Finds one 'person' (VOC class 15) in the top-left quarter of every image."""
+
+    def __init__(self):
+        self.batches = []
+        self._n = 0
+
+    def setInput(self, blob):
+        self._n = blob.shape[0]
+        self.batches.append(self._n)
+
+    def forward(self):
+        rows = [[i, 15, 0.9, 0.0, 0.0, 0.5, 0.5] for i in range(self._n)]
+        rows.append([0, 9, 0.1, 0.0, 0.0, 1.0, 1.0])   # below CONFIDENCE
+        return np.array(rows, dtype=np.float32).reshape(1, 1, -1, 7)
+
+
+@pytest.fixture
+def det():
+    d = ObjectDetector(batch_window=0.05, cpu_budget=0)
+    d._cv2, d._net, d.model = cv2, FakeNet(), MODELS[0]
+    yield d
+    d.close()
+
+
+def _frame():
+    return np.zeros((480, 640, 3), dtype=np.uint8)
+
+
+def test_detections_are_scaled_to_the_frame(det):
+    assert det.detect(_frame(), 1) == [Detection('person', pytest.approx(0.9), (0, 0, 320, 240))]
+
+
+def test_results_are_cached_per_frame(det):
+    det.detect(_frame(), 7)
+    det.detect(_frame(), 7)
+    assert det._net.batches == [1]
+    assert det.stats['cache_hits'] == 1
+    assert det.cached(7) is not None
+
+
+def test_concurrent_frames_run_as_one_batch(det):
+    results = {}
+
+    def call(seq):
+        results[seq] = det.detect(_frame(), seq)
+    threads = [threading.Thread(target=call, args=(seq,)) for seq in (1, 2, 3)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert det._net.batches == [3]
+    assert all(len(r) == 1 for r in results.values())
+
+
+def test_request_does_not_wait_and_returns_the_latest_result(det):
+    assert det.request(_frame(), 1) is None
+    det.detect(_frame(), 2)
+    assert det.request(_frame(), 3) == det.cached(2)
+
+
+def test_missing_model_disables_detection(tmp_path):
+    d = ObjectDetector(model_dir=str(tmp_path))
+    assert not d.available()
+    assert d.detect(_frame()) is None
+
+
+def test_describe_objects():
+    dets = [Detection(label, 1.0, (0, 0, 1, 1)) for label in ('chair', 'cup', 'chair', 'laptop')]
+    assert describe_objects(dets) == '2 chair, cup aur laptop'
+    assert describe_objects([]) == ''
+
+
+def test_same_seq_from_a_new_ring_is_a_new_frame(det):
+    det.detect(_frame(), 1, generation=10)
+    det.detect(_frame(), 1, generation=11)
+    assert det._net.batches == [1, 1]
+    assert det.cached(1, 10) is not None and det.cached(1) is None
+
+
+def test_frame_being_inferred_is_not_queued_again(det):
+    started, release = threading.Event(), threading.Event()
+    forward = det._net.forward
+
+    def slow_forward():
+        started.set()
+        release.wait(2)
+        return forward()
+    det._net.forward = slow_forward
+    first = threading.Thread(target=det.detect, args=(_frame(), 5))
+    first.start()
+    assert started.wait(2)
+    second = threading.Thread(target=det.detect, args=(_frame(), 5))
+    second.start()
+    while det.stats['requests'] < 2:
+        time.sleep(0.005)
+    release.set()
+    first.join()
+    second.join()
+    assert det._net.batches == [1]
+    assert det.stats['coalesced'] == 1
@@ -0,0 +1,108 @@
+import asyncio
+import time
+
+from features.observation_bus import FileSink, Observation, ObservationBus
+
+
+def test_unchanged_description_is_not_emitted():
+    bus = ObservationBus(debounce=0.0, min_interval=0.0)
+    seen = []
+    bus.subscribe(seen.append)
+    assert bus.publish('one face', now=1.0)
+    assert not bus.publish('one face', now=2.0)
+    assert [o.text for o in seen] == ['one face']
+    assert bus.stats == {'published': 2, 'emitted': 1, 'suppressed': 1}
+
+
+def test_change_must_hold_for_the_debounce():
+    bus = ObservationBus(debounce=1.0, min_interval=0.0)
+    assert bus.publish('empty', now=0.0, immediate=True)
+    assert not bus.publish('one face', now=10.0)
+    assert not bus.publish('one face', now=10.5)
+    assert bus.publish('one face', now=11.0)
+    assert bus.current.text == 'one face' and bus.current.previous == 'empty'
+
+
+def test_flicker_back_to_the_current_text_is_ignored():
+    bus = ObservationBus(debounce=1.0, min_interval=0.0)
+    bus.publish('one face', now=0.0, immediate=True)
+    assert not bus.publish('no face', now=10.0)
+    assert not bus.publish('one face', now=10.2)
+    # the pending 'no face' was dropped, so its debounce starts over
+    assert not bus.publish('no face', now=11.5)
+    assert bus.publish('no face', now=12.5)
+
+
+def test_min_interval_limits_the_emit_rate():
+    bus = ObservationBus(debounce=0.0, min_interval=5.0)
+    assert bus.publish('a', now=100.0)
+    assert not bus.publish('b', now=101.0)
+    assert bus.publish('b', now=105.0)
+    assert bus.publish('c', now=105.5, immediate=True)
+
+
+def test_held_back_change_is_emitted_when_its_debounce_expires():
+    bus = ObservationBus(debounce=0.1, min_interval=0.0)
+    seen = []
+    bus.subscribe(seen.append)
+    bus.publish('empty', immediate=True)
+    assert not bus.publish('one face', {'faces': 1})
+    time.sleep(0.4)
+    assert [(o.text, o.data) for o in seen] == [('empty', None), ('one face', {'faces': 1})]
+    assert bus.current.previous == 'empty'
+
+
+def test_timer_does_not_emit_a_change_that_flickered_back():
+    bus = ObservationBus(debounce=0.1, min_interval=0.0)
+    bus.publish('one face', immediate=True)
+    bus.publish('no face')
+    bus.publish('one face')
+    time.sleep(0.3)
+    assert bus.current.text == 'one face' and bus.stats['emitted'] == 1
+
+
+def test_subscriber_errors_do_not_stop_delivery():
+    bus = ObservationBus(debounce=0.0, min_interval=0.0)
+    seen = []
+
+    def broken(obs):
+        raise RuntimeError('boom')
+    bus.subscribe(broken)
+    unsubscribe = bus.subscribe(seen.append)
+    bus.publish('a', now=0.0)
+    unsubscribe()
+    bus.publish('b', now=1.0)
+    assert [o.text for o in seen] == ['a']
+
+
+def test_queue_subscriber_receives_changes_from_another_thread():
+    async def main():
+        bus = ObservationBus(debounce=0.0, min_interval=0.0)
+        q = bus.subscribe_queue()
+        await asyncio.to_thread(bus.publish, 'person at desk', {'faces': 1})
+        return await asyncio.wait_for(q.get(), 2)
+    obs = asyncio.run(main())
+    assert isinstance(obs, Observation)
+    assert (obs.text, obs.data, obs.previous) == ('person at desk', {'faces': 1}, None)
+
+
+def test_slow_queue_consumer_keeps_the_newest_changes():
+    async def main():
+        bus = ObservationBus(debounce=0.0, min_interval=0.0)
+        q = bus.subscribe_queue(maxsize=2)
+        for i, text in enumerate('abc'):
+            bus.publish(text, now=float(i))
+        await asyncio.sleep(0)
+        return [q.get_nowait().text for _ in range(q.qsize())]
+    assert asyncio.run(main()) == ['b', 'c']
+
+
+def test_file_sink_coalesces_writes(tmp_path):
+    path = str(tmp_path / 'camera_view.txt')
+    sink = FileSink(path, min_interval=0.2)
+    for text in ('a', 'b', 'c'):
+        sink(Observation(text, None, 0.0, None))
+    assert open(path, encoding='utf-8').read() == 'a'
+    time.sleep(0.4)
+    assert open(path, encoding='utf-8').read() == 'c'
+    assert sink.writes == 2
@@ -0,0 +1,80 @@
+import json
+import time
+
+import pytest
+
+from features.observation_log import ObservationLog
+
+
+@pytest.fixture
+def log(tmp_path):
+    log = ObservationLog(str(tmp_path / 'camera_observations.db'), max_run_gap=60.0)
+    yield log
+    log.close()
+
+
+def test_repeats_are_folded_into_one_run(log):
+    ids = {log.append('1 person', num_faces=1, ts=100.0 + i) for i in range(5)}
+    assert len(ids) == 1
+    (run,) = log.recent()
+    assert (run['start_ts'], run['end_ts'], run['count']) == (100.0, 104.0, 5)
+
+
+def test_a_change_or_a_long_gap_starts_a_new_run(log):
+    log.append('1 person', num_faces=1, ts=100.0)
+    log.append('nobody', num_faces=0, ts=110.0)
+    log.append('nobody', num_faces=0, ts=111.0)
+    log.append('nobody', num_faces=0, ts=500.0)
+    log.append('nobody', num_faces=0, ts=501.0, data={'objects': ['cup']})
+    assert [(r['description'], r['count']) for r in log.recent()] == [
+        ('1 person', 1), ('nobody', 2), ('nobody', 1), ('nobody', 1)]
+    assert log.recent(1)[0]['data'] == {'objects': ['cup']}
+
+
+def test_runs_continue_after_reopening(tmp_path):
+    path = str(tmp_path / 'camera_observations.db')
+    first = ObservationLog(path)
+    run = first.append('1 person', num_faces=1, ts=100.0)
+    first.close()
+    second = ObservationLog(path)
+    assert second.append('1 person', num_faces=1, ts=101.0) == run
+    second.close()
+
+
+def test_query_returns_runs_overlapping_the_range(log):
+    log.append('a', ts=100.0)
+    log.append('a', ts=150.0)
+    log.append('b', ts=200.0)
+    log.append('c', ts=300.0)
+    assert [r['description'] for r in log.query(140.0, 250.0)] == ['a', 'b']
+    assert [r['description'] for r in log.query(since=250.0)] == ['c']
+    assert len(log.query(limit=2)) == 2
+
+
+def test_face_stats_weights_runs_by_time(log):
+    log.append('1 person', num_faces=1, ts=0.0)
+    log.append('1 person', num_faces=1, ts=30.0)
+    log.append('2 people', num_faces=2, ts=60.0)
+    log.append('nobody', num_faces=0, ts=90.0)
+    log.append('nobody', num_faces=0, ts=120.0)
+    stats = log.face_stats(0.0, 120.0)
+    assert stats['max_faces'] == 2
+    assert stats['seconds_observed'] == 120.0
+    assert stats['seconds_with_faces'] == 90.0
+    assert stats['avg_faces'] == pytest.approx((60 * 1 + 30 * 2) / 120.0)
+    assert (stats['runs'], stats['samples']) == (3, 5)
+
+
+def test_old_json_history_is_imported_once(tmp_path):
+    stamp = lambda ts: time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(ts))
+    old = [{'timestamp': stamp(1_700_000_000), 'description': '1 person', 'num_faces': 1},
+           {'timestamp': stamp(1_700_000_001), 'description': '1 person', 'num_faces': 1},
+           {'timestamp': 'not a date', 'description': 'skipped'}]
+    (tmp_path / 'camera_observations.json').write_text(json.dumps(old), encoding='utf-8')
+    log = ObservationLog(str(tmp_path / 'camera_observations.db'))
+    try:
+        assert [(r['description'], r['count']) for r in log.recent()] == [('1 person', 2)]
+        assert not (tmp_path / 'camera_observations.json').exists()
+        assert (tmp_path / 'camera_observations.json.imported').exists()
+    finally:
+        log.close()
@@ -0,0 +1,64 @@
+import sqlite3
+
+from Jarvis_memory import _ReadCache
+
+
+def _db(memory):
+    return memory._db_path()
+
+
+def test_repeated_reads_hit_the_cache(memory):
+    memory.save_message('user', 'hello', ts=1.0)
+    memory.flush()
+    first = memory.recall_last(5)
+    before = memory.read_cache_stats()
+    assert memory.recall_last(5) == first
+    after = memory.read_cache_stats()
+    assert after['hits'] == before['hits'] + 1 and after['misses'] == before['misses']
+
+
+def test_own_writes_invalidate(memory):
+    memory.save_message('user', 'one', ts=1.0)
+    memory.flush()
+    assert len(memory.recall_last(5)) == 1
+    memory.save_message('user', 'two', ts=2.0)
+    memory.flush()
+    assert [m['text'] for m in memory.recall_last(5)] == ['two', 'one']
+
+
+def test_commit_from_another_connection_invalidates(memory):
+    memory.save_message('user', 'one', ts=1.0)
+    memory.flush()
+    assert len(memory.recall_last(5)) == 1
+    # e.g. the GUI process or a tool writing to the same DB
+    conn = sqlite3.connect(_db(memory))
+    conn.execute("INSERT INTO messages (sender, text, timestamp) VALUES ('assistant', 'from elsewhere', 5.0)")
+    conn.commit()
+    conn.close()
+    assert memory.recall_last(5)[0]['text'] == 'from elsewhere'
+
+
+def test_callers_get_copies(memory):
+    memory.save_message('user', 'original', ts=1.0)
+    memory.flush()
+    memory.recall_last(5)[0]['text'] = 'mutated'
+    assert memory.recall_last(5)[0]['text'] == 'original'
+
+
+def test_lru_eviction_and_disable(memory):
+    cache = _ReadCache(maxsize=2)
+    calls = []
+
+    def compute(key):
+        return lambda conn: calls.append(key) or key
+    for key in ('a', 'b', 'a', 'c', 'b'):
+        cache.query(key, compute(key))
+    # 'b' was evicted by 'c' ('a' had just been used)
+    assert calls == ['a', 'b', 'c', 'b']
+    cache.close()
+
+    off = _ReadCache(maxsize=0)
+    off.query('a', compute('a'))
+    off.query('a', compute('a'))
+    assert calls[-2:] == ['a', 'a']
+    off.close()
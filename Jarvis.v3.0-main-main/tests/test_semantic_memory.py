@@ -0,0 +1,30 @@
+import pytest
+
+np = pytest.importorskip('numpy')
+
+
+@pytest.fixture
+def sem(memory, monkeypatch):
+    import Jarvis_semantic_memory
+    monkeypatch.setattr(Jarvis_semantic_memory, '_index', Jarvis_semantic_memory.SemanticIndex())
+    return Jarvis_semantic_memory
+
+
+def test_warm_up_indexes_the_backlog_once(memory, sem):
+    memory.save_message('user', 'what is the weather in Mumbai today', ts=100.0)
+    memory.save_message('user', 'play some music', ts=200.0)
+    memory.flush()
+    assert memory.warm_semantic_index() == 2
+    assert memory.warm_semantic_index() == 0
+    memory.save_message('user', 'remind me about the weather tomorrow', ts=300.0)
+    memory.flush()
+    assert memory.warm_semantic_index() == 1
+
+
+def test_recall_after_warm_up(memory, sem):
+    memory.save_message('user', 'what is the weather in Mumbai today', ts=100.0)
+    memory.save_message('user', 'play some music', ts=200.0)
+    memory.flush()
+    memory.warm_semantic_index()
+    hits = memory.recall_relevant('weather in Mumbai', 1)
+    assert [h['text'] for h in hits] == ['what is the weather in Mumbai today']
@@ -0,0 +1,72 @@
+import queue
+import threading
+import time
+
+import pytest
+
+
+def _record(m, tool, ms, status='ok', args=None, at=1000.0):
+    m.record_tool_call(tool, args, started_at=at, ended_at=at + ms / 1000.0, status=status,
+                       result='x' * 10, error='boom' if status != 'ok' else None)
+
+
+def test_latency_stats_per_tool(memory):
+    for ms in (10, 20, 30, 40):
+        _record(memory, 'google_search', ms)
+    _record(memory, 'get_weather', 500, status='error')
+    stats = {d['tool']: d for d in memory.tool_latency_stats()}
+    search = stats['google_search']
+    assert search['calls'] == 4 and search['errors'] == 0
+    assert search['avg_ms'] == pytest.approx(25.0)
+    assert search['p50_ms'] == pytest.approx(20.0) and search['max_ms'] == pytest.approx(40.0)
+    assert stats['get_weather']['error_rate'] == 1.0
+    # slowest total first; shares add up to the whole window
+    assert [d['tool'] for d in memory.tool_latency_stats()] == ['get_weather', 'google_search']
+    assert sum(d['share'] for d in stats.values()) == pytest.approx(1.0)
+
+
+def test_stats_window(memory):
+    _record(memory, 'open', 5, at=100.0)
+    _record(memory, 'open', 5, at=200.0)
+    assert memory.tool_latency_stats(since=150.0)[0]['calls'] == 1
+    assert memory.tool_latency_stats(until=150.0)[0]['calls'] == 1
+
+
+def test_error_rates(memory):
+    _record(memory, 'open', 5)
+    _record(memory, 'open', 5, status='error')
+    assert memory.tool_error_rates() == {'open': 0.5}
+
+
+def test_identical_args_group_together(memory):
+    _record(memory, 'google_search', 10, args={'query': 'weather', 'n': 1})
+    _record(memory, 'google_search', 30, args='{"n": 1, "query": "weather"}')
+    _record(memory, 'google_search', 10, args={'query': 'news'})
+    top = memory.frequent_tool_args('google_search')
+    assert top[0]['calls'] == 2 and top[0]['avg_ms'] == pytest.approx(20.0)
+    assert len(top) == 2
+
+
+def test_track_tool_call_records_errors(memory):
+    try:
+        with memory.track_tool_call('close', {'name': 'notepad'}):
+            raise RuntimeError('no such window')
+    except RuntimeError:
+        pass
+    assert memory.tool_error_rates() == {'close': 1.0}
+
+
+def test_full_writer_queue_drops_ledger_rows_instead_of_blocking(memory):
+    w = memory.MemoryWriter(queue_size=1)
+    release = threading.Event()
+    started = threading.Event()
+    w.run_job(lambda conn: (started.set(), release.wait(5)))
+    assert started.wait(5)
+    w.submit('user', 'fills the queue')
+    t0 = time.monotonic()
+    fut = w.submit_tool_call(('open', None, None, 1.0, 1.0, 0.0, 'ok', None, None))
+    assert time.monotonic() - t0 < 0.5
+    assert isinstance(fut.exception(timeout=0), queue.Full)
+    assert w.dropped_tool_calls == 1
+    release.set()
+    w.close()
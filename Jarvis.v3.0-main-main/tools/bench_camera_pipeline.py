@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+"""Benchmark the CameraManager capture/analysis pipeline without a webcam.
+
+Frames come from a features/frame_sources.py source (synthetic by default),
+go through the real capture thread, shared-memory ring and analysis thread,
+and the pipeline counters are sampled after a warm-up:
+
+  capture fps     frames the capture thread took from the source
+  analysis fps    frames described by the analysis thread
+  latency         capture -> analysis done, p50/p95/p99 (ms)
+  dropped         source frames missed by capture / frames replaced before analysis
+  cpu             CPU per stage (thread_time of each thread) as % of one core
+
+Usage:
+    python tools/bench_camera_pipeline.py
+    python tools/bench_camera_pipeline.py --source synthetic:1280x720@60 --seconds 20
+    python tools/bench_camera_pipeline.py --source clips/desk.mp4 --analysis-fps 10 --json
+    python tools/bench_camera_pipeline.py --min-capture-fps 28 --max-p95-ms 150   # exit 1 on regression
+
+Runs in a temporary data directory with its own ring name, so it neither
+touches jarvis_data/ nor attaches to a running Jarvis.
+"""
+import argparse
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+repo_root = Path(__file__).resolve().parents[1]
+if str(repo_root) not in sys.path:
+    sys.path.insert(0, str(repo_root))
+
+
+def _snapshot(camera):
+    stats = camera.pipeline_stats()
+    stats['t'] = time.monotonic()
+    stats['process_cpu'] = time.process_time()
+    return stats
+
+
+def run(source: str, seconds: float, warmup: float, analysis_fps: float, analysis_width: int,
+        realtime: bool) -> dict:
+    from features import camera_manager
+    from features.frame_sources import make_source
+
+    camera_manager.CAMERA_VIEW_FILE = False
+    camera = camera_manager.camera
+    camera.ring_name = f"jarvis_bench_{os.getpid()}"
+    camera.configure_analysis(fps=analysis_fps, width=analysis_width)
+    camera.set_frame_source(make_source(source, realtime=realtime))
+    ok, msg = camera.start(owner='bench')
+    if not ok:
+        raise RuntimeError(msg)
+    try:
+        time.sleep(warmup)
+        camera.reset_stats()
+        first = _snapshot(camera)
+        time.sleep(seconds)
+        last = _snapshot(camera)
+    finally:
+        camera.stop(owner='bench')
+
+    elapsed = last['t'] - first['t']
+    props = camera.camera_properties
+    return {
+        'source': source,
+        'resolution': f"{int(props.get('width', 0))}x{int(props.get('height', 0))}",
+        'source_fps': props.get('fps'),
+        'realtime': realtime,
+        'seconds': round(elapsed, 2),
+        'capture_fps': (last['captured'] - first['captured']) / elapsed,
+        'analysis_fps': (last['analyzed'] - first['analyzed']) / elapsed,
+        'analysis_target_fps': analysis_fps,
+        'latency_ms': last.get('latency_ms', {}),
+        'source_dropped': last.get('source_dropped', 0) - first.get('source_dropped', 0),
+        'analysis_skipped': last['dropped'] - first['dropped'],
+        'cpu_pct': {
+            'capture': 100.0 * (last['capture_cpu'] - first['capture_cpu']) / elapsed,
+            'analysis': 100.0 * (last['analysis_cpu'] - first['analysis_cpu']) / elapsed,
+            'history': 100.0 * (last['history_cpu'] - first['history_cpu']) / elapsed,
+            'process': 100.0 * (last['process_cpu'] - first['process_cpu']) / elapsed,
+        },
+        'faces': last['faces'],
+        'history': last['history'],
+    }
+
+
+def _print_report(r: dict):
+    lat = r['latency_ms']
+    print(f"source        {r['source']} ({r['resolution']} @ {r['source_fps']:g} fps"
+          f"{'' if r['realtime'] else ', unpaced'})")
+    print(f"measured      {r['seconds']} s")
+    print(f"capture fps   {r['capture_fps']:.1f}")
+    print(f"analysis fps  {r['analysis_fps']:.1f} (target {r['analysis_target_fps']:g})")
+    if lat:
+        print(f"latency ms    p50 {lat['p50']:.1f}  p95 {lat['p95']:.1f}  p99 {lat['p99']:.1f}"
+              f"  max {lat['max']:.1f}  (n={lat['samples']})")
+    else:
+        print("latency ms    no frames analysed")
+    print(f"dropped       {r['source_dropped']} by capture, {r['analysis_skipped']} skipped by analysis")
+    cpu = r['cpu_pct']
+    print(f"cpu %         capture {cpu['capture']:.1f}  analysis {cpu['analysis']:.1f}"
+          f"  history {cpu['history']:.1f}  process {cpu['process']:.1f}")
+    f = r['faces']
+    print(f"face detector {f.get('detections', 0)} runs, {f.get('tracked', 0)} tracked,"
+          f" {f.get('skipped', 0)} skipped")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the camera capture/analysis pipeline")
+    parser.add_argument('--source', default='synthetic', help="frame source spec (default: synthetic 640x480@30)")
+    parser.add_argument('--seconds', type=float, default=10.0)
+    parser.add_argument('--warmup', type=float, default=2.0)
+    parser.add_argument('--analysis-fps', type=float, default=None)
+    parser.add_argument('--analysis-width', type=int, default=None)
+    parser.add_argument('--unpaced', action='store_true', help="read the source as fast as possible")
+    parser.add_argument('--json', action='store_true', help="print the result as JSON")
+    parser.add_argument('--min-capture-fps', type=float, default=None)
+    parser.add_argument('--min-analysis-fps', type=float, default=None)
+    parser.add_argument('--max-p95-ms', type=float, default=None)
+    args = parser.parse_args()
+
+    # Relative sources are resolved before moving into the scratch directory.
+    source = args.source if args.source.startswith('synthetic') else os.path.abspath(args.source)
+    workdir = tempfile.mkdtemp(prefix='jarvis_bench_')
+    cwd = os.getcwd()
+    os.chdir(workdir)
+    try:
+        from features import camera_manager
+        r = run(source, args.seconds, args.warmup,
+                camera_manager.ANALYSIS_FPS if args.analysis_fps is None else args.analysis_fps,
+                camera_manager.ANALYSIS_WIDTH if args.analysis_width is None else args.analysis_width,
+                not args.unpaced)
+    finally:
+        os.chdir(cwd)
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    if args.json:
+        print(json.dumps(r, indent=2))
+    else:
+        _print_report(r)
+
+    failures = []
+    if args.min_capture_fps is not None and r['capture_fps'] < args.min_capture_fps:
+        failures.append(f"capture fps {r['capture_fps']:.1f} < {args.min_capture_fps}")
+    if args.min_analysis_fps is not None and r['analysis_fps'] < args.min_analysis_fps:
+        failures.append(f"analysis fps {r['analysis_fps']:.1f} < {args.min_analysis_fps}")
+    p95 = r['latency_ms'].get('p95')
+    if args.max_p95_ms is not None and (p95 is None or p95 > args.max_p95_ms):
+        failures.append(f"latency p95 {p95} ms > {args.max_p95_ms}")
+    for f in failures:
+        print(f"FAIL: {f}", file=sys.stderr)
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""Offscreen paint benchmark for the HUD's animated widgets.
+
+Renders AnimatedRings and a NeonBar from jarvis_gui.py into a QImage, with
+no window and no camera, advancing the ring phase / bar value every frame
+the way NovaHUD does, and reports the paint time per frame:
+
+  first    the first frame, which builds the cached layers (as after a resize)
+  frame    steady-state frames, mean / p50 / p95 / max (ms)
+
+Usage:
+    python tools/bench_hud_render.py
+    python tools/bench_hud_render.py --frames 1000 --size 800x800 --json
+    python tools/bench_hud_render.py --max-p95-ms 4     # exit 1 on regression
+
+Uses the Qt 'offscreen' platform unless QT_QPA_PLATFORM is already set.
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+from pathlib import Path
+
+repo_root = Path(__file__).resolve().parents[1]
+if str(repo_root) not in sys.path:
+    sys.path.insert(0, str(repo_root))
+
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+
+
+def _size(spec: str):
+    w, _, h = spec.lower().partition('x')
+    return int(w), int(h or w)
+
+
+def _time_frames(widget, frames: int, step) -> dict:
+    from PySide6.QtGui import QImage, QPainter
+    from PySide6.QtCore import Qt, QPoint
+
+    image = QImage(widget.size(), QImage.Format_ARGB32_Premultiplied)
+    times = []
+    for i in range(frames + 1):
+        step(i)
+        image.fill(Qt.transparent)
+        t0 = time.perf_counter()
+        p = QPainter(image)
+        widget.render(p, QPoint())
+        p.end()
+        times.append((time.perf_counter() - t0) * 1000.0)
+    first, rest = times[0], sorted(times[1:])
+    return {
+        'size': f"{widget.width()}x{widget.height()}",
+        'frames': frames,
+        'first_ms': first,
+        'mean_ms': statistics.fmean(rest),
+        'p50_ms': rest[len(rest) // 2],
+        'p95_ms': rest[min(len(rest) - 1, int(len(rest) * 0.95))],
+        'max_ms': rest[-1],
+    }
+
+
+def run(frames: int, rings_size, bar_size) -> dict:
+    from PySide6.QtWidgets import QApplication
+    app = QApplication.instance() or QApplication(sys.argv[:1])
+    import jarvis_gui
+
+    rings = jarvis_gui.AnimatedRings()
+    rings.resize(*rings_size)
+    rings.setAttribute(jarvis_gui.Qt.WA_DontShowOnScreen)
+    rings.show()
+    app.processEvents()
+
+    def spin(i):
+        rings.phase = (rings.phase + jarvis_gui.RING_SPEED / jarvis_gui.ANIM_FPS) % 1.0
+        if i and i % 120 == 0:
+            rings.click_boost = 4.0   # exercise the click effect now and then
+
+    bar = jarvis_gui.NeonBar("CPU UTILIZATION", init=40)
+    bar.resize(*bar_size)
+    bar.setAttribute(jarvis_gui.Qt.WA_DontShowOnScreen)
+    bar.show()
+    app.processEvents()
+
+    def fill(i):
+        bar.setValue(50 + 45 * ((i % 200) / 100.0 - 1))
+
+    result = {'platform': os.environ.get('QT_QPA_PLATFORM'),
+              'rings': _time_frames(rings, frames, spin),
+              'neonbar': _time_frames(bar, frames, fill)}
+    rings.close()
+    bar.close()
+    return result
+
+
+def _print_report(r: dict):
+    print(f"platform      {r['platform']}")
+    for name in ('rings', 'neonbar'):
+        s = r[name]
+        print(f"{name:<13} {s['size']}, {s['frames']} frames: first {s['first_ms']:.2f} ms, "
+              f"mean {s['mean_ms']:.2f}  p50 {s['p50_ms']:.2f}  p95 {s['p95_ms']:.2f}  max {s['max_ms']:.2f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark offscreen painting of the HUD widgets")
+    parser.add_argument('--frames', type=int, default=600)
+    parser.add_argument('--size', default='600x600', help="AnimatedRings size, WxH (default 600x600)")
+    parser.add_argument('--bar-size', default='300x40', help="NeonBar size, WxH (default 300x40)")
+    parser.add_argument('--json', action='store_true', help="print the result as JSON")
+    parser.add_argument('--max-p95-ms', type=float, default=None, help="fail if the rings' p95 exceeds this")
+    args = parser.parse_args()
+
+    r = run(max(1, args.frames), _size(args.size), _size(args.bar_size))
+    if args.json:
+        print(json.dumps(r, indent=2))
+    else:
+        _print_report(r)
+
+    if args.max_p95_ms is not None and r['rings']['p95_ms'] > args.max_p95_ms:
+        print(f"FAIL: rings p95 {r['rings']['p95_ms']:.2f} ms > {args.max_p95_ms}", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""Startup benchmark for Jarvis_memory.
+
+Measures, in fresh interpreter processes, what a worker pays at cold start:
+
+  import       `import Jarvis_memory` (lazy: no directories, DB or DDL)
+  import+init  import followed by init_db(), i.e. the old import-time cost
+  first call   the first recall_last(), which now pays schema setup
+
+each against a brand-new data directory and against an existing DB.
+
+Usage:
+    python tools/bench_memory_import.py            # 15 runs per case
+    python tools/bench_memory_import.py --runs 50
+"""
+import argparse
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+repo_root = Path(__file__).resolve().parents[1]
+
+_PROBE = r'''
+import json, os, sys, time
+sys.path.insert(0, {root!r})
+t0 = time.perf_counter()
+import Jarvis_memory
+t1 = time.perf_counter()
+created = os.path.exists('jarvis_data')
+if {mode!r} == 'init':
+    Jarvis_memory.init_db()
+elif {mode!r} == 'call':
+    Jarvis_memory.recall_last(10)
+t2 = time.perf_counter()
+print(json.dumps({{'import': t1 - t0, 'after': t2 - t1, 'created_on_import': created}}))
+'''
+
+
+def _run(mode: str, cwd: str) -> dict:
+    code = _PROBE.format(root=str(repo_root), mode=mode)
+    out = subprocess.run([sys.executable, '-c', code], cwd=cwd, capture_output=True, text=True, check=True)
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def _bench(mode: str, runs: int, existing_db: bool) -> dict:
+    imports, totals, created = [], [], False
+    for _ in range(runs):
+        d = tempfile.mkdtemp(prefix='jarvis_bench_')
+        try:
+            if existing_db:
+                _run('init', d)
+            r = _run(mode, d)
+        finally:
+            shutil.rmtree(d, ignore_errors=True)
+        imports.append(r['import'] * 1000)
+        totals.append((r['import'] + r['after']) * 1000)
+        created = created or r['created_on_import']
+    return {'import_ms': statistics.median(imports), 'total_ms': statistics.median(totals),
+            'created_on_import': created}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark Jarvis_memory import/cold-start cost")
+    parser.add_argument('--runs', type=int, default=15)
+    args = parser.parse_args()
+
+    # Warm the bytecode cache so the first run does not include compilation.
+    _run('import', tempfile.gettempdir())
+
+    print(f"median of {args.runs} fresh processes (ms)")
+    print(f"{'case':<34}{'import':>10}{'total':>10}  touches disk on import")
+    for existing in (False, True):
+        label = 'existing DB' if existing else 'new data dir'
+        for mode, name in (('import', 'import'), ('init', 'import+init (old)'), ('call', 'import+first call')):
+            r = _bench(mode, args.runs, existing)
+            touched = ('yes' if r['created_on_import'] else 'no') if not existing else '-'
+            print(f"{name + ' / ' + label:<34}{r['import_ms']:>10.2f}{r['total_ms']:>10.2f}  {touched}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""Export the last seconds of camera frames as a clip or a contact sheet.
+
+The frames live in memory in the process that captures the camera (the
+GUI). If one is running, this asks it for the export with a request file in
+jarvis_data/camera_export_requests/ and waits for the file to appear, so
+the result covers what happened *before* the command was run:
+
+    python tools/camera_export.py clip                      # jarvis_data/camera_exports/clip_*.avi
+    python tools/camera_export.py sheet --seconds 10 --count 8
+    python tools/camera_export.py clip --out what_happened.mp4
+
+With no camera owner running, --record SECONDS captures that long in this
+process first (from the webcam, or from --source, a features/frame_sources
+spec such as 'synthetic' or a video file) and then exports it.
+"""
+import argparse
+import os
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+
+repo_root = Path(__file__).resolve().parents[1]
+if str(repo_root) not in sys.path:
+    sys.path.insert(0, str(repo_root))
+
+from features import camera_manager
+from features.storage import data_path
+
+
+def _default_out(kind: str) -> str:
+    folder = data_path(camera_manager.EXPORT_DIR)
+    os.makedirs(folder, exist_ok=True)
+    ext = '.avi' if kind == 'clip' else '.jpg'
+    return os.path.join(folder, f"{kind}_{datetime.now().strftime('%Y%m%d_%H%M%S')}{ext}")
+
+
+def request_from_owner(kind: str, out: str, seconds, count: int, timeout: float) -> bool:
+    """Ask the capturing process for the export and wait for it. True on success."""
+    future = camera_manager.camera.request_export(kind, out, seconds, count, timeout=timeout)
+    try:
+        future.result()
+        return True
+    except TimeoutError as e:
+        print(str(e))
+    except Exception as e:
+        print(f"Export failed: {e}")
+    return False
+
+
+def record_and_export(kind: str, out: str, seconds, count: int, record: float, source) -> bool:
+    camera = camera_manager.camera
+    if source:
+        camera.set_frame_source(source)
+    ok, msg = camera.start(owner='export')
+    print(msg)
+    if not ok:
+        return False
+    try:
+        time.sleep(record)
+        if kind == 'clip':
+            future = camera.export_clip(out, seconds)
+        else:
+            future = camera.export_contact_sheet(out, seconds, count)
+        future.result()
+        return True
+    except Exception as e:
+        print(f"Export failed: {e}")
+        return False
+    finally:
+        camera.stop(owner='export')
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export recent camera frames as a clip or contact sheet")
+    parser.add_argument('kind', choices=['clip', 'sheet'])
+    parser.add_argument('--out', help="output file (.avi/.mp4 for clips, .jpg/.png for sheets)")
+    parser.add_argument('--seconds', type=float, default=None, help="only the last N seconds")
+    parser.add_argument('--count', type=int, default=12, help="frames on a contact sheet")
+    parser.add_argument('--timeout', type=float, default=30.0)
+    parser.add_argument('--record', type=float, default=None,
+                        help="no camera owner running: capture this many seconds here first")
+    parser.add_argument('--source', default=None, help="frame source for --record (default: webcam)")
+    args = parser.parse_args()
+
+    out = os.path.abspath(args.out) if args.out else _default_out(args.kind)
+    owner = camera_manager.camera.get_camera_status().get('shared_from')
+    if owner is not None:
+        print(f"Asking {owner['owner']} (pid {owner['pid']}) for the export...")
+        ok = request_from_owner(args.kind, out, args.seconds, args.count, args.timeout)
+    elif args.record:
+        ok = record_and_export(args.kind, out, args.seconds, args.count, args.record, args.source)
+    else:
+        print("No running camera owner found. Start the GUI, or use --record SECONDS.")
+        ok = False
+    if ok:
+        print(f"Saved {out}")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,322 @@
+#!/usr/bin/env python3
+"""Rebuild or verify the Jarvis memory DB from its JSONL mirror.
+
+Every message saved by Jarvis_memory is also appended to data/memory.jsonl.
+This tool reads that mirror back:
+
+    python tools/memory_rebuild.py verify            # compare mirror vs DB, print a report
+    python tools/memory_rebuild.py verify --deep     # also compare sender/text/timestamp
+    python tools/memory_rebuild.py rebuild           # build jarvis_memory.db.rebuild
+    python tools/memory_rebuild.py rebuild --replace # ...and swap it in (old DB kept as .bak)
+
+The mirror is append-only, so it still holds messages that retention has
+since deleted. Their cutoff is recorded next to it (data/memory_pruned.json):
+verify reports those ids as pruned rather than missing, and rebuild leaves
+them out unless --keep-pruned is given.
+
+Large bodies are compressed and deduplicated into message_bodies the same way
+the live writer does it; mirror entries that only reference an earlier body
+(`body_ref`) are linked to it by hash.
+
+The JSONL file is streamed line by line and loaded with executemany in large
+transactions into a fresh DB with journaling off; the timestamp index and the
+full-text index are built once at the end. Memory use is constant: verify
+keeps the mirror ids in an on-disk temp table, not in Python.
+
+Run it while Jarvis is stopped (it does not coordinate with a live writer).
+"""
+import argparse
+import json
+import os
+import sqlite3
+import sys
+import time
+from pathlib import Path
+
+# Make sure repo root is importable
+repo_root = Path(__file__).resolve().parents[1]
+if str(repo_root) not in sys.path:
+    sys.path.insert(0, str(repo_root))
+
+BATCH_SIZE = 50000
+
+
+def _iter_jsonl(path, stats):
+    """Yield parsed entries, counting lines that are not valid JSON objects."""
+    with open(path, 'r', encoding='utf-8', errors='replace') as f:
+        for line in f:
+            stats['lines'] += 1
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                stats['bad_lines'] += 1
+                continue
+            if not isinstance(entry, dict):
+                stats['bad_lines'] += 1
+                continue
+            yield entry
+
+
+def _to_row(entry):
+    """(id, sender, text, timestamp, metadata_json, body_ref) for a mirror entry.
+
+    body_ref is the hash of a large body written earlier in the mirror when
+    this entry only carries its preview; None otherwise.
+    """
+    rid = entry.get('id')
+    meta = entry.get('metadata')
+    return (rid if isinstance(rid, int) else None,
+            str(entry.get('sender') or 'user'),
+            '' if entry.get('text') is None else str(entry.get('text')),
+            float(entry.get('timestamp') or 0.0),
+            json.dumps(meta, ensure_ascii=False) if meta else None,
+            entry.get('body_hash') if entry.get('body_ref') else None)
+
+
+def rebuild(jsonl_path: str, db_path: str, batch_size: int = BATCH_SIZE, replace: bool = False,
+            keep_pruned: bool = False) -> dict:
+    """Bulk-load jsonl_path into a new DB at db_path + '.rebuild'.
+
+    Messages older than the recorded retention cutoff are skipped unless
+    keep_pruned=True. With replace=True the existing DB (and its -wal/-shm
+    files) is renamed to db_path + '.bak' and the rebuilt file takes its place.
+    """
+    import Jarvis_memory
+
+    cutoff = 0.0 if keep_pruned else Jarvis_memory.pruned_before(jsonl_path)
+
+    out_path = db_path + '.rebuild'
+    for suffix in ('', '-wal', '-shm', '-journal'):
+        if os.path.exists(out_path + suffix):
+            os.remove(out_path + suffix)
+
+    t0 = time.perf_counter()
+    stats = {'lines': 0, 'bad_lines': 0}
+    conn = sqlite3.connect(out_path)
+    conn.execute("PRAGMA journal_mode=OFF")
+    conn.execute("PRAGMA synchronous=OFF")
+    conn.execute("PRAGMA locking_mode=EXCLUSIVE")
+    conn.execute("PRAGMA cache_size=-65536")
+    conn.execute(
+        """
+        CREATE TABLE messages (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            sender TEXT NOT NULL,
+            text TEXT NOT NULL,
+            timestamp REAL NOT NULL,
+            metadata TEXT
+        )
+        """
+    )
+    Jarvis_memory._create_message_bodies(conn)
+    sql = ("INSERT OR REPLACE INTO messages (id, sender, text, timestamp, metadata, flags, body_hash) "
+           "VALUES (?, ?, ?, ?, ?, ?, ?)")
+    cur = conn.cursor()
+    batch = []
+    loaded = 0
+    skipped = 0
+    for entry in _iter_jsonl(jsonl_path, stats):
+        row = _to_row(entry)
+        if row[3] < cutoff:
+            skipped += 1
+            if row[5] is None and entry.get('body_hash'):
+                # Later entries may reference this body; orphans are dropped below.
+                Jarvis_memory._pack_body(cur, row[2])
+            continue
+        if row[5] is not None:
+            text, flags, body_hash = row[2], Jarvis_memory.FLAG_BODY_EXTERNAL, row[5]
+        else:
+            # Large bodies are compressed and deduplicated exactly as the writer does.
+            text, flags, body_hash, _ = Jarvis_memory._pack_body(cur, row[2])
+        batch.append((row[0], row[1], text, row[3], row[4], flags, body_hash))
+        if len(batch) >= batch_size:
+            conn.executemany(sql, batch)
+            conn.commit()
+            loaded += len(batch)
+            batch = []
+    if batch:
+        conn.executemany(sql, batch)
+        conn.commit()
+        loaded += len(batch)
+    if skipped:
+        conn.execute("DELETE FROM message_bodies WHERE hash NOT IN "
+                     "(SELECT body_hash FROM messages WHERE body_hash IS NOT NULL)")
+        conn.commit()
+    t_load = time.perf_counter()
+
+    # Deferred: index + FTS backfill once, over the loaded table.
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_messages_timestamp ON messages(timestamp)")
+    conn.commit()
+    Jarvis_memory._apply_migrations(conn)
+    rows = conn.execute("SELECT COUNT(*) FROM messages").fetchone()[0]
+    conn.execute("PRAGMA locking_mode=NORMAL")
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.close()
+    t_index = time.perf_counter()
+
+    report = {
+        'jsonl': jsonl_path,
+        'output': out_path,
+        'lines': stats['lines'],
+        'bad_lines': stats['bad_lines'],
+        'loaded': loaded,
+        'skipped_pruned': skipped,
+        'pruned_before': cutoff,
+        'rows': rows,
+        'load_seconds': round(t_load - t0, 3),
+        'index_seconds': round(t_index - t_load, 3),
+    }
+    if replace:
+        Jarvis_memory.shutdown()
+        backup = db_path + '.bak'
+        for suffix in ('', '-wal', '-shm'):
+            if os.path.exists(backup + suffix):
+                os.remove(backup + suffix)
+            # Move the old WAL along with the DB: a stale WAL next to the new
+            # file would be replayed into it.
+            if os.path.exists(db_path + suffix):
+                os.replace(db_path + suffix, backup + suffix)
+        os.replace(out_path, db_path)
+        report['output'] = db_path
+        report['backup'] = backup
+    return report
+
+
+def verify(jsonl_path: str, db_path: str, deep: bool = False, sample: int = 10) -> dict:
+    """Compare the ids in jsonl_path with the messages table in db_path.
+
+    Reports counts, ids missing on either side (with a small sample), duplicate
+    mirror ids and, with deep=True, rows whose sender/text/timestamp differ.
+    Mirror ids older than the recorded retention cutoff that are gone from the
+    DB are reported as pruned and do not count as drift.
+    """
+    import Jarvis_memory
+
+    cutoff = Jarvis_memory.pruned_before(jsonl_path)
+    stats = {'lines': 0, 'bad_lines': 0}
+    conn = sqlite3.connect(db_path)
+    conn.execute("PRAGMA temp_store=FILE")
+    conn.execute("CREATE TEMP TABLE jsonl_ids (id INTEGER PRIMARY KEY, timestamp REAL NOT NULL)")
+    entries = 0
+    no_id = 0
+    mismatched = 0
+    mismatched_sample = []
+    batch = []
+
+    def check(rows):
+        nonlocal mismatched
+        ids = [r[0] for r in rows]
+        marks = ','.join('?' * len(ids))
+        found = {r[0]: r for r in conn.execute(
+            f"SELECT {Jarvis_memory._MSG_COLS}, m.body_hash FROM {Jarvis_memory._MSG_FROM} "
+            f"WHERE m.id IN ({marks})", ids)}
+        for r in rows:
+            d = found.get(r[0])
+            if d is None:
+                continue
+            if r[5] is not None:
+                same_text = d[7] == r[5]
+            else:
+                same_text = Jarvis_memory._unpack_text(d[2], d[5], d[6]) == r[2]
+            if d[1] != r[1] or not same_text or abs(d[3] - r[3]) > 1e-6:
+                mismatched += 1
+                if len(mismatched_sample) < sample:
+                    mismatched_sample.append(r[0])
+
+    for entry in _iter_jsonl(jsonl_path, stats):
+        row = _to_row(entry)
+        if row[0] is None:
+            no_id += 1
+            continue
+        entries += 1
+        batch.append(row)
+        if len(batch) >= 500:
+            conn.executemany("INSERT OR IGNORE INTO jsonl_ids (id, timestamp) VALUES (?, ?)",
+                             [(r[0], r[3]) for r in batch])
+            if deep:
+                check(batch)
+            batch = []
+    if batch:
+        conn.executemany("INSERT OR IGNORE INTO jsonl_ids (id, timestamp) VALUES (?, ?)",
+                             [(r[0], r[3]) for r in batch])
+        if deep:
+            check(batch)
+
+    unique = conn.execute("SELECT COUNT(*) FROM jsonl_ids").fetchone()[0]
+    db_rows = conn.execute("SELECT COUNT(*) FROM messages").fetchone()[0]
+    pruned = conn.execute(
+        "SELECT COUNT(*) FROM jsonl_ids j LEFT JOIN messages m ON m.id = j.id "
+        "WHERE m.id IS NULL AND j.timestamp < ?", (cutoff,)).fetchone()[0]
+    missing_in_db = conn.execute(
+        "SELECT COUNT(*) FROM jsonl_ids j LEFT JOIN messages m ON m.id = j.id "
+        "WHERE m.id IS NULL AND j.timestamp >= ?", (cutoff,)).fetchone()[0]
+    missing_in_jsonl = conn.execute(
+        "SELECT COUNT(*) FROM messages m LEFT JOIN jsonl_ids j ON j.id = m.id WHERE j.id IS NULL").fetchone()[0]
+    sample_db = [r[0] for r in conn.execute(
+        "SELECT j.id FROM jsonl_ids j LEFT JOIN messages m ON m.id = j.id "
+        "WHERE m.id IS NULL AND j.timestamp >= ? ORDER BY j.id LIMIT ?", (cutoff, sample))]
+    sample_jsonl = [r[0] for r in conn.execute(
+        "SELECT m.id FROM messages m LEFT JOIN jsonl_ids j ON j.id = m.id WHERE j.id IS NULL ORDER BY m.id LIMIT ?",
+        (sample,))]
+    conn.close()
+
+    report = {
+        'jsonl': jsonl_path,
+        'db': db_path,
+        'lines': stats['lines'],
+        'bad_lines': stats['bad_lines'],
+        'entries_without_id': no_id,
+        'jsonl_entries': entries,
+        'jsonl_unique_ids': unique,
+        'duplicate_ids': entries - unique,
+        'db_rows': db_rows,
+        'pruned_before': cutoff,
+        'pruned': pruned,
+        'missing_in_db': missing_in_db,
+        'missing_in_db_sample': sample_db,
+        'missing_in_jsonl': missing_in_jsonl,
+        'missing_in_jsonl_sample': sample_jsonl,
+    }
+    if deep:
+        report['content_mismatches'] = mismatched
+        report['content_mismatch_sample'] = mismatched_sample
+    report['in_sync'] = (missing_in_db == 0 and missing_in_jsonl == 0 and not mismatched
+                         and stats['bad_lines'] == 0)
+    return report
+
+
+def main():
+    import Jarvis_memory
+
+    parser = argparse.ArgumentParser(description="Rebuild or verify the Jarvis memory DB from data/memory.jsonl")
+    parser.add_argument('command', choices=['verify', 'rebuild'])
+    parser.add_argument('--jsonl', default=None, help='Path to memory.jsonl (default: data/memory.jsonl)')
+    parser.add_argument('--db', default=None, help='Path to the DB (default: jarvis_data/jarvis_memory.db)')
+    parser.add_argument('--batch-size', type=int, default=BATCH_SIZE, help='rebuild: rows per transaction')
+    parser.add_argument('--deep', action='store_true', help='verify: also compare row contents')
+    parser.add_argument('--replace', action='store_true', help='rebuild: swap the rebuilt DB into place')
+    parser.add_argument('--keep-pruned', action='store_true',
+                        help='rebuild: also restore messages retention has deleted')
+    args = parser.parse_args()
+
+    jsonl_path = args.jsonl or Jarvis_memory._memory_jsonl_path()
+    db_path = args.db or Jarvis_memory._db_path()
+    if not os.path.exists(jsonl_path):
+        print(f"JSONL mirror not found: {jsonl_path}")
+        sys.exit(2)
+
+    if args.command == 'verify':
+        report = verify(jsonl_path, db_path, deep=args.deep)
+    else:
+        report = rebuild(jsonl_path, db_path, batch_size=args.batch_size, replace=args.replace,
+                         keep_pruned=args.keep_pruned)
+    print(json.dumps(report, indent=2))
+    if args.command == 'verify' and not report['in_sync']:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()